@@ -0,0 +1,177 @@
+"""CarRentalService over the JSON API of api_server.py.
+
+    service = RemoteService('http://127.0.0.1:8765')
+    rows = service.get_vehicle_rows()
+
+``main.py`` uses it instead of opening the database when
+``CAR_RENTAL_API_URL`` is set. Every method of CarRentalService is available
+under the same name and arguments; each call is one request on a keep-alive
+connection kept per thread. Validation errors are raised as ValueError and
+everything else as Exception, as the service does. ORM records (Vehicle,
+Customer, ...) come back as plain attribute objects and rows as named tuples.
+
+The server's token, if it has one, is taken from ``token`` or
+``CAR_RENTAL_API_TOKEN`` and sent with every request.
+
+``unit_of_work()`` queues the writes this thread makes inside the block and
+sends them as one batch when it exits; the server commits them together, or
+not at all. Queued calls return None, and reads inside the block run at once.
+"""
+import http.client
+import json
+import os
+import select
+import threading
+import urllib.parse
+from contextlib import contextmanager
+
+import api_json
+
+DEFAULT_URL = 'http://127.0.0.1:8765'
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+
+class RemoteService:
+    def __init__(self, url=DEFAULT_URL, timeout=60.0, token=None):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme != 'http' or not parts.hostname:
+            raise ValueError(f"Unsupported API URL: {url}")
+        self.url = url
+        self.timeout = timeout
+        token = token or os.environ.get('CAR_RENTAL_API_TOKEN')
+        self._auth = {'Authorization': f'Bearer {token}'} if token else {}
+        self._address = (parts.hostname, parts.port or 80)
+        # Each thread has its own connection and open unit of work (if any)
+        self._local = threading.local()
+        self._methods = None
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self._method_names():
+            raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+        def call(*args, **kwargs):
+            return self._call(name, args, kwargs)
+        call.__name__ = name
+        setattr(self, name, call)
+        return call
+
+    def _method_names(self):
+        """``{name: is_read}`` for the methods the server serves."""
+        if self._methods is None:
+            self._methods = self._result(self._send('GET', '/methods'))
+        return self._methods
+
+    def _call(self, name, args, kwargs):
+        read = self._method_names()[name]
+        batch = getattr(self._local, 'batch', None)
+        if batch is not None and not read:
+            batch.append([name, api_json.encode(list(args)), api_json.encode(kwargs)])
+            return None
+        body = json.dumps({'args': api_json.encode(list(args)), 'kwargs': api_json.encode(kwargs)}).encode('utf-8')
+        return self._result(self._send('POST', f'/call/{name}', body, retry=read))
+
+    @contextmanager
+    def unit_of_work(self):
+        """Commit the writes made in the block together, like CarRentalService.unit_of_work.
+
+        Writes are queued and return None. When the block exits they are sent
+        as one batch; if any of them fails the exit raises and none is saved.
+        An exception inside the block sends nothing. Nested units of work join
+        the outermost one.
+        """
+        if getattr(self._local, 'batch', None) is not None:
+            yield
+            return
+
+        batch = self._local.batch = []
+        try:
+            yield
+        finally:
+            self._local.batch = None
+        if batch:
+            self._result(self._send('POST', '/batch', json.dumps({'calls': batch}).encode('utf-8')))
+
+    def export_csv(self, kind, file_path, progress=None, cancel=None, batch_size=1000):
+        """Download the server's 'rentals' or 'vehicles' CSV export to `file_path`.
+
+        Same contract as CarRentalService.export_csv. The server writes the
+        export before sending it, so `progress(written, total)` follows the
+        download, estimated from the bytes received.
+        """
+        response = self._send('POST', f'/export/{kind}', json.dumps({'batch_size': batch_size}).encode('utf-8'), retry=True)
+        if response.status != 200:
+            return self._result(response)
+        total = int(response.getheader('X-Rows'))
+        size = int(response.getheader('Content-Length')) or 1
+        received = 0
+        cancelled = False
+
+        with open(file_path, 'wb') as f:
+            while chunk := response.read(DOWNLOAD_CHUNK_BYTES):
+                if cancel is not None and cancel.is_set():
+                    cancelled = True
+                    break
+                f.write(chunk)
+                received += len(chunk)
+                if progress:
+                    progress(total * received // size, total)
+
+        if cancelled:
+            # The rest of the body is still on the wire, so the connection cannot be reused
+            self._local.connection.close()
+            os.remove(file_path)
+            return None
+        return total
+
+    # --- HTTP ---
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(*self._address, timeout=self.timeout)
+        elif connection.sock is not None and select.select([connection.sock], [], [], 0)[0]:
+            # An idle kept-alive connection only turns readable when the server
+            # closed it (say it restarted): start over before sending anything
+            connection.close()
+        return connection
+
+    def _send(self, method, path, body=None, headers=None, retry=None):
+        """Send one request on this thread's connection and return the response.
+
+        A request that fails on a reused connection is sent again on a new one
+        when it cannot run twice: it failed before it was fully sent, or it
+        only reads (``retry``, by default for GETs). A write whose response was
+        lost may have been committed, so it raises ConnectionError instead.
+        """
+        headers = {'Content-Type': 'application/json', **self._auth, **(headers or {})}
+        if retry is None:
+            retry = method == 'GET'
+        for attempt in range(2):
+            connection = self._connection()
+            reused = connection.sock is not None
+            sent = False
+            try:
+                connection.request(method, path, body, headers)
+                sent = True
+                return connection.getresponse()
+            except OSError as e:
+                connection.close()
+                if reused and attempt == 0 and isinstance(e, ConnectionError) and (retry or not sent):
+                    continue  # The server closed a kept-alive connection: retry on a new one
+                if sent and not retry:
+                    raise ConnectionError(f"Lost the connection to the car rental server at {self.url} before it answered; "
+                                          f"the change may or may not have been saved: {e}") from e
+                raise ConnectionError(f"Cannot reach the car rental server at {self.url}: {e}") from e
+
+    def _result(self, response):
+        """Decode a JSON response: its result, or its error raised."""
+        try:
+            data = json.loads(response.read())
+        except ValueError:
+            raise Exception(f"Unexpected response from the car rental server ({response.status}).") from None
+        if response.status == 200:
+            return api_json.decode(data['result'])
+        error = data.get('error', {})
+        message = error.get('message') or f"The car rental server failed ({response.status})."
+        if error.get('type') == 'ValueError':
+            raise ValueError(message)
+        raise Exception(message)
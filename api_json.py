@@ -0,0 +1,91 @@
+"""JSON encoding of service arguments and results for the API server and client.
+
+JSON has no dates, tuples or records, so those travel as tagged objects and
+are turned back into Python values on the other side:
+
+    {"$date": "2026-10-17"}                    datetime.date
+    {"$datetime": "2026-10-17T09:30:00"}       datetime.datetime
+    {"$tuple": [...]}                          tuple
+    {"$row": "VehicleRow", "values": [...]}    a read_models row
+    {"$record": [names], "values": [...]}      any other named query row
+    {"$object": "Vehicle", "fields": {...}}    the columns of an ORM instance
+    {"$dict": [[key, value], ...]}             a dict with non-string keys
+    {"$reservations": [[id, start, end], ...]} a ReservationIndex
+
+ORM instances decode to plain attribute objects: the client has no session,
+so like the rows they are read-only snapshots. Only the standard library,
+``read_models`` and ``reservations`` are imported, so the client does not
+need SQLAlchemy.
+"""
+import datetime
+import functools
+from collections import namedtuple
+from types import SimpleNamespace
+
+from read_models import CustomerRow, GroupRow, RentalRow, StockRow, VehicleRow
+from reservations import ReservationIndex
+
+ROW_TYPES = {row_type.__name__: row_type for row_type in (VehicleRow, CustomerRow, RentalRow, StockRow, GroupRow)}
+
+
+def encode(value):
+    """``value`` as plain JSON data (dicts, lists, strings, numbers, None)."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, datetime.datetime):
+        return {'$datetime': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'$date': value.isoformat()}
+    if ROW_TYPES.get(type(value).__name__) is type(value):
+        return {'$row': type(value).__name__, 'values': [encode(item) for item in value]}
+    if hasattr(value, '_fields'):
+        # Named tuples and SQLAlchemy Row objects from column queries
+        return {'$record': list(value._fields), 'values': [encode(item) for item in value]}
+    if hasattr(type(value), '__mapper__'):
+        fields = {attr.key: encode(getattr(value, attr.key)) for attr in type(value).__mapper__.column_attrs}
+        return {'$object': type(value).__name__, 'fields': fields}
+    if isinstance(value, tuple):
+        return {'$tuple': [encode(item) for item in value]}
+    if isinstance(value, list):
+        return [encode(item) for item in value]
+    if isinstance(value, dict):
+        if all(isinstance(key, str) and not key.startswith('$') for key in value):
+            return {key: encode(item) for key, item in value.items()}
+        return {'$dict': [[encode(key), encode(item)] for key, item in value.items()]}
+    if isinstance(value, ReservationIndex):
+        return {'$reservations': [[vehicle_id, start.isoformat(), end.isoformat()]
+                                  for vehicle_id, start, end in value.intervals()]}
+    raise TypeError(f"Cannot send {type(value).__name__} values through the API")
+
+
+def decode(data):
+    """Reverse ``encode``."""
+    if isinstance(data, list):
+        return [decode(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+    if '$date' in data:
+        return datetime.date.fromisoformat(data['$date'])
+    if '$datetime' in data:
+        return datetime.datetime.fromisoformat(data['$datetime'])
+    if '$tuple' in data:
+        return tuple(decode(item) for item in data['$tuple'])
+    if '$row' in data:
+        return ROW_TYPES[data['$row']](*(decode(item) for item in data['values']))
+    if '$record' in data:
+        return _record_type(tuple(data['$record']))(*(decode(item) for item in data['values']))
+    if '$object' in data:
+        return SimpleNamespace(**{key: decode(item) for key, item in data['fields'].items()})
+    if '$dict' in data:
+        return {decode(key): decode(item) for key, item in data['$dict']}
+    if '$reservations' in data:
+        index = ReservationIndex()
+        for vehicle_id, start, end in data['$reservations']:
+            index.add(vehicle_id, datetime.date.fromisoformat(start), datetime.date.fromisoformat(end))
+        return index
+    return {key: decode(item) for key, item in data.items()}
+
+
+@functools.lru_cache(maxsize=64)
+def _record_type(fields):
+    return namedtuple('Record', fields, rename=True)
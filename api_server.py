@@ -0,0 +1,389 @@
+"""Headless JSON API in front of CarRentalService, shared by several front desks.
+
+    python api_server.py [--host 127.0.0.1] [--port 8765] [--readers 4] [--token SECRET]
+
+Desks point their app at it with ``CAR_RENTAL_API_URL=http://host:8765`` (see
+api_client.py) instead of each opening the SQLite file, so they share one
+read cache and never fight over the write lock. Writes run one at a time on a
+single writer thread that holds the only writing connection; reads run on a
+pool of reader threads and connections, which WAL lets proceed while a write
+is in progress. A read that is already running for another desk, with no
+write finished since it started, is shared instead of queried again.
+
+    GET  /health                                                -> {"result": "ok"}
+    GET  /methods                       service methods served  -> {"result": {name: is_read}}
+    POST /call/<method>     {"args": [...], "kwargs": {...}}    -> {"result": ...}
+    POST /batch      {"calls": [[method, args, kwargs], ...]}   -> {"result": [...]}
+    POST /export/<kind>     {"batch_size": n}    the CSV as text/csv, rows in X-Rows
+
+The API can delete customers and whole vehicle groups, so with a token (from
+``--token`` or ``CAR_RENTAL_API_TOKEN``) every request must carry
+``Authorization: Bearer <token>``, and without one the server only listens
+on the loopback interface: other machines need a token.
+
+Every ``--due-rentals-interval`` seconds the server starts the advance
+bookings whose start date has arrived (``start_due_rentals``).
+
+A batch is a unit of work: its calls run one after another in a single
+transaction on the writer thread, all or nothing, and the writer is never
+left waiting on a desk in between. Values are JSON with tagged dates and
+rows (api_json.py). Failures come back as
+``{"error": {"type": ..., "message": ...}}``, with status 400 for a
+ValueError (validation) and 500 for anything else.
+"""
+import argparse
+import asyncio
+import ipaddress
+import json
+import os
+import secrets
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from sqlalchemy.orm import sessionmaker
+
+import api_json
+from database import create_db_engine
+from models import init_db
+from services import CarRentalService
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 16 * 1024 * 1024
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+# Public service methods that only read; every other one is a write
+READ_PREFIXES = ('get_', 'search_')
+READ_METHODS = {'authenticate', 'cache_stats', 'query_stats'}
+# Served by their own endpoints
+NOT_CALLABLE = {'unit_of_work', 'export_csv'}
+
+def api_methods():
+    """``{name: is_read}`` for every service method served at /call/<name>."""
+    names = {name for name in dir(CarRentalService) if not name.startswith('_') and callable(getattr(CarRentalService, name))}
+    return {name: name.startswith(READ_PREFIXES) or name in READ_METHODS for name in sorted(names - NOT_CALLABLE)}
+
+
+def is_loopback(host):
+    """Whether ``host`` only accepts connections from this machine."""
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False  # Another host name, or '' for every interface
+
+
+def error_response(error):
+    if isinstance(error, ValueError):
+        return HTTPStatus.BAD_REQUEST, {'error': {'type': 'ValueError', 'message': str(error)}}
+    return HTTPStatus.INTERNAL_SERVER_ERROR, {'error': {'type': type(error).__name__, 'message': str(error)}}
+
+
+class ApiError(Exception):
+    """A request the API turns away, answered with ``status``."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ApiServer:
+    def __init__(self, url=None, readers=4, token=None, due_rentals_interval=300.0):
+        self.write_engine = create_db_engine(url, pool_size=1, max_overflow=0)
+        self.read_engine = create_db_engine(url, pool_size=readers, max_overflow=0)
+        init_db(self.write_engine)
+        self.writer = CarRentalService(session_factory=sessionmaker(bind=self.write_engine, expire_on_commit=False))
+        # Shares the writer's cache, so every write invalidates what the readers serve
+        self.reader = CarRentalService(session_factory=sessionmaker(bind=self.read_engine, expire_on_commit=False),
+                                       cache=self.writer.cache)
+        self.token = token
+        self.due_rentals_interval = due_rentals_interval
+        self._due_rentals = None  # task running start_due_rentals() every interval
+        self.methods = api_methods()
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='api-writer')
+        self._read_executor = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='api-reader')
+        self._reads = {}  # (method, body) -> (write generation, future) of running reads
+        self._writes = 0  # bumped whenever a write or batch finishes
+        self._handlers = set()  # tasks serving open connections
+        self.loop = None
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Start listening and return the asyncio server."""
+        if self.token is None and not is_loopback(host):
+            raise ValueError(f"Refusing to serve on {host or 'every interface'} without a token; "
+                             "set --token or CAR_RENTAL_API_TOKEN, or listen on 127.0.0.1.")
+        self.loop = asyncio.get_running_loop()
+        # Bookings made in advance take their car out once their start date arrives
+        await self.loop.run_in_executor(self._write_executor, self.writer.start_due_rentals)
+        self._due_rentals = asyncio.create_task(self._start_due_rentals_periodically())
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def _start_due_rentals_periodically(self):
+        while True:
+            await asyncio.sleep(self.due_rentals_interval)
+            try:
+                started = await self.loop.run_in_executor(self._write_executor, self.writer.start_due_rentals)
+            except Exception as e:
+                print(f"start_due_rentals failed: {e}")
+                continue
+            if started:
+                self._writes += 1
+
+    async def shutdown(self, server):
+        """Stop ``server``: close the listener, end open connections, then release the threads and engines."""
+        server.close()
+        tasks = list(self._handlers) + ([self._due_rentals] if self._due_rentals is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await server.wait_closed()
+        await self.loop.run_in_executor(None, self.close)
+
+    def close(self):
+        """Stop the worker threads and dispose of the engines."""
+        self._write_executor.shutdown(wait=True, cancel_futures=True)
+        self._read_executor.shutdown(wait=True, cancel_futures=True)
+        self.write_engine.dispose()
+        self.read_engine.dispose()
+
+    # --- HTTP ---
+    async def handle(self, reader, writer):
+        """Serve the requests of one keep-alive connection in turn."""
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except ApiError as e:
+                    await send_json(writer, e.status, {'error': {'type': 'ApiError', 'message': str(e)}}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                if not self._authorized(headers):
+                    await send_json(writer, HTTPStatus.UNAUTHORIZED,
+                                    {'error': {'type': 'ApiError', 'message': "Missing or wrong API token."}}, keep_alive)
+                elif method == 'POST' and path.startswith('/export/'):
+                    await self._send_export(writer, path[len('/export/'):], body, keep_alive)
+                else:
+                    status, payload = await self.dispatch(method, path, headers, body)
+                    await send_json(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # The desk went away mid-request
+        except asyncio.CancelledError:
+            pass  # shutdown() ends open connections
+        finally:
+            self._handlers.discard(task)
+            writer.close()
+
+    def _authorized(self, headers):
+        if self.token is None:
+            return True
+        scheme, _, token = headers.get('authorization', '').partition(' ')
+        return scheme.lower() == 'bearer' and secrets.compare_digest(token.strip().encode(), self.token.encode())
+
+    async def dispatch(self, method, path, headers, body):
+        """Answer one JSON request. Returns ``(status, payload)``."""
+        try:
+            if method == 'GET' and path == '/health':
+                return HTTPStatus.OK, {'result': 'ok'}
+            if method == 'GET' and path == '/methods':
+                return HTTPStatus.OK, {'result': self.methods}
+            if method != 'POST':
+                raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} is not supported here.")
+            if path.startswith('/call/'):
+                return await self._call(path[len('/call/'):], body)
+            if path == '/batch':
+                return await self._batch(body)
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown endpoint: {path}")
+        except ApiError as e:
+            return e.status, {'error': {'type': 'ApiError', 'message': str(e)}}
+
+    # --- Calls ---
+    async def _call(self, method, body):
+        if method not in self.methods:
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown service method: {method}")
+        if self.methods[method]:
+            return await self._read(method, body)
+        args, kwargs = parse_call(body)
+        try:
+            return await self.loop.run_in_executor(self._write_executor, self._invoke, self.writer, method, args, kwargs)
+        finally:
+            self._writes += 1
+
+    async def _read(self, method, body):
+        key = (method, body)
+        running = self._reads.get(key)
+        if running is None or running[0] != self._writes:
+            args, kwargs = parse_call(body)
+            future = self.loop.run_in_executor(self._read_executor, self._invoke, self.reader, method, args, kwargs)
+            running = self._reads[key] = (self._writes, future)
+
+            def forget(done):
+                if self._reads.get(key, (None, None))[1] is done:
+                    del self._reads[key]
+            future.add_done_callback(forget)
+        # Shielded: a desk that disconnects must not cancel the read for the others
+        return await asyncio.shield(running[1])
+
+    def _invoke(self, service, method, args, kwargs):
+        """Worker thread: run one service call and encode its result there (ORM attributes may still load)."""
+        try:
+            return HTTPStatus.OK, {'result': api_json.encode(getattr(service, method)(*args, **kwargs))}
+        except Exception as e:
+            return error_response(e)
+
+    # --- Units of work ---
+    async def _batch(self, body):
+        calls = parse_batch(body)
+        for method, _, _ in calls:
+            if method not in self.methods:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown service method: {method}")
+        try:
+            return await self.loop.run_in_executor(self._write_executor, self._invoke_batch, calls)
+        finally:
+            self._writes += 1
+
+    def _invoke_batch(self, calls):
+        """Writer thread: run ``calls`` in one unit of work and encode their results there."""
+        try:
+            with self.writer.unit_of_work():
+                results = [api_json.encode(getattr(self.writer, method)(*args, **kwargs)) for method, args, kwargs in calls]
+        except Exception as e:
+            return error_response(e)
+        return HTTPStatus.OK, {'result': results}
+
+    # --- Export ---
+    async def _send_export(self, writer, kind, body, keep_alive):
+        try:
+            options = json.loads(body or b'{}')
+            batch_size = int(options.get('batch_size', 1000))
+        except (ValueError, TypeError, AttributeError):
+            await send_json(writer, HTTPStatus.BAD_REQUEST, {'error': {'type': 'ApiError', 'message': "Malformed export options."}}, keep_alive)
+            return
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        try:
+            try:
+                rows = await self.loop.run_in_executor(self._read_executor, self.reader.export_csv, kind, path, None, None, batch_size)
+            except Exception as e:
+                await send_json(writer, *error_response(e), keep_alive)
+                return
+            headers = {'Content-Type': 'text/csv; charset=utf-8', 'X-Rows': rows}
+            await send_head(writer, HTTPStatus.OK, headers, os.path.getsize(path), keep_alive)
+            with open(path, 'rb') as f:
+                while chunk := f.read(EXPORT_CHUNK_BYTES):
+                    writer.write(chunk)
+                    await writer.drain()
+        finally:
+            os.remove(path)
+
+
+def parse_call(body):
+    """``(args, kwargs)`` from a /call request body."""
+    try:
+        data = json.loads(body or b'{}')
+        args, kwargs = api_json.decode(data.get('args', [])), api_json.decode(data.get('kwargs', {}))
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Malformed call: expected {\"args\": [...], \"kwargs\": {...}}.")
+    if not isinstance(args, list) or not isinstance(kwargs, dict):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Malformed call: expected {\"args\": [...], \"kwargs\": {...}}.")
+    return args, kwargs
+
+
+def parse_batch(body):
+    """``[(method, args, kwargs), ...]`` from a /batch request body."""
+    try:
+        calls = [(method, api_json.decode(args), api_json.decode(kwargs))
+                 for method, args, kwargs in json.loads(body or b'{}')['calls']]
+    except (ValueError, TypeError, KeyError, AttributeError):
+        calls = None
+    if calls is None or not all(isinstance(method, str) and isinstance(args, list) and isinstance(kwargs, dict)
+                                for method, args, kwargs in calls):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Malformed batch: expected {\"calls\": [[method, args, kwargs], ...]}.")
+    return calls
+
+
+async def read_request(reader):
+    """Read one HTTP/1.1 request. Returns ``(method, path, headers, body)``, or None at end of stream."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, path, _ = line.decode('latin-1').split()
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Malformed request line.") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Malformed Content-Length.") from None
+    if length > MAX_BODY_BYTES:
+        raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large.")
+    body = await reader.readexactly(length) if length else b''
+    return method, path, headers, body
+
+
+async def send_head(writer, status, headers, length, keep_alive=True):
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines += [f"Content-Length: {length}", f"Connection: {'keep-alive' if keep_alive else 'close'}", '', '']
+    writer.write('\r\n'.join(lines).encode('latin-1'))
+    await writer.drain()
+
+
+async def send_json(writer, status, payload, keep_alive=True):
+    body = json.dumps(payload).encode('utf-8')
+    await send_head(writer, status, {'Content-Type': 'application/json'}, len(body), keep_alive)
+    writer.write(body)
+    await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--url', help='database URL (default: the CAR_RENTAL_DB_URL / car_rental.ini setting)')
+    parser.add_argument('--readers', type=int, default=4, help='reader threads and connections')
+    parser.add_argument('--due-rentals-interval', type=float, default=300.0,
+                        help='seconds between runs of start_due_rentals')
+    parser.add_argument('--token', default=os.environ.get('CAR_RENTAL_API_TOKEN'),
+                        help='shared secret every request must carry (default: CAR_RENTAL_API_TOKEN); '
+                             'required to listen on anything but the loopback interface')
+    args = parser.parse_args(argv)
+    if args.token is None and not is_loopback(args.host):
+        parser.error(f"--host {args.host} is reachable from other machines: set --token or CAR_RENTAL_API_TOKEN")
+
+    api = ApiServer(args.url, readers=args.readers, token=args.token,
+                    due_rentals_interval=args.due_rentals_interval)
+
+    async def serve():
+        server = await api.start(args.host, args.port)
+        print(f"Serving the car rental API on http://{args.host}:{args.port}")
+        try:
+            await server.serve_forever()
+        finally:
+            await api.shutdown(server)
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.close()
+
+
+if __name__ == '__main__':
+    main()
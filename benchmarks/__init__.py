@@ -0,0 +1,7 @@
+"""Service-layer benchmarks on synthetic data.
+
+    python -m benchmarks --scale small --output results.json
+    python -m benchmarks --scale small --baseline results.json --threshold 0.25
+    python -m benchmarks.engine     # default vs tuned SQLite engine profile
+    python -m benchmarks.contention # concurrent bookings: throughput and double bookings
+"""
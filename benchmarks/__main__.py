@@ -0,0 +1,101 @@
+"""Run the service benchmark suite.
+
+Generates (or copies from --data-cache) a synthetic database, times every
+benchmark, optionally writes the results as JSON and compares them with a
+baseline file. Exits non-zero when a benchmark regresses past the threshold
+or a public service method has no benchmark.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+
+import sqlalchemy
+
+import models
+from benchmarks import data, suite
+from database import create_db_engine
+
+
+def _prepare_database(path, scale, seed, cache_dir):
+    """Create the data set at ``path``, reusing a generated template from ``cache_dir``."""
+    if cache_dir is None:
+        data.generate(f'sqlite:///{path}', scale, seed).dispose()
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    template = os.path.join(cache_dir, f'{scale}-{seed}.db')
+    if not os.path.exists(template):
+        data.generate(f'sqlite:///{template}', scale, seed).dispose()
+    shutil.copyfile(template, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=data.SCALES, default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', nargs='*', metavar='PATTERN', help='run only benchmarks matching these glob patterns')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown of the median, as a fraction')
+    parser.add_argument('--min-ms', type=float, default=1.0, help='ignore slowdowns smaller than this many ms')
+    parser.add_argument('--data-cache', help='directory to keep generated data sets in between runs')
+    args = parser.parse_args(argv)
+
+    missing = suite.missing_benchmarks()
+    if missing:
+        print(f"No benchmark for: {', '.join(missing)}")
+        return 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        print(f"Preparing {args.scale} data set {data.SCALES[args.scale]} ...")
+        _prepare_database(db_path, args.scale, args.seed, args.data_cache)
+
+        engine = create_db_engine(f'sqlite:///{db_path}')
+        models.Session.configure(bind=engine)
+        try:
+            ctx = suite.Context(suite.make_service(), data.SCALES[args.scale], tmp, datetime.date.today())
+            results = suite.run(ctx, args.repeat, args.only)
+        finally:
+            engine.dispose()
+
+    report = {
+        'meta': {
+            'scale': args.scale,
+            'sizes': dict(zip(('vehicles', 'customers', 'rentals'), data.SCALES[args.scale])),
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'python': platform.python_version(),
+            'sqlalchemy': sqlalchemy.__version__,
+            'sqlite': __import__('sqlite3').sqlite_version,
+            'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline['meta']['scale'] != args.scale or baseline['meta']['seed'] != args.seed:
+        print("Baseline was recorded with a different scale or seed; not comparing.")
+        return 2
+
+    regressions = suite.compare(results, baseline['results'], args.threshold, args.min_ms)
+    for name, old, new in regressions:
+        print(f"REGRESSION {name}: {old:.2f} ms -> {new:.2f} ms ({new / old - 1:+.0%})")
+    print(f"{len(regressions)} regression(s) against {args.baseline} (threshold {args.threshold:.0%}).")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,164 @@
+"""Booking under contention: many desks booking one small group at once.
+
+Every thread plays a desk with its own service (and so its own read cache).
+Each desk picks its units from a list read once at the start, so most
+requests name a unit another desk has meanwhile taken. All desks start
+together and book random short periods in a narrow window of days. The run
+then counts overlapping Active rentals of the same unit (double bookings)
+and exits non-zero if there are any, or if a booking was rejected as
+invalid. Bookings that gave up waiting for the write lock are reported
+separately: they fail cleanly and the desk would retry.
+
+With ``--api`` the desks book through an api_server.py started in-process,
+as desks using CAR_RENTAL_API_URL do, instead of each opening the file.
+
+    python -m benchmarks.contention [--threads 8] [--attempts 100] [--units 10] [--api]
+"""
+import argparse
+import asyncio
+import datetime
+import functools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+import models
+from api_client import RemoteService
+from api_server import ApiServer
+from database import create_db_engine
+from services import CarRentalService
+
+DOUBLE_BOOKINGS = """
+    SELECT count(*) FROM rentals a JOIN rentals b
+      ON a.vehicle_id = b.vehicle_id AND a.id < b.id
+    WHERE a.status = 'Active' AND b.status = 'Active'
+      AND a.rental_date < b.return_date AND b.rental_date < a.return_date
+"""
+
+
+def _desk(make_service, seed, units, attempts, days, barrier, outcomes, latencies):
+    service = make_service()
+    rng = random.Random(seed)
+    customer = service.add_customer(f'Desk {seed}', f'0917{seed:07d}', f'DESK-{seed}')
+    today = datetime.date.today()
+    barrier.wait()
+    for _ in range(attempts):
+        start = today + datetime.timedelta(days=rng.randrange(days))
+        end = start + datetime.timedelta(days=rng.randint(1, 4))
+        began = time.perf_counter()
+        try:
+            rental, message = service.create_rental(customer.id, rng.choice(units), end.isoformat(), start.isoformat())
+        except (ValueError, ConnectionError):
+            outcome = 'error'
+        except Exception:
+            # The service's "database error, please try again": the write lock
+            # was not granted within the busy timeout
+            outcome = 'busy'
+        else:
+            outcome = 'refused' if rental is None else 'booked' if message == 'Success' else 'reassigned'
+        latencies.append((time.perf_counter() - began) * 1000)
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+
+def _start_api(db_path):
+    """Serve ``db_path`` from an ApiServer on a background event loop. Returns (URL, stop)."""
+    api = ApiServer(f'sqlite:///{db_path}')
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(api.start('127.0.0.1', 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(api.shutdown(server), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+    return f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}", stop
+
+
+def run(db_path, threads, attempts, units, days, api=False):
+    """Run the desks against a fresh database. Returns the results as a dict."""
+    engine = create_db_engine(f'sqlite:///{db_path}')
+    models.Session.configure(bind=engine)
+    models.init_db(engine)
+    stop = None
+    try:
+        if api:
+            url, stop = _start_api(db_path)
+            make_service = functools.partial(RemoteService, url)
+        else:
+            make_service = CarRentalService
+        setup = make_service()
+        setup.add_vehicle_batch('Bench', 'Contention', 2024, 'CON', 1000.0, units)
+        unit_ids = [v.id for v in setup.get_group_vehicles('Bench', 'Contention', 2024)]
+
+        barrier = threading.Barrier(threads + 1)
+        outcomes = [{} for _ in range(threads)]
+        latencies = [[] for _ in range(threads)]
+        desks = [
+            threading.Thread(target=_desk, args=(make_service, i + 1, unit_ids, attempts, days, barrier, outcomes[i], latencies[i]))
+            for i in range(threads)
+        ]
+        for desk in desks:
+            desk.start()
+        barrier.wait()
+        began = time.perf_counter()
+        for desk in desks:
+            desk.join()
+        elapsed = time.perf_counter() - began
+
+        with engine.connect() as connection:
+            double_bookings = connection.exec_driver_sql(DOUBLE_BOOKINGS).scalar()
+    finally:
+        if stop is not None:
+            stop()
+        engine.dispose()
+
+    totals = {}
+    for desk_outcomes in outcomes:
+        for outcome, count in desk_outcomes.items():
+            totals[outcome] = totals.get(outcome, 0) + count
+    samples = sorted(ms for desk_latencies in latencies for ms in desk_latencies)
+    booked = totals.get('booked', 0) + totals.get('reassigned', 0)
+    return {
+        'attempts': threads * attempts,
+        'outcomes': totals,
+        'double_bookings': double_bookings,
+        'seconds': elapsed,
+        'bookings_per_s': booked / elapsed,
+        'attempts_per_s': threads * attempts / elapsed,
+        'p50_ms': statistics.median(samples),
+        'p95_ms': samples[int(len(samples) * 0.95) - 1],
+        'max_ms': samples[-1],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--attempts', type=int, default=100, help='booking attempts per thread')
+    parser.add_argument('--units', type=int, default=10, help='units in the contended group')
+    parser.add_argument('--days', type=int, default=30, help='window of start days the bookings fall in')
+    parser.add_argument('--api', action='store_true', help='book through an in-process API server')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        result = run(os.path.join(tmp, 'contention.db'), args.threads, args.attempts, args.units, args.days, args.api)
+
+    outcomes = result['outcomes']
+    print(f"{result['attempts']} attempts from {args.threads} {'API clients' if args.api else 'threads'} on {args.units} units in {result['seconds']:.2f} s")
+    print(f"  booked {outcomes.get('booked', 0)}, reassigned {outcomes.get('reassigned', 0)}, "
+          f"refused {outcomes.get('refused', 0)}, lock timeouts {outcomes.get('busy', 0)}, errors {outcomes.get('error', 0)}")
+    print(f"  {result['bookings_per_s']:.0f} bookings/s, {result['attempts_per_s']:.0f} attempts/s, "
+          f"p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, max {result['max_ms']:.0f} ms")
+    print(f"  double bookings: {result['double_bookings']}")
+    return 1 if result['double_bookings'] or outcomes.get('error') else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
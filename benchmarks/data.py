@@ -0,0 +1,136 @@
+"""Deterministic synthetic data for the service benchmarks.
+
+The same scale and seed always produce the same database, row for row, so
+timings from different runs (and commits) are comparable.
+
+    python -m benchmarks.data --scale production --output /tmp/fleet.db
+"""
+import argparse
+import datetime
+import random
+
+import models
+from database import create_db_engine
+
+# name: (vehicles, customers, rentals)
+SCALES = {
+    'tiny': (200, 500, 2_000),
+    'small': (2_000, 10_000, 40_000),
+    'medium': (20_000, 100_000, 400_000),
+    'production': (100_000, 500_000, 2_000_000),
+}
+
+MODELS = [
+    ('Toyota', 'Vios', 1500.0), ('Toyota', 'Fortuner', 3200.0), ('Toyota', 'Innova', 2600.0),
+    ('Honda', 'City', 1700.0), ('Honda', 'Civic', 2200.0), ('Honda', 'CR-V', 3000.0),
+    ('Mitsubishi', 'Mirage', 1300.0), ('Mitsubishi', 'Montero', 3100.0),
+    ('Nissan', 'Almera', 1400.0), ('Nissan', 'Navara', 2800.0),
+    ('Ford', 'Ranger', 2900.0), ('Ford', 'Everest', 3300.0),
+    ('Hyundai', 'Accent', 1400.0), ('Kia', 'Soluto', 1350.0), ('Suzuki', 'Ertiga', 1800.0),
+]
+YEARS = range(2016, 2025)
+FIRST_NAMES = ['Ana', 'Ben', 'Carla', 'Dan', 'Ella', 'Franco', 'Gia', 'Hector', 'Ivy', 'Jose',
+               'Kris', 'Lea', 'Marco', 'Nina', 'Oscar', 'Pia', 'Quinn', 'Rosa', 'Sam', 'Tess']
+LAST_NAMES = ['Cruz', 'Reyes', 'Santos', 'Garcia', 'Mendoza', 'Torres', 'Flores', 'Ramos',
+              'Bautista', 'Villanueva', 'Aquino', 'Castillo', 'Navarro', 'Domingo', 'Lim']
+BATCH = 20_000
+
+
+def _batched(rows, size=BATCH):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _vehicles(rng, count):
+    """Vehicles in groups of 1-60 identical units, plates numbered per group prefix."""
+    made = 0
+    group = 0
+    while made < count:
+        make, model, rate = rng.choice(MODELS)
+        year = rng.choice(YEARS)
+        size = min(rng.randint(1, 60), count - made)
+        prefix = f"{make[:3].upper()}{group:05d}"
+        for n in range(1, size + 1):
+            yield {'make': make, 'model': model, 'year': year, 'registration': f"{prefix}-{n}",
+                   'daily_rate': rate, 'status': 'Available'}
+        made += size
+        group += 1
+
+
+def _customers(rng, count):
+    for i in range(1, count + 1):
+        yield {
+            'name': f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}",
+            'contact': f"09{rng.randrange(10**9):09d}",
+            'license_details': f"N{rng.randrange(100):02d}-{rng.randrange(100):02d}-{i:06d}",
+        }
+
+
+def _rentals(rng, count, vehicles, customers, rates, today):
+    """Rental history ending today; about 1 in 8 vehicles has one Active rental."""
+    active = set(rng.sample(range(1, vehicles + 1), vehicles // 8))
+    history = max(count - len(active), 0)
+    for i in range(history):
+        vehicle_id = rng.randint(1, vehicles)
+        start = today - datetime.timedelta(days=rng.randint(30, 3 * 365))
+        days = rng.randint(1, 14)
+        yield {'customer_id': rng.randint(1, customers), 'vehicle_id': vehicle_id,
+               'rental_date': start, 'return_date': start + datetime.timedelta(days=days),
+               'total_cost': days * rates[vehicle_id - 1], 'status': 'Completed'}
+    for vehicle_id in sorted(active):
+        start = today - datetime.timedelta(days=rng.randint(0, 6))
+        days = rng.randint(7, 14)
+        yield {'customer_id': rng.randint(1, customers), 'vehicle_id': vehicle_id,
+               'rental_date': start, 'return_date': start + datetime.timedelta(days=days),
+               'total_cost': days * rates[vehicle_id - 1], 'status': 'Active'}
+
+
+def generate(url, scale='small', seed=42, today=None):
+    """Create a database at ``url`` filled with ``SCALES[scale]`` rows. Returns the engine.
+
+    ``scale`` may also be a ``(vehicles, customers, rentals)`` tuple.
+    """
+    vehicles, customers, rentals = SCALES[scale] if isinstance(scale, str) else scale
+    today = today or datetime.date(2025, 1, 1)
+    rng = random.Random(seed)
+    engine = create_db_engine(url)
+    # Tables only for now; init_db() below runs the migrations, which fill the
+    # revenue rollup and search tables in one pass instead of row by row
+    models.Base.metadata.create_all(engine)
+
+    rates = []
+    with engine.begin() as connection:
+        for batch in _batched(_vehicles(rng, vehicles)):
+            connection.execute(models.Vehicle.__table__.insert(), batch)
+            rates.extend(row['daily_rate'] for row in batch)
+        for batch in _batched(_customers(rng, customers)):
+            connection.execute(models.Customer.__table__.insert(), batch)
+        rented = []
+        for batch in _batched(_rentals(rng, rentals, vehicles, customers, rates, today)):
+            connection.execute(models.Rental.__table__.insert(), batch)
+            rented.extend(row['vehicle_id'] for row in batch if row['status'] == 'Active')
+        vehicle = models.Vehicle.__table__
+        for batch in _batched(rented, 900):
+            connection.execute(vehicle.update().where(vehicle.c.id.in_(batch)).values(status='Rented'))
+    models.init_db(engine)
+    return engine
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', required=True, help='SQLite file to create')
+    args = parser.parse_args(argv)
+    generate(f'sqlite:///{args.output}', args.scale, args.seed).dispose()
+    print(f"Generated {args.scale} data set in {args.output}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Compare the default SQLite engine with the tuned profile from database.py.
+
+Seeds a throwaway database for each profile, then measures commit throughput
+(one add_customer commit at a time) and read latency of the list and dashboard
+service calls, both idle and while a second thread keeps committing.
+
+    python -m benchmarks.engine [--commits 500] [--reads 50]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import models
+from database import create_db_engine
+from services import CarRentalService
+
+PROFILES = {
+    'default': {'tuned': False},
+    'tuned': {'tuned': True},
+}
+
+
+def _seed(service, vehicles=2000, customers=500, rentals=1000):
+    service.add_vehicle_batch('Toyota', 'Vios', 2020, 'VIO', 1500.0, vehicles // 2)
+    service.add_vehicle_batch('Honda', 'City', 2021, 'CTY', 1800.0, vehicles - vehicles // 2)
+    for i in range(customers):
+        service.add_customer(f'Customer {i}', f'0917{i:07d}', f'N01-00-{i:06d}')
+    for i in range(rentals):
+        service.create_rental(i % customers + 1, i + 1, '2099-01-10', '2099-01-01')
+
+
+def _read_calls(service):
+    return {
+        'get_dashboard_snapshot': service.get_dashboard_snapshot,
+        'get_fleet_summary': service.get_fleet_summary,
+        'get_rentals_page': lambda: service.get_rentals_page(limit=100),
+        'get_available_vehicles': service.get_available_vehicles,
+    }
+
+
+def _time_reads(service, repeat):
+    results = {}
+    for name, call in _read_calls(service).items():
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - start) * 1000)
+        results[name] = statistics.median(samples)
+    return results
+
+
+def run_profile(name, db_path, commits, reads):
+    engine = create_db_engine(f'sqlite:///{db_path}', **PROFILES[name])
+    models.Session.configure(bind=engine)
+    models.init_db(engine)
+    # The read cache is off so the reads measure the engine, not the cache
+    service = CarRentalService(cache_size=0)
+    _seed(service)
+
+    start = time.perf_counter()
+    for i in range(commits):
+        service.add_customer(f'Bench {i}', f'0918{i:07d}', f'B01-00-{i:06d}')
+    commit_rate = commits / (time.perf_counter() - start)
+
+    idle = _time_reads(service, reads)
+
+    # Read again while another thread commits as fast as it can
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            service.add_customer(f'Writer {i}', f'0919{i:07d}', f'W01-00-{i:06d}')
+            i += 1
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        contended = _time_reads(service, reads)
+    finally:
+        stop.set()
+        thread.join()
+
+    engine.dispose()
+    return commit_rate, idle, contended
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--commits', type=int, default=500)
+    parser.add_argument('--reads', type=int, default=50)
+    args = parser.parse_args(argv)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in PROFILES:
+            results[name] = run_profile(name, os.path.join(tmp, f'{name}.db'), args.commits, args.reads)
+
+    print(f"{'':28}" + ''.join(f"{name:>12}" for name in PROFILES))
+    print(f"{'commits/s':28}" + ''.join(f"{results[name][0]:12.0f}" for name in PROFILES))
+    for label, column in (('idle', 1), ('under writes', 2)):
+        print(f"\nmedian read latency (ms), {label}")
+        for call in results['default'][column]:
+            print(f"  {call:26}" + ''.join(f"{results[name][column][call]:12.2f}" for name in PROFILES))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,311 @@
+"""Benchmarks for every public CarRentalService method.
+
+Each benchmark is a function taking the shared ``Context`` and returning the
+zero-argument call to time. Work done before the return (creating the group
+that is about to be deleted, say) is setup and is not timed. The function is
+called once per repeat, so mutating benchmarks always start from fresh setup.
+"""
+import datetime
+import fnmatch
+import os
+import statistics
+import time
+
+from services import CarRentalService
+
+# Public methods that are not database operations
+NOT_BENCHMARKED = {'unit_of_work', 'cache_stats', 'query_stats', 'reset_query_stats'}
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark. ``name`` is the method name, optionally with a "[variant]"."""
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def method_of(name):
+    return name.split('[')[0]
+
+
+def missing_benchmarks():
+    """Public service methods that no benchmark covers."""
+    public = {name for name in dir(CarRentalService) if not name.startswith('_') and callable(getattr(CarRentalService, name))}
+    covered = {method_of(name) for name in BENCHMARKS}
+    return sorted(public - covered - NOT_BENCHMARKED)
+
+
+class Context:
+    """Shared state for one suite run: the service, the data set sizes and unique-name counters."""
+
+    def __init__(self, service, sizes, workdir, today):
+        self.service = service
+        self.vehicles, self.customers, self.rentals = sizes
+        self.workdir = workdir
+        self.today = today
+        self._counter = 0
+        # A dedicated group keeps booking benchmarks away from the generated history
+        self.booking_units = iter(())
+
+    def unique(self, prefix):
+        self._counter += 1
+        return f"{prefix}{self._counter:06d}"
+
+    def free_unit(self):
+        """A unit nobody has booked, added in batches of 100 as needed."""
+        unit = next(self.booking_units, None)
+        if unit is None:
+            prefix = self.unique('BKG')
+            self.service.add_vehicle_batch('Bench', 'Booking', 2024, prefix, 1000.0, 100)
+            self.booking_units = iter(self.service.get_group_vehicles('Bench', 'Booking', 2024)[-100:])
+            unit = next(self.booking_units)
+        return unit.id
+
+    def new_group(self, units):
+        make = self.unique('Make')
+        self.service.add_vehicle_batch(make, 'Bench', 2024, self.unique('GRP'), 1000.0, units)
+        return make, 'Bench', 2024
+
+    def new_customer(self):
+        return self.service.add_customer(self.unique('Bench Customer '), self.unique('0999'), 'BENCH')
+
+    def days(self, n):
+        return (self.today + datetime.timedelta(days=n)).isoformat()
+
+
+# --- Reads ---
+@benchmark('get_all_vehicles')
+def bench_get_all_vehicles(ctx):
+    return ctx.service.get_all_vehicles
+
+@benchmark('get_vehicle_rows')
+def bench_get_vehicle_rows(ctx):
+    return ctx.service.get_vehicle_rows
+
+@benchmark('get_fleet_summary')
+def bench_get_fleet_summary(ctx):
+    return ctx.service.get_fleet_summary
+
+@benchmark('get_dashboard_snapshot')
+def bench_get_dashboard_snapshot(ctx):
+    return ctx.service.get_dashboard_snapshot
+
+@benchmark('get_vehicle')
+def bench_get_vehicle(ctx):
+    return lambda: ctx.service.get_vehicle(ctx.vehicles // 2)
+
+@benchmark('get_available_vehicles')
+def bench_get_available_vehicles(ctx):
+    return ctx.service.get_available_vehicles
+
+@benchmark('get_vehicle_count_by_model')
+def bench_get_vehicle_count_by_model(ctx):
+    return lambda: ctx.service.get_vehicle_count_by_model('Toyota', 'Vios', 2020)
+
+@benchmark('get_group_vehicles')
+def bench_get_group_vehicles(ctx):
+    return lambda: ctx.service.get_group_vehicles('Toyota', 'Vios', 2020)
+
+@benchmark('get_reservation_index')
+def bench_get_reservation_index(ctx):
+    return ctx.service.get_reservation_index
+
+@benchmark('get_free_vehicles[group]')
+def bench_get_free_vehicles_group(ctx):
+    start = ctx.today + datetime.timedelta(days=3)
+    return lambda: ctx.service.get_free_vehicles(start, start + datetime.timedelta(days=4), 'Toyota', 'Vios', 2020)
+
+@benchmark('get_free_vehicles[fleet]')
+def bench_get_free_vehicles_fleet(ctx):
+    start = ctx.today + datetime.timedelta(days=3)
+    return lambda: ctx.service.get_free_vehicles(start, start + datetime.timedelta(days=4))
+
+@benchmark('get_available_groups')
+def bench_get_available_groups(ctx):
+    start = ctx.today + datetime.timedelta(days=3)
+    return lambda: ctx.service.get_available_groups(start, start + datetime.timedelta(days=4))
+
+@benchmark('get_available_groups[typed]')
+def bench_get_available_groups_typed(ctx):
+    start = ctx.today + datetime.timedelta(days=3)
+    return lambda: ctx.service.get_available_groups(start, start + datetime.timedelta(days=4), 'toy')
+
+@benchmark('get_all_customers')
+def bench_get_all_customers(ctx):
+    return ctx.service.get_all_customers
+
+@benchmark('get_customer_rows')
+def bench_get_customer_rows(ctx):
+    return ctx.service.get_customer_rows
+
+@benchmark('search_customers')
+def bench_search_customers(ctx):
+    return lambda: ctx.service.search_customers('ana cr')
+
+@benchmark('search_customers[short]')
+def bench_search_customers_short(ctx):
+    return lambda: ctx.service.search_customers('an')
+
+@benchmark('get_all_rentals')
+def bench_get_all_rentals(ctx):
+    return ctx.service.get_all_rentals
+
+@benchmark('get_rentals_page[first]')
+def bench_get_rentals_page_first(ctx):
+    return lambda: ctx.service.get_rentals_page(limit=100)
+
+@benchmark('get_rentals_page[deep]')
+def bench_get_rentals_page_deep(ctx):
+    return lambda: ctx.service.get_rentals_page(after_id=ctx.rentals - 1000, limit=100)
+
+@benchmark('get_rentals_page[filtered]')
+def bench_get_rentals_page_filtered(ctx):
+    return lambda: ctx.service.get_rentals_page(limit=100, filter_text='ana toyota')
+
+@benchmark('get_revenue_summary')
+def bench_get_revenue_summary(ctx):
+    return ctx.service.get_revenue_summary
+
+@benchmark('get_revenue_breakdown[month]')
+def bench_get_revenue_breakdown_month(ctx):
+    return lambda: ctx.service.get_revenue_breakdown('month')
+
+@benchmark('get_revenue_breakdown[model]')
+def bench_get_revenue_breakdown_model(ctx):
+    return lambda: ctx.service.get_revenue_breakdown('model')
+
+@benchmark('export_csv[rentals]')
+def bench_export_csv_rentals(ctx):
+    return lambda: ctx.service.export_csv('rentals', os.path.join(ctx.workdir, 'rentals.csv'))
+
+@benchmark('export_csv[vehicles]')
+def bench_export_csv_vehicles(ctx):
+    return lambda: ctx.service.export_csv('vehicles', os.path.join(ctx.workdir, 'vehicles.csv'))
+
+@benchmark('authenticate')
+def bench_authenticate(ctx):
+    return lambda: ctx.service.authenticate('admin', 'password')
+
+# --- Writes ---
+@benchmark('add_vehicle')
+def bench_add_vehicle(ctx):
+    return lambda: ctx.service.add_vehicle('Bench', 'Single', 2024, ctx.unique('ONE-'), 1000.0)
+
+@benchmark('add_vehicle_batch')
+def bench_add_vehicle_batch(ctx):
+    prefix = ctx.unique('BAT')
+    return lambda: ctx.service.add_vehicle_batch('Bench', 'Batch', 2024, prefix, 1000.0, 100)
+
+@benchmark('adjust_vehicle_stock[grow]')
+def bench_adjust_vehicle_stock_grow(ctx):
+    group = ctx.new_group(10)
+    return lambda: ctx.service.adjust_vehicle_stock(*group, 'GROW-1', 1000.0, 60)
+
+@benchmark('adjust_vehicle_stock[shrink]')
+def bench_adjust_vehicle_stock_shrink(ctx):
+    group = ctx.new_group(60)
+    return lambda: ctx.service.adjust_vehicle_stock(*group, 'SHRINK-1', 1000.0, 10)
+
+@benchmark('update_vehicle')
+def bench_update_vehicle(ctx):
+    vehicle_id = ctx.vehicles // 3
+    return lambda: ctx.service.update_vehicle(vehicle_id, daily_rate=1234.0)
+
+@benchmark('update_vehicle_batch')
+def bench_update_vehicle_batch(ctx):
+    make, model, year = ctx.new_group(50)
+    return lambda: ctx.service.update_vehicle_batch(make, model, year, make, model, year + 1, 1100.0)
+
+@benchmark('edit_vehicle')
+def bench_edit_vehicle(ctx):
+    make, model, year = ctx.new_group(50)
+    vehicle_id = ctx.service.get_group_vehicles(make, model, year)[0].id
+    rates = iter(range(1000, 10 ** 9))
+    return lambda: ctx.service.edit_vehicle(vehicle_id, make, model, year, float(next(rates)), 50, whole_group=True)
+
+@benchmark('delete_vehicle')
+def bench_delete_vehicle(ctx):
+    make, model, year = ctx.new_group(1)
+    vehicle_id = ctx.service.get_group_vehicles(make, model, year)[0].id
+    return lambda: ctx.service.delete_vehicle(vehicle_id)
+
+@benchmark('delete_vehicle_group')
+def bench_delete_vehicle_group(ctx):
+    group = ctx.new_group(50)
+    return lambda: ctx.service.delete_vehicle_group(*group)
+
+@benchmark('add_customer')
+def bench_add_customer(ctx):
+    return lambda: ctx.service.add_customer(ctx.unique('New Customer '), ctx.unique('0998'), 'BENCH')
+
+@benchmark('delete_customer')
+def bench_delete_customer(ctx):
+    customer_id = ctx.new_customer().id
+    return lambda: ctx.service.delete_customer(customer_id)
+
+@benchmark('create_rental')
+def bench_create_rental(ctx):
+    vehicle_id = ctx.free_unit()
+    return lambda: ctx.service.create_rental(1, vehicle_id, ctx.days(3), ctx.days(0))
+
+@benchmark('complete_rental')
+def bench_complete_rental(ctx):
+    rental, _ = ctx.service.create_rental(1, ctx.free_unit(), ctx.days(3), ctx.days(0))
+    return lambda: ctx.service.complete_rental(rental.id)
+
+@benchmark('start_due_rentals')
+def bench_start_due_rentals(ctx):
+    return ctx.service.start_due_rentals
+
+@benchmark('rebuild_revenue_rollup')
+def bench_rebuild_revenue_rollup(ctx):
+    return ctx.service.rebuild_revenue_rollup
+
+
+def run(ctx, repeat=5, patterns=None, report=print):
+    """Time every selected benchmark ``repeat`` times. Returns {name: stats in ms}."""
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if patterns and not any(fnmatch.fnmatch(name, p) for p in patterns):
+            continue
+        samples = []
+        for _ in range(repeat):
+            call = setup(ctx)
+            start = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - start) * 1000)
+        results[name] = {
+            'repeat': repeat,
+            'min_ms': min(samples),
+            'median_ms': statistics.median(samples),
+            'mean_ms': statistics.fmean(samples),
+            'max_ms': max(samples),
+        }
+        report(f"{name:36}{results[name]['median_ms']:12.2f} ms")
+    return results
+
+
+def compare(results, baseline, threshold=0.25, min_ms=1.0):
+    """Return (name, baseline ms, current ms) for medians that got slower than allowed.
+
+    A benchmark regresses when its median exceeds the baseline median by more
+    than ``threshold`` (a fraction) and by more than ``min_ms``, which keeps
+    sub-millisecond noise from failing a run.
+    """
+    regressions = []
+    for name, current in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        old, new = before['median_ms'], current['median_ms']
+        if new > old * (1 + threshold) and new - old > min_ms:
+            regressions.append((name, old, new))
+    return regressions
+
+
+def make_service():
+    # The read cache is off so every call measures the database work
+    return CarRentalService(cache_size=0)
@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReadCache:
+    """Bounded LRU cache with a time-to-live and tag-based invalidation.
+
+    Every entry is stored with the tags of the data it was read from (e.g.
+    "vehicles" or ("vehicle", 7)); ``invalidate(*tags)`` drops the entries
+    carrying any of them. Each tag also has a version that invalidation bumps,
+    so a read that started before a write committed cannot store its now
+    stale result afterwards. Safe to share between threads.
+    """
+
+    def __init__(self, maxsize=256, ttl=60.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # key -> (expires, tags, value)
+        self._versions = {}
+        self._epoch = 0  # bumped by clear()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return ``(True, value)`` for a live entry, else ``(False, None)``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[2]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def versions(self, tags):
+        """Snapshot the versions of ``tags``; pass it to ``put`` with the result."""
+        with self._lock:
+            return self._epoch, tuple(self._versions.get(tag, 0) for tag in tags)
+
+    def put(self, key, value, tags, versions):
+        """Store ``value`` unless one of ``tags`` was invalidated since ``versions``."""
+        with self._lock:
+            if versions != (self._epoch, tuple(self._versions.get(tag, 0) for tag in tags)):
+                return False
+            self._entries[key] = (self.clock() + self.ttl, frozenset(tags), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, *tags):
+        tags = set(tags)
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+            stale = [key for key, (_, entry_tags, _) in self._entries.items() if entry_tags & tags]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,203 @@
+"""Check that every service query is answered by an index lookup, not a full scan.
+
+Runs each CarRentalService method against a throwaway database, captures the
+SQL it issues and asks SQLite for the plan of every statement. A plan step
+that reads a whole table, or walks a whole index (``SCAN ... USING INDEX``),
+fails the check unless FULL_READS lists that step of the workload and table
+with the reason it is meant to read everything.
+
+    python check_query_plans.py
+"""
+import datetime
+import os
+import sqlite3
+import sys
+import tempfile
+
+from sqlalchemy import event
+
+import models
+from database import create_db_engine
+from services import CarRentalService
+
+# Full scans that are the point of the call, keyed by (workload step, table or
+# alias as the plan names it). Steps with a filter have their own name, e.g.
+# get_rentals_page[filtered], so an allowed scan does not hide the filtered path.
+FULL_READS = {
+    ('get_all_vehicles', 'vehicles'): 'lists every vehicle',
+    ('get_vehicle_rows', 'vehicles'): 'lists every vehicle',
+    ('get_all_customers', 'customers'): 'lists every customer',
+    ('get_customer_rows', 'customers'): 'lists every customer',
+    ('get_all_rentals', 'rentals'): 'lists every rental',
+    ('get_fleet_summary', 'vehicles'): 'counts every vehicle per group, in group index order',
+    ('get_dashboard_snapshot', 'vehicles'): 'counts every vehicle per model, in group index order',
+    ('get_dashboard_snapshot', 'customers'): 'the customer total; SQLite counts it over the smallest index',
+    ('get_available_groups', 'vehicles'): 'without a query every group is counted, in group index order',
+    ('get_available_groups[typed]', 'vehicles_1'): (
+        'matching groups are picked from the covering group index: a case-insensitive '
+        'LIKE cannot seek the BINARY index, and there are far fewer entries than rows to read'
+    ),
+    # The revenue rollup holds one row per day and group, so it is read whole
+    ('get_revenue_summary', 'revenue_rollup'): 'totals the whole rollup',
+    ('get_revenue_breakdown', 'revenue_rollup'): 'totals the whole rollup',
+    ('rebuild_revenue_rollup', 'rentals'): 'recomputes the rollup from every rental',
+}
+
+
+def _workload(service):
+    """Call every public service method, yielding the step name before each call."""
+    yield 'add_vehicle'
+    service.add_vehicle('Honda', 'Civic', 2021, 'CIV-1', 2000.0)
+    yield 'add_vehicle_batch'
+    service.add_vehicle_batch('Toyota', 'Vios', 2020, 'VIO', 1500.0, 5)
+    service.add_vehicle_batch('Ford', 'Ranger', 2019, 'RNG', 2500.0, 2)
+    yield 'add_customer'
+    service.add_customer('Ana Cruz', '09170000001', 'N01-00-000001')
+    service.add_customer('Ben Reyes', '09170000002', 'N01-00-000002')
+    yield 'get_all_vehicles'
+    service.get_all_vehicles()
+    yield 'get_vehicle_rows'
+    service.get_vehicle_rows()
+    yield 'get_fleet_summary'
+    service.get_fleet_summary()
+    yield 'get_dashboard_snapshot'
+    service.get_dashboard_snapshot()
+    yield 'get_vehicle'
+    service.get_vehicle(1)
+    yield 'get_available_vehicles'
+    service.get_available_vehicles()
+    yield 'get_vehicle_count_by_model'
+    service.get_vehicle_count_by_model('Toyota', 'Vios', 2020)
+    yield 'update_vehicle_batch'
+    service.update_vehicle_batch('Toyota', 'Vios', 2020, 'Toyota', 'Vios', 2020, 1600.0)
+    yield 'adjust_vehicle_stock'
+    service.adjust_vehicle_stock('Toyota', 'Vios', 2020, 'VIO-1', 1600.0, 7)
+    service.adjust_vehicle_stock('Toyota', 'Vios', 2020, 'VIO-1', 1600.0, 6)
+    yield 'edit_vehicle'
+    service.edit_vehicle(1, 'Honda', 'Civic', 2021, 2100.0, 2, whole_group=True)
+    service.edit_vehicle(1, 'Honda', 'Civic', 2021, 2100.0, 1, registration='CIV-1')
+    yield 'update_vehicle'
+    service.update_vehicle(1, registration='CIV-2')
+    yield 'create_rental'
+    service.create_rental(1, 1, '2099-01-10', '2099-01-01')
+    service.create_rental(1, 1, '2099-01-20', '2099-01-15')
+    yield 'get_reservation_index'
+    service.get_reservation_index()
+    yield 'get_group_vehicles'
+    service.get_group_vehicles('Toyota', 'Vios', 2020)
+    yield 'get_free_vehicles'
+    service.get_free_vehicles(datetime.date(2099, 1, 5), datetime.date(2099, 1, 12), 'Toyota', 'Vios', 2020)
+    yield 'get_available_groups'
+    service.get_available_groups(datetime.date(2099, 1, 5), datetime.date(2099, 1, 12))
+    yield 'get_available_groups[typed]'
+    service.get_available_groups(datetime.date(2099, 1, 5), datetime.date(2099, 1, 12), 'toy vi')
+    yield 'start_due_rentals'
+    service.start_due_rentals()
+    yield 'get_all_customers'
+    service.get_all_customers()
+    yield 'get_customer_rows'
+    service.get_customer_rows()
+    yield 'search_customers'
+    service.search_customers('ana n01')
+    yield 'get_all_rentals'
+    service.get_all_rentals()
+    yield 'get_rentals_page'
+    service.get_rentals_page(limit=10)
+    service.get_rentals_page(after_id=1, limit=10)
+    service.get_rentals_page(before_id=2, limit=10)
+    yield 'get_rentals_page[filtered]'
+    service.get_rentals_page(limit=10, filter_text='ana')
+    service.get_rentals_page(after_id=1, limit=10, filter_text='ana vios')
+    service.get_rentals_page(before_id=2, limit=10, filter_text='ana')
+    yield 'complete_rental'
+    service.complete_rental(1)
+    yield 'get_revenue_summary'
+    service.get_revenue_summary()
+    yield 'get_revenue_breakdown'
+    for period in ('day', 'month', 'model'):
+        service.get_revenue_breakdown(period)
+    yield 'update_vehicle_batch[regroup]'
+    service.update_vehicle_batch('Honda', 'Civic', 2021, 'Honda', 'Civic RS', 2021, 2000.0)
+    yield 'update_vehicle[regroup]'
+    service.update_vehicle(1, model='Civic')
+    yield 'rebuild_revenue_rollup'
+    service.rebuild_revenue_rollup()
+    yield 'delete_vehicle'
+    service.delete_vehicle(2)
+    yield 'delete_customer'
+    service.delete_customer(2)
+    yield 'delete_vehicle_group'
+    service.delete_vehicle_group('Ford', 'Ranger', 2019)
+    yield 'authenticate'
+    service.authenticate('admin', 'password')
+
+
+def collect_statements(db_path):
+    engine = create_db_engine(f'sqlite:///{db_path}')
+    models.Session.configure(bind=engine)
+    models.init_db(engine)
+
+    statements = []
+    current = [None]
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if executemany and parameters:
+            parameters = parameters[0]
+        statements.append((current[0], statement, parameters))
+
+    for name in _workload(CarRentalService()):
+        current[0] = name
+
+    engine.dispose()
+    return statements
+
+
+def _full_scan(detail):
+    """The table a plan step reads whole, or None if the step is a lookup."""
+    if not detail.startswith('SCAN ') or 'CONSTANT ROW' in detail:
+        return None
+    if 'VIRTUAL TABLE INDEX' in detail:
+        # Full-text tables report their constraints after the colon, e.g.
+        # "INDEX 192:M3<" for MATCH plus a rowid bound; none means a full scan
+        if detail.partition(':')[2]:
+            return None
+    return detail.split()[1]
+
+
+def full_scans(db_path, statements):
+    """Yield (step, table, statement, plan detail) for every full table or index scan."""
+    connection = sqlite3.connect(db_path)
+    try:
+        for step, statement, parameters in statements:
+            if not statement.lstrip().upper().startswith(('SELECT', 'INSERT', 'UPDATE', 'DELETE')):
+                continue
+            plan = [row[-1] for row in connection.execute(f'EXPLAIN QUERY PLAN {statement}', parameters or ())]
+            # An unfiltered scan that already follows the ORDER BY and stops at
+            # LIMIT reads a bounded number of rows (e.g. "latest N rentals").
+            # With a WHERE or GROUP BY it may read any number of rows first.
+            flat = ' '.join(statement.split())
+            bounded = (' LIMIT ' in flat and ' WHERE ' not in flat and ' GROUP BY ' not in flat
+                       and not any('TEMP B-TREE FOR ORDER BY' in d for d in plan))
+            for detail in plan:
+                table = _full_scan(detail)
+                if table is not None and not bounded:
+                    yield step, table, statement, detail
+    finally:
+        connection.close()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'plan_check.db')
+        statements = collect_statements(db_path)
+        failures = [scan for scan in full_scans(db_path, statements) if scan[:2] not in FULL_READS]
+
+    for step, table, statement, detail in failures:
+        print(f"{step}: {detail}\n    {' '.join(statement.split())}")
+    print(f"Checked {len(statements)} statements, {len(failures)} unexpected full scan(s).")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Check that the incrementally maintained revenue rollup matches a full rebuild.
+
+Books, renames, moves and completes rentals against a throwaway database, and
+after every step compares revenue_rollup with what rebuild_revenue_rollup()
+computes from the rentals table. Exits non-zero on the first difference.
+
+    python check_revenue_rollup.py
+"""
+import datetime
+import os
+import sys
+import tempfile
+
+from sqlalchemy import select
+
+import models
+from database import create_db_engine
+from services import CarRentalService
+
+
+def _scenario(service):
+    """Yield a description after each step of the workload."""
+    today = datetime.date.today()
+
+    def days(n):
+        return (today + datetime.timedelta(days=n)).isoformat()
+
+    service.add_vehicle_batch('Toyota', 'Vios', 2020, 'VIO', 1000.0, 3)
+    service.add_vehicle_batch('Honda', 'City', 2021, 'CTY', 1200.0, 2)
+    customer = service.add_customer('Ana Cruz', '09170000001', 'N01-00-000001')
+    vios = [v.id for v in service.get_group_vehicles('Toyota', 'Vios', 2020)]
+    city = [v.id for v in service.get_group_vehicles('Honda', 'City', 2021)]
+
+    first, _ = service.create_rental(customer.id, vios[0], days(3))
+    second, _ = service.create_rental(customer.id, vios[1], days(12), days(10))
+    third, _ = service.create_rental(customer.id, city[0], days(2))
+    yield 'bookings'
+    service.update_vehicle_batch('Toyota', 'Vios', 2020, 'Toyota', 'Vios XLE', 2020, 1000.0)
+    yield 'group renamed'
+    service.complete_rental(first.id)
+    yield 'rental completed after the rename'
+    service.update_vehicle(city[0], model='Vios XLE', make='Toyota', year=2020)
+    yield 'one unit moved into another group'
+    service.complete_rental(third.id)
+    yield 'moved unit completed'
+    service.update_vehicle_batch('Toyota', 'Vios XLE', 2020, 'Honda', 'City', 2021, 1200.0)
+    yield 'group merged into an existing one'
+    service.complete_rental(second.id)
+    yield 'rental completed after the merge'
+
+
+def _rollup(connection):
+    rollup = models.RevenueRollup.__table__
+    return sorted(
+        (row.day, row.make, row.model, row.year, row.status, row.rental_count, round(row.revenue, 2))
+        for row in connection.execute(select(rollup)) if row.rental_count or row.revenue
+    )
+
+
+def main():
+    failures = 0
+    steps = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'rollup_check.db')}")
+        models.Session.configure(bind=engine)
+        models.init_db(engine)
+        for step in _scenario(CarRentalService()):
+            steps += 1
+            with engine.begin() as connection:
+                maintained = _rollup(connection)
+                models.rebuild_revenue_rollup(connection)
+                rebuilt = _rollup(connection)
+                connection.rollback()
+            if maintained != rebuilt:
+                failures += 1
+                print(f"After {step}:\n    maintained {maintained}\n    rebuilt    {rebuilt}")
+        engine.dispose()
+
+    print(f"Checked {steps} steps, {failures} mismatch(es).")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
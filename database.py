@@ -0,0 +1,100 @@
+"""Engine configuration for the car rental database.
+
+Settings come from the ``[database]`` section of ``car_rental.ini`` (next to
+the working directory, or the file named by ``CAR_RENTAL_CONFIG``) and are
+overridden by environment variables:
+
+    CAR_RENTAL_DB_URL            database URL (default sqlite:///car_rental.db)
+    CAR_RENTAL_DB_POOL_SIZE      connections kept open by the pool
+    CAR_RENTAL_DB_MAX_OVERFLOW   extra connections allowed under load
+    CAR_RENTAL_DB_POOL_TIMEOUT   seconds to wait for a free connection
+    CAR_RENTAL_DB_TUNED          0 to skip the SQLite pragmas below
+
+SQLite connections are switched to WAL so readers no longer block the writer,
+and to ``synchronous=NORMAL``, which in WAL mode syncs at checkpoints instead
+of on every commit (a crash can lose the last commits but never corrupts the
+file).
+"""
+import configparser
+import os
+
+from sqlalchemy import create_engine, event
+
+DEFAULT_URL = 'sqlite:///car_rental.db'
+CONFIG_FILE = 'car_rental.ini'
+
+# Applied to every new SQLite connection, in this order
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('busy_timeout', 5000),       # ms to wait on a lock before "database is locked"
+    ('cache_size', -64000),       # negative = KiB, i.e. 64 MB of page cache
+    ('mmap_size', 268435456),     # 256 MB of memory-mapped reads
+    ('temp_store', 'MEMORY'),
+)
+
+_SETTINGS = {
+    # name: (environment variable, type)
+    'url': ('CAR_RENTAL_DB_URL', str),
+    'pool_size': ('CAR_RENTAL_DB_POOL_SIZE', int),
+    'max_overflow': ('CAR_RENTAL_DB_MAX_OVERFLOW', int),
+    'pool_timeout': ('CAR_RENTAL_DB_POOL_TIMEOUT', float),
+    'tuned': ('CAR_RENTAL_DB_TUNED', lambda value: str(value).lower() not in ('0', 'false', 'no', 'off')),
+}
+
+
+def load_settings(config_file=None, environ=None):
+    """Return the database settings as a dict, from the config file then the environment."""
+    environ = os.environ if environ is None else environ
+    config_file = config_file or environ.get('CAR_RENTAL_CONFIG', CONFIG_FILE)
+
+    raw = {}
+    parser = configparser.ConfigParser()
+    if parser.read(config_file) and parser.has_section('database'):
+        raw.update(parser['database'])
+    for name, (variable, _) in _SETTINGS.items():
+        if variable in environ:
+            raw[name] = environ[variable]
+
+    settings = {'url': DEFAULT_URL, 'tuned': True}
+    for name, value in raw.items():
+        if name not in _SETTINGS:
+            raise ValueError(f"Unknown database setting: {name}")
+        convert = _SETTINGS[name][1]
+        try:
+            settings[name] = convert(value)
+        except ValueError:
+            raise ValueError(f"Invalid value for database setting {name}: {value!r}")
+    return settings
+
+
+def apply_sqlite_pragmas(engine, pragmas=SQLITE_PRAGMAS):
+    """Run ``pragmas`` on every connection the engine opens."""
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+    return engine
+
+
+def create_db_engine(url=None, **overrides):
+    """Create the application engine from settings, applying the SQLite profile.
+
+    ``url`` and keyword arguments override the loaded settings, e.g.
+    ``create_db_engine('sqlite:///bench.db', tuned=False)``.
+    """
+    settings = load_settings()
+    if url is not None:
+        settings['url'] = url
+    settings.update(overrides)
+
+    url = settings.pop('url')
+    tuned = settings.pop('tuned')
+    engine = create_engine(url, **settings)
+    if tuned and engine.dialect.name == 'sqlite':
+        apply_sqlite_pragmas(engine)
+    return engine
@@ -0,0 +1,205 @@
+"""Per-method query and latency statistics for the service layer.
+
+``provide_session`` wraps every service call in ``instruments.call(name)``.
+While a call is running on a thread, the cursor events below count each SQL
+statement it issues (and the rows its INSERT/UPDATE/DELETE statements touch)
+against it. Finished calls go into per-method latency histograms.
+
+``items_returned`` is the size of what the method returned (a list's length,
+1 for any other value, 0 for None), not the number of rows its SELECTs read.
+
+The slow-query log is off unless a threshold is set, either with
+``instruments.set_slow_query_log(ms, path)`` or through the environment:
+
+    CAR_RENTAL_SLOW_QUERY_MS    log statements slower than this many ms
+    CAR_RENTAL_SLOW_QUERY_LOG   file to append them to (default: stderr)
+"""
+import bisect
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+slow_query_logger = logging.getLogger('car_rental.slow_query')
+
+
+class MethodStats:
+    """Counters and a latency histogram for one service method."""
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.errors = 0
+        self.rollbacks = 0
+        self.statements = 0
+        self.items_returned = 0
+        self.rows_affected = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, call):
+        self.calls += 1
+        self.errors += call.error
+        self.rollbacks += call.rollback
+        self.statements += call.statements
+        self.items_returned += call.items_returned
+        self.rows_affected += call.rows_affected
+        self.total_ms += call.elapsed_ms
+        self.max_ms = max(self.max_ms, call.elapsed_ms)
+        self.histogram[bisect.bisect_left(BUCKETS_MS, call.elapsed_ms)] += 1
+
+    def percentile(self, fraction):
+        """Upper bound (ms) of the bucket holding the given fraction of calls.
+
+        Capped at the slowest call seen, which may be below the bucket's bound.
+        """
+        if not self.calls:
+            return 0.0
+        wanted = fraction * self.calls
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.histogram):
+            seen += count
+            if seen >= wanted:
+                return min(float(bound), self.max_ms)
+        return self.max_ms
+
+    def as_dict(self):
+        calls = self.calls or 1
+        return {
+            'method': self.name,
+            'calls': self.calls,
+            'errors': self.errors,
+            'rollbacks': self.rollbacks,
+            'avg_ms': self.total_ms / calls,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': self.max_ms,
+            'total_ms': self.total_ms,
+            'statements': self.statements,
+            'statements_per_call': self.statements / calls,
+            'items_returned': self.items_returned,
+            'rows_affected': self.rows_affected,
+            'histogram': dict(zip([f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"], self.histogram)),
+        }
+
+
+class _Call:
+    def __init__(self, name):
+        self.name = name
+        self.statements = 0
+        self.items_returned = 0
+        self.rows_affected = 0
+        self.error = False
+        self.rollback = False
+        self.elapsed_ms = 0.0
+        self.result = None
+
+
+class Instrumentation:
+    def __init__(self):
+        self.enabled = True
+        self.slow_query_ms = None
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def call(self, name, nested=False):
+        """Measure one service call. Set ``.result`` on the yielded object to count returned items.
+
+        A failing call that is not ``nested`` inside a unit of work rolled back
+        its own transaction and is counted as a rollback.
+        """
+        if not self.enabled:
+            yield _Call(name)
+            return
+        call = _Call(name)
+        stack = self._stack()
+        stack.append(call)
+        start = time.perf_counter()
+        try:
+            yield call
+        except Exception:
+            call.error = True
+            call.rollback = not nested
+            raise
+        finally:
+            call.elapsed_ms = (time.perf_counter() - start) * 1000
+            stack.pop()
+            if isinstance(call.result, list):
+                call.items_returned = len(call.result)
+            elif call.result is not None:
+                call.items_returned = 1
+            with self._lock:
+                stats = self._stats.get(name)
+                if stats is None:
+                    stats = self._stats[name] = MethodStats(name)
+                stats.add(call)
+
+    def snapshot(self):
+        """Stats of every method as dicts, slowest total time first."""
+        with self._lock:
+            rows = [stats.as_dict() for stats in self._stats.values()]
+        return sorted(rows, key=lambda row: row['total_ms'], reverse=True)
+
+    def dump(self, path):
+        """Write the current stats to ``path`` as JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'methods': self.snapshot()}, f, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def set_slow_query_log(self, threshold_ms, path=None):
+        """Log statements slower than ``threshold_ms`` (None turns the log off)."""
+        self.slow_query_ms = threshold_ms
+        if threshold_ms is not None and not slow_query_logger.handlers:
+            handler = logging.FileHandler(path, encoding='utf-8') if path else logging.StreamHandler()
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            slow_query_logger.addHandler(handler)
+            slow_query_logger.setLevel(logging.WARNING)
+            slow_query_logger.propagate = False
+
+    # Cursor events (installed for every Engine below)
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - context._query_start) * 1000
+        stack = getattr(self._local, 'stack', None)
+        if stack:
+            affected = cursor.rowcount if cursor.rowcount and cursor.rowcount > 0 else 0
+            # A service method called from another one counts towards both
+            for call in stack:
+                call.statements += 1
+                call.rows_affected += affected
+        if self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms:
+            method = stack[-1].name if stack else '-'
+            params = repr(parameters)
+            if len(params) > 200:
+                params = params[:200] + '...'
+            slow_query_logger.warning("%.1f ms in %s: %s %s", elapsed_ms, method, ' '.join(statement.split()), params)
+
+
+instruments = Instrumentation()
+event.listen(Engine, 'before_cursor_execute', instruments._before_cursor_execute)
+event.listen(Engine, 'after_cursor_execute', instruments._after_cursor_execute)
+
+if os.environ.get('CAR_RENTAL_SLOW_QUERY_MS'):
+    instruments.set_slow_query_log(float(os.environ['CAR_RENTAL_SLOW_QUERY_MS']), os.environ.get('CAR_RENTAL_SLOW_QUERY_LOG'))
@@ -1,20 +1,118 @@
+import startup  # first, so start-up timing includes every import below
 import tkinter as tk
 from tkinter import messagebox, ttk
 import ttkbootstrap as tb
 from ttkbootstrap.constants import *
-from services import CarRentalService
+from search import DebouncedSearch, IncrementalSearch, PrefixIndex
+from widgets import KeysetPageSource, ListPageSource, PagedTree, Typeahead, sync_tree
+from tasks import TaskRunner
+import snapshot_cache
 import datetime
+import json
+import os
+import threading
+import time
+
+# Most matches the customer search lists
+CUSTOMER_SEARCH_LIMIT = 500
+# Most choices a typeahead picker offers at once
+PICKER_LIMIT = 50
+# How often advance bookings whose start date has arrived take their car out
+DUE_RENTALS_INTERVAL_MS = 5 * 60 * 1000
+
+# SQLAlchemy, the models and the service layer are imported on a worker thread
+# by open_backend(), after the window has painted the cached dashboard
+startup.mark('imports')
+
+
+def open_backend():
+    """Import the service layer, open the database and bring the schema up to date.
+
+    With CAR_RENTAL_API_URL set the app talks to that API server instead
+    (see api_server.py) and never opens the database itself.
+    """
+    api_url = os.environ.get('CAR_RENTAL_API_URL')
+    if api_url:
+        from api_client import RemoteService
+        startup.mark('services_imported')
+        service = RemoteService(api_url)
+    else:
+        from models import init_db
+        from services import CarRentalService
+        startup.mark('services_imported')
+
+        init_db()
+        service = CarRentalService()
+    # Bookings made in advance take their car out once their start date arrives
+    service.start_due_rentals()
+    startup.mark('database_ready')
+    return service
+
 
 class CarRentalApp(tb.Window):
     def __init__(self):
         super().__init__(themename="cosmo", title="Vega Car Rentals")
         self.geometry("1000x700")
         
-        self.service = CarRentalService()
+        # Set by backend_ready() once open_backend() has run on a worker
+        self.service = None
+        self.pending_view = None
+        self.startup_complete = False
         self.current_user = "admin" # Set default user
+        startup.mark('window')
+
+        # Service calls run on worker threads; results come back via after() polling
+        self.tasks = TaskRunner(self, on_busy=self.set_loading, on_error=lambda e: messagebox.showerror("Error", str(e)))
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.create_main_layout()
         self.minsize(1000, 700) # Ensure window doesn't get too small
+        self.after_idle(lambda: startup.mark('first_paint'))
+
+        self.tasks.submit(open_backend, on_done=self.backend_ready, on_error=self.backend_failed, view_bound=False)
+
+    def backend_ready(self, service):
+        self.service = service
+        self.after(DUE_RENTALS_INTERVAL_MS, self.start_due_rentals)
+        show, self.pending_view = self.pending_view, None
+        if show is not None:
+            # Asked for while the database was opening
+            show()
+        else:
+            self.refresh_dashboard()
+
+    def start_due_rentals(self):
+        """Start the bookings that became due while the app is open, then reschedule."""
+        def started(count):
+            refresh = self.view_refresh.get(self.current_view)
+            if count and refresh is not None:
+                refresh()
+
+        # A failure is not worth a dialog; the next run retries
+        self.tasks.submit(self.service.start_due_rentals, on_done=started, on_error=lambda e: None,
+                          key="start_due_rentals", view_bound=False)
+        self.after(DUE_RENTALS_INTERVAL_MS, self.start_due_rentals)
+
+    def backend_failed(self, e):
+        messagebox.showerror("System Error", f"Could not open the database: {str(e)}")
+
+    def navigate(self, show):
+        """Open a view now, or as soon as the database is ready."""
+        if self.service is None and show != self.show_dashboard:
+            self.pending_view = show
+            return
+        show()
+
+    def on_close(self):
+        self.tasks.shutdown()
+        self.destroy()
+
+    def set_loading(self, busy):
+        self.loading_label.config(text="⏳ Loading..." if busy else "")
+
+    def view_is_open(self, name):
+        """True while the view `name` is the one on screen."""
+        return self.current_view == name
 
     def create_scrolled_tree(self, parent, columns, height=None, bootstyle="info"):
         frame = tb.Frame(parent)
@@ -35,6 +133,12 @@ class CarRentalApp(tb.Window):
         
         return tree, frame
 
+    def create_paged_tree(self, parent, columns, item_of, height=None, bootstyle="info"):
+        """Scrolled tree that only materializes the rows around the visible window."""
+        tree, frame = self.create_scrolled_tree(parent, columns, height=height, bootstyle=bootstyle)
+        vsb = frame.grid_slaves(row=0, column=1)[0]
+        return PagedTree(tree, vsb, item_of, runner=self.tasks), frame
+
     def validate_mobile_number(self, P):
         """Validate that input is numeric and <= 11 characters."""
         if P == "":  # Allow empty (deleting)
@@ -79,12 +183,21 @@ class CarRentalApp(tb.Window):
         # Spacer inside sidebar for padding
         tb.Frame(self.sidebar, width=200, height=0).pack()
 
+        # Shown while background service calls are running
+        self.loading_label = tb.Label(self.sidebar, text="", bootstyle="inverse-dark")
+        self.loading_label.pack(side=BOTTOM, pady=10)
+
         # Create main content container - Uses pack with fill/expand for fluid layout
         self.nav_content = tb.Frame(self)
         self.nav_content.pack(side=RIGHT, fill=BOTH, expand=YES)
         
         self.content_area = self.nav_content
 
+        # Views are built on first visit and then kept; switching hides and shows them
+        self.views = {}
+        self.view_refresh = {}
+        self.current_view = None
+
         self.create_nav_buttons()
         self.show_dashboard()
 
@@ -95,44 +208,55 @@ class CarRentalApp(tb.Window):
             ("Customers", self.show_customers),
             ("Rentals", self.show_rentals),
             ("Reports", self.show_reports),
+            ("Diagnostics", self.show_diagnostics),
         ]
 
         for text, command in buttons:
-            btn = tb.Button(self.sidebar, text=text, command=command, bootstyle="link-light", width=20)
+            btn = tb.Button(self.sidebar, text=text, command=lambda c=command: self.navigate(c), bootstyle="link-light", width=20)
             btn.pack(pady=10, padx=10)
 
-    def clear_content(self):
-        for widget in self.content_area.winfo_children():
-            widget.destroy()
+    def open_view(self, name):
+        """Bring view `name` to the front.
+
+        A view seen before is shown again and refreshed, and None is returned.
+        The first time an empty frame is returned for the caller to build the
+        view in; the caller then registers its refresh in `view_refresh`.
+        """
+        # Results still in flight for the old view are no longer wanted
+        self.tasks.new_scope()
+        if self.current_view is not None:
+            self.views[self.current_view].pack_forget()
+        self.current_view = name
+        frame = self.views.get(name)
+        if frame is not None:
+            frame.pack(fill=BOTH, expand=YES)
+            self.view_refresh[name]()
+            return None
+        frame = self.views[name] = tb.Frame(self.content_area)
+        frame.pack(fill=BOTH, expand=YES)
+        return frame
 
     def show_dashboard(self):
-        self.clear_content()
-        
+        view = self.open_view('dashboard')
+        if view is None:
+            return
+
         # Header
-        header = tb.Label(self.content_area, text="Dashboard Overview", font=("Helvetica", 24, "bold"), bootstyle="primary")
+        header = tb.Label(view, text="Dashboard Overview", font=("Helvetica", 24, "bold"), bootstyle="primary")
         header.pack(pady=20)
 
-        try:
-            vehicles = self.service.get_all_vehicles()
-            rentals = self.service.get_all_rentals()
-            customers = self.service.get_all_customers()
-        except Exception as e:
-            messagebox.showerror("System Error", f"Could not load dashboard data: {str(e)}")
-            vehicles, rentals, customers = [], [], []
-
-        # Stats Row
-        stats_frame = tb.Frame(self.content_area)
+        # Stats Row (values are filled in once the snapshot arrives)
+        stats_frame = tb.Frame(view)
         stats_frame.pack(fill=X, padx=20)
 
-        active_count = len([r for r in rentals if r.status == 'Active'])
-        self.create_stat_card(stats_frame, "Total Vehicles", len(vehicles), "info", 0)
-        self.create_stat_card(stats_frame, "Active Rentals", active_count, "danger", 1)
-        self.create_stat_card(stats_frame, "Total Customers", len(customers), "success", 2)
+        vehicles_card = self.create_stat_card(stats_frame, "Total Vehicles", "…", "info", 0)
+        rentals_card = self.create_stat_card(stats_frame, "Active Rentals", "…", "danger", 1)
+        customers_card = self.create_stat_card(stats_frame, "Total Customers", "…", "success", 2)
 
         # Quick Actions Row
-        tb.Label(self.content_area, text="Quick Actions - What would you like to do?", font=("Helvetica", 16, "bold"), bootstyle="secondary").pack(pady=(40, 10))
+        tb.Label(view, text="Quick Actions - What would you like to do?", font=("Helvetica", 16, "bold"), bootstyle="secondary").pack(pady=(40, 10))
         
-        actions_frame = tb.Frame(self.content_area)
+        actions_frame = tb.Frame(view)
         actions_frame.pack(fill=X, padx=20)
         
         actions = [
@@ -143,26 +267,16 @@ class CarRentalApp(tb.Window):
         ]
         
         for i, (text, cmd, style) in enumerate(actions):
-            btn = tb.Button(actions_frame, text=text, command=cmd, bootstyle=f"{style}-outline", padding=20)
+            btn = tb.Button(actions_frame, text=text, command=lambda c=cmd: self.navigate(c), bootstyle=f"{style}-outline", padding=20)
             btn.grid(row=0, column=i, padx=5, sticky="nsew")
             actions_frame.columnconfigure(i, weight=1)
 
         # Stock Summary Section
-        tb.Label(self.content_area, text="Inventory Stock Levels", font=("Helvetica", 16, "bold"), bootstyle="secondary").pack(pady=(40, 10))
+        tb.Label(view, text="Inventory Stock Levels", font=("Helvetica", 16, "bold"), bootstyle="secondary").pack(pady=(40, 10))
         
-        stock_frame = tb.Frame(self.content_area)
+        stock_frame = tb.Frame(view)
         stock_frame.pack(fill=X, padx=20)
         
-        # Calculate stock stats in python for simplicity
-        stock_stats = {}
-        for v in vehicles:
-            key = f"{v.make} {v.model}"
-            if key not in stock_stats:
-                stock_stats[key] = {'total': 0, 'available': 0}
-            stock_stats[key]['total'] += 1
-            if v.status == 'Available':
-                stock_stats[key]['available'] += 1
-                
         # Display as cards or simple rows. Let's use a flow layout of small cards.
         # If too many models, maybe a treeview is better. Let's use a mini treeview for compactness.
         stock_cols = ("Model", "Total Stock", "Available", "Utilization")
@@ -179,27 +293,12 @@ class CarRentalApp(tb.Window):
         stock_tree.column("Utilization", anchor=CENTER, width=150)
         
         stock_tree.pack(fill=X, expand=YES)
-        
-        for model_name, stats in stock_stats.items():
-            total = stats['total']
-            avail = stats['available']
-            percent = ((total - avail) / total) * 100 if total > 0 else 0
-            
-            # Simple status text
-            if avail == 0:
-                status = "Out of Stock"
-            elif avail < 3:
-                status = "Low Stock"
-            else:
-                status = "Good"
-                
-            stock_tree.insert("", END, values=(model_name, total, avail, status))
 
         # Recent Rentals Table
-        tb.Label(self.content_area, text="Recent Transactions History", font=("Helvetica", 16, "bold"), bootstyle="secondary").pack(pady=(20, 10)) # Reduced top pad
+        tb.Label(view, text="Recent Transactions History", font=("Helvetica", 16, "bold"), bootstyle="secondary").pack(pady=(20, 10)) # Reduced top pad
         
         columns = ("Customer", "Vehicle", "Date", "Status", "Cost")
-        tree, _ = self.create_scrolled_tree(self.content_area, columns=columns, height=8) # Use helper
+        tree, _ = self.create_scrolled_tree(view, columns=columns, height=8) # Use helper
         
         # Alignments: Customer(W), Vehicle(W), Date(Center), Status(Center), Cost(E)
         tree.heading("Customer", text="Customer", anchor=W)
@@ -214,9 +313,78 @@ class CarRentalApp(tb.Window):
         tree.column("Status", anchor=CENTER, width=120)
         tree.column("Cost", anchor=E, width=100)
 
-        for rental in rentals[-5:]:
+        self.dashboard = ((vehicles_card, rentals_card, customers_card), stock_tree, tree)
+        self.cached_dashboard_note = None
+        self.view_refresh['dashboard'] = self.refresh_dashboard
+        if self.service is None:
+            # Cold start: show what the dashboard said last time until the database is open
+            cached = snapshot_cache.load()
+            if cached is not None:
+                self.fill_dashboard(cached, *self.dashboard)
+                saved = cached['saved'].strftime("%B %d %Y %H:%M")
+                self.cached_dashboard_note = tb.Label(view, text=f"Showing saved figures from {saved}; refreshing…", bootstyle="secondary")
+                self.cached_dashboard_note.pack(before=stats_frame, pady=(0, 10))
+        self.refresh_dashboard()
+
+    def refresh_dashboard(self):
+        """Load the live snapshot into the dashboard on screen, once the database is open."""
+        if self.service is None or not self.view_is_open('dashboard'):
+            return
+
+        def on_done(snapshot):
+            self.fill_dashboard(snapshot, *self.dashboard)
+            if self.cached_dashboard_note is not None:
+                self.cached_dashboard_note.destroy()
+                self.cached_dashboard_note = None
+            if not self.startup_complete:
+                self.startup_complete = True
+                startup.mark('live_dashboard')
+
+        self.tasks.submit(
+            self.load_dashboard_snapshot,
+            on_done=on_done,
+            on_error=lambda e: messagebox.showerror("System Error", f"Could not load dashboard data: {str(e)}"),
+            key="dashboard"
+        )
+
+    def load_dashboard_snapshot(self):
+        """Worker: read the live snapshot and keep a copy for the next cold start."""
+        snapshot = self.service.get_dashboard_snapshot()
+        try:
+            snapshot_cache.save(snapshot)
+        except OSError:
+            pass  # Only costs the next start its cached first paint
+        return snapshot
+
+    def fill_dashboard(self, snapshot, cards, stock_tree, tree):
+        vehicles_card, rentals_card, customers_card = cards
+        vehicles_card.config(text=str(snapshot['total_vehicles']))
+        rentals_card.config(text=str(snapshot['active_rentals']))
+        customers_card.config(text=str(snapshot['total_customers']))
+
+        stock_items = []
+        for row in snapshot['stock']:
+            model_name = f"{row.make} {row.model}"
+            total = row.total
+            avail = row.available
+            percent = ((total - avail) / total) * 100 if total > 0 else 0
+            
+            # Simple status text
+            if avail == 0:
+                status = "Out of Stock"
+            elif avail < 3:
+                status = "Low Stock"
+            else:
+                status = "Good"
+                
+            stock_items.append((f"{row.make}|{row.model}", (model_name, total, avail, status)))
+        sync_tree(stock_tree, stock_items)
+
+        recent_items = []
+        for rental in snapshot['recent_rentals']:
             formatted_date = self.format_date(rental.rental_date)
-            tree.insert("", END, values=(rental.customer.name, f"{rental.vehicle.make} {rental.vehicle.model}", formatted_date, rental.status, f"₱{rental.total_cost:.2f}"))
+            recent_items.append((rental.id, (rental.customer_name, rental.vehicle_label, formatted_date, rental.status, f"₱{rental.total_cost:.2f}")))
+        sync_tree(tree, recent_items)
 
     def create_stat_card(self, parent, label, value, color, col):
         card = tb.Frame(parent, bootstyle=color, padding=20)
@@ -224,12 +392,16 @@ class CarRentalApp(tb.Window):
         parent.columnconfigure(col, weight=1)
 
         tb.Label(card, text=label, font=("Helvetica", 12), bootstyle=f"inverse-{color}").pack()
-        tb.Label(card, text=str(value), font=("Helvetica", 24, "bold"), bootstyle=f"inverse-{color}").pack()
+        value_label = tb.Label(card, text=str(value), font=("Helvetica", 24, "bold"), bootstyle=f"inverse-{color}")
+        value_label.pack()
+        return value_label
 
     def show_vehicles(self):
-        self.clear_content()
+        view = self.open_view('vehicles')
+        if view is None:
+            return
         
-        main_frame = tb.Frame(self.content_area, padding=20)
+        main_frame = tb.Frame(view, padding=20)
         main_frame.pack(fill=BOTH, expand=YES)
 
         header_frame = tb.Frame(main_frame)
@@ -244,19 +416,22 @@ class CarRentalApp(tb.Window):
         filter_frame.pack(fill=X, pady=(0, 10))
         
         tb.Label(filter_frame, text="🔍 Search Vehicles:").pack(side=LEFT, padx=(0, 10))
-        search_var = tk.StringVar()
-        search_entry = tb.Entry(filter_frame, textvariable=search_var)
+        self.vehicle_search_var = tk.StringVar()
+        search_entry = tb.Entry(filter_frame, textvariable=self.vehicle_search_var)
         search_entry.pack(side=LEFT, fill=X, expand=YES, padx=(0, 10))
         
         # View Mode Toggle
         self.view_units_var = tb.BooleanVar(value=False)
-        tb.Checkbutton(filter_frame, text="Show Individual Units", variable=self.view_units_var, bootstyle="round-toggle", command=lambda: self.refresh_vehicle_list(search_var.get())).pack(side=RIGHT)
+        tb.Checkbutton(filter_frame, text="Show Individual Units", variable=self.view_units_var, bootstyle="round-toggle", command=self.refresh_vehicle_list).pack(side=RIGHT)
 
-        search_var.trace_add("write", lambda *args: self.refresh_vehicle_list(search_var.get()))
+        DebouncedSearch(search_entry, self.vehicle_search_var, self.filter_vehicle_list)
+        self.vehicle_search = None
+        self.vehicle_units_mode = None
 
         # Vehicle Table
         columns = ("Brand", "Model", "Year", "Registration", "Status", "Stocks (Avail/Total)", "Daily Rate")
-        self.vehicle_tree, _ = self.create_scrolled_tree(main_frame, columns=columns) # Use helper
+        self.vehicle_pager, _ = self.create_paged_tree(main_frame, columns=columns, item_of=self.vehicle_item)
+        self.vehicle_tree = self.vehicle_pager.tree
         
         column_configs = {
             "Brand": (W, 120),
@@ -272,59 +447,66 @@ class CarRentalApp(tb.Window):
             self.vehicle_tree.heading(col, text=col, anchor=anch)
             self.vehicle_tree.column(col, anchor=anch, width=wid)
         
+        self.view_refresh['vehicles'] = self.refresh_vehicle_list
         self.refresh_vehicle_list()
 
-    def refresh_vehicle_list(self, filter_text=""):
-        try:
-            for item in self.vehicle_tree.get_children():
-                self.vehicle_tree.delete(item)
-            
-            vehicles = self.service.get_all_vehicles()
-            
-            # Group vehicles first for calculations
-            # Group key: Make, Model, Year, Rate
-            groups = {}
-            for v in vehicles:
-                key = (v.make, v.model, v.year, v.daily_rate)
-                if key not in groups: groups[key] = []
-                groups[key].append(v)
-
-            # Sort groups by Make/Model
-            sorted_keys = sorted(groups.keys(), key=lambda k: (k[0], k[1]))
-
-            for key in sorted_keys:
-                make, model, year, rate = key
-                group_vehicles = groups[key]
-                
-                # Stats
-                total = len(group_vehicles)
-                avail = sum(1 for v in group_vehicles if v.status == 'Available')
-                stock_str = f"{avail} / {total}"
-                
-                # Filter Logic
-                # Matches if search is empty OR group info matches
-                matches_header = filter_text.lower() in f"{make} {model} {year} {rate}".lower()
-                
-                if self.view_units_var.get():
-                    # SHOW INDIVIDUAL UNITS (FLAT LIST, but sorted)
-                    for v in group_vehicles:
-                        # For individual items, check if they match filter
-                        if matches_header or filter_text.lower() in v.registration.lower():
-                            self.vehicle_tree.insert("", END, iid=v.id, values=(v.make, v.model, v.year, v.registration, v.status, stock_str, f"₱{v.daily_rate:.2f}"))
-                
-                else:
-                    # SHOW AGGREGATE ONLY
-                    if matches_header:
-                        # ID for group row
-                        group_id = f"group_{make}_{model}_{year}_{rate}"
-                        
-                        status_summary = "All Available" if avail == total else f"{total-avail} Rented/Maint"
-                        reg_summary = "(Multiple)" if total > 1 else group_vehicles[0].registration
-                        
-                        self.vehicle_tree.insert("", END, iid=group_id, values=(make, model, year, reg_summary, status_summary, stock_str, f"₱{rate:.2f}"))
-                        
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not refresh vehicles: {str(e)}")
+    def refresh_vehicle_list(self):
+        """Reload fleet data into the search index and update the rows that changed."""
+        if not self.view_is_open('vehicles'):
+            return
+        units_mode = self.view_units_var.get()
+
+        def load():
+            # One row per group (Make, Model, Year, Rate), counted in SQL and
+            # already sorted by Make/Model
+            fleet = self.service.get_fleet_summary()
+            stock = {(g.make, g.model, g.year, g.daily_rate): f"{g.available} / {g.total}" for g in fleet}
+
+            if units_mode:
+                # Units are only loaded when the toggle is on, ordered by group
+                group_order = {key: i for i, key in enumerate(stock)}
+                units = sorted(self.service.get_vehicle_rows(), key=lambda v: group_order.get((v.make, v.model, v.year, v.daily_rate), len(group_order)))
+                index = PrefixIndex(units, key_of=lambda v: v.id, text_of=lambda v: f"{v.make} {v.model} {v.year} {v.daily_rate} {v.registration}")
+            else:
+                index = PrefixIndex(fleet, key_of=lambda g: (g.make, g.model, g.year, g.daily_rate), text_of=lambda g: f"{g.make} {g.model} {g.year} {g.daily_rate}")
+            return stock, IncrementalSearch(index)
+
+        def loaded(result):
+            mode_changed = units_mode != self.vehicle_units_mode
+            self.vehicle_stock, self.vehicle_search = result
+            self.vehicle_units_mode = units_mode
+            source = ListPageSource(self.vehicle_search.search(self.vehicle_search_var.get()))
+            if mode_changed:
+                # Groups and units are different rows altogether; start at the top
+                self.vehicle_pager.set_source(source)
+            else:
+                self.vehicle_pager.refresh(source)
+
+        self.tasks.submit(load, on_done=loaded, key="vehicles",
+                          on_error=lambda e: messagebox.showerror("Error", f"Could not refresh vehicles: {str(e)}"))
+
+    def filter_vehicle_list(self, filter_text=""):
+        if self.vehicle_search is None:
+            return
+        self.vehicle_pager.set_source(ListPageSource(self.vehicle_search.search(filter_text)))
+
+    def vehicle_item(self, row):
+        if self.vehicle_units_mode:
+            # SHOW INDIVIDUAL UNITS (FLAT LIST, but sorted)
+            v = row
+            stock_str = self.vehicle_stock.get((v.make, v.model, v.year, v.daily_rate), "")
+            return v.id, (v.make, v.model, v.year, v.registration, v.status, stock_str, f"₱{v.daily_rate:.2f}")
+
+        # SHOW AGGREGATE ONLY
+        g = row
+        # ID for group row
+        group_id = f"group_{g.make}_{g.model}_{g.year}_{g.daily_rate}"
+        stock_str = f"{g.available} / {g.total}"
+
+        status_summary = "All Available" if g.available == g.total else f"{g.total - g.available} Rented/Maint"
+        reg_summary = "(Multiple)" if g.total > 1 else g.registration
+
+        return group_id, (g.make, g.model, g.year, reg_summary, status_summary, stock_str, f"₱{g.daily_rate:.2f}")
 
     def add_vehicle_dialog(self):
         dialog = tb.Toplevel(title="Add New Vehicle")
@@ -399,27 +581,40 @@ class CarRentalApp(tb.Window):
                     return
 
                 qty = int(qty_spin.get())
+                year = int(year_str)
+                rate = float(rate_str)
+            except ValueError as e:
+                err = str(e) if str(e) else "Please enter valid numbers for Year, Price, and Quantity."
+                messagebox.showerror("Invalid Input", err)
+                return
 
-                self.service.add_vehicle_batch(
-                    make=brand,
-                    model=model,
-                    year=int(year_str),
-                    base_registration=reg,
-                    daily_rate=float(rate_str),
-                    quantity=qty
-                )
-
+            def saved(count):
                 msg = "New car added successfully!" if qty == 1 else f"{qty} new cars added to stock!"
                 messagebox.showinfo("Success", msg)
                 dialog.destroy()
                 self.refresh_vehicle_list()
-            except ValueError as e:
-                err = str(e) if str(e) else "Please enter valid numbers for Year, Price, and Quantity."
-                messagebox.showerror("Invalid Input", err)
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not save car(s): {str(e)}")
 
-        tb.Button(form_frame, text="Save to Inventory", command=save, bootstyle="success", padding=12).pack(pady=30, fill=X)
+            def failed(e):
+                save_btn.configure(state="normal")
+                if isinstance(e, ValueError):
+                    messagebox.showerror("Invalid Input", str(e))
+                else:
+                    messagebox.showerror("Error", f"Could not save car(s): {str(e)}")
+
+            save_btn.configure(state="disabled")
+            self.tasks.submit(
+                self.service.add_vehicle_batch,
+                make=brand,
+                model=model,
+                year=year,
+                base_registration=reg,
+                daily_rate=rate,
+                quantity=qty,
+                on_done=saved, on_error=failed, view_bound=False
+            )
+
+        save_btn = tb.Button(form_frame, text="Save to Inventory", command=save, bootstyle="success", padding=12)
+        save_btn.pack(pady=30, fill=X)
 
     def edit_vehicle_dialog(self):
         selected = self.vehicle_tree.selection()
@@ -432,9 +627,6 @@ class CarRentalApp(tb.Window):
         # Check if it's a group or single vehicle
         is_group = str(sel_id).startswith("group_")
         
-        vehicle = None
-        current_stock = 0
-        
         if is_group:
             # group_Make_Model_Year_Rate
             # It's safer to find a representative vehicle from the DB
@@ -445,37 +637,44 @@ class CarRentalApp(tb.Window):
                 # Better approach: The tree values have the Make/Model/Year/Rate!
                 values = self.vehicle_tree.item(sel_id, 'values')
                 make, model, year_str = values[0], values[1], values[2]
-                rate_str = values[6].replace('₱', '')
-                
-                # Fetch ANY vehicle matching this to get details
                 year = int(year_str)
-                # We need to find one vehicle to use as base
-                all_vs = self.service.get_all_vehicles()
-                vehicle = next((v for v in all_vs if v.make==make and v.model==model and v.year==year), None)
-                
-                if not vehicle:
-                    messagebox.showerror("Error", "Could not find vehicles for this group.")
-                    return
-                
-                v_id = vehicle.id # Use this ID as proxy for updates if needed, or update batch
-                current_stock = self.service.get_vehicle_count_by_model(make, model, year)
-                
             except Exception as e:
                 messagebox.showerror("Error", f"Group Parse Error: {e}")
                 return
+
+            def load():
+                # Fetch ANY vehicle matching this to use as base
+                vehicle = next(iter(self.service.get_group_vehicles(make, model, year)), None)
+                if not vehicle:
+                    return None, 0
+                return vehicle, self.service.get_vehicle_count_by_model(make, model, year)
+
+            missing_msg = "Could not find vehicles for this group."
+            error_prefix = "Group Parse Error: "
         else:
             # Single Vehicle
             v_id = int(sel_id)
-            try:
+
+            def load():
                 vehicle = self.service.get_vehicle(v_id)
                 if not vehicle:
-                    messagebox.showerror("Error", "Vehicle not found.")
-                    return
-                current_stock = self.service.get_vehicle_count_by_model(vehicle.make, vehicle.model, vehicle.year)
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not fetch vehicle details: {str(e)}")
+                    return None, 0
+                return vehicle, self.service.get_vehicle_count_by_model(vehicle.make, vehicle.model, vehicle.year)
+
+            missing_msg = "Vehicle not found."
+            error_prefix = "Could not fetch vehicle details: "
+
+        def loaded(result):
+            vehicle, current_stock = result
+            if not vehicle:
+                messagebox.showerror("Error", missing_msg)
                 return
+            self.open_edit_vehicle_dialog(is_group, vehicle, current_stock)
+
+        self.tasks.submit(load, on_done=loaded, on_error=lambda e: messagebox.showerror("Error", f"{error_prefix}{str(e)}"))
 
+    def open_edit_vehicle_dialog(self, is_group, vehicle, current_stock):
+        v_id = vehicle.id # For groups this is a proxy; updates go through the batch methods
         title_prefix = "Edit Fleet Group" if is_group else f"Edit Vehicle #{v_id}"
         dialog = tb.Toplevel(title=title_prefix)
         dialog.geometry("500x550")
@@ -544,75 +743,49 @@ class CarRentalApp(tb.Window):
                 new_year = int(year_entry.get())
                 new_rate = float(rate_entry.get())
                 target_qty = int(stock_spin.get())
+                new_reg = reg_entry.get().strip()
+            except ValueError as e:
+                err_msg = str(e) if str(e) else "Invalid numbers entered. Please check Year, Rate and Stock fields."
+                messagebox.showerror("Validation Error", err_msg)
+                return
 
-                if is_group:
-                    # Step 1: If make/model/year/rate changed, update ALL vehicles in this group
-                    old_make = vehicle.make
-                    old_model = vehicle.model
-                    old_year = vehicle.year
-                    properties_changed = (
-                        new_make != old_make or
-                        new_model != old_model or
-                        new_year != old_year or
-                        new_rate != vehicle.daily_rate
-                    )
-                    if properties_changed:
-                        self.service.update_vehicle_batch(
-                            old_make=old_make,
-                            old_model=old_model,
-                            old_year=old_year,
-                            new_make=new_make,
-                            new_model=new_model,
-                            new_year=new_year,
-                            new_rate=new_rate
-                        )
-
-                    # Step 2: Adjust stock using NEW attributes so we find the group correctly
-                    success, msg = self.service.adjust_vehicle_stock(
-                        make=new_make,
-                        model=new_model,
-                        year=new_year,
-                        current_reg=vehicle.registration,
-                        daily_rate=new_rate,
-                        target_qty=target_qty
-                    )
-                    result_msg = msg
-                else:
-                    # Single vehicle update
-                    self.service.update_vehicle(
-                        vehicle_id=v_id,
-                        make=new_make,
-                        model=new_model,
-                        year=new_year,
-                        registration=reg_entry.get().strip(),
-                        daily_rate=new_rate
-                    )
-                    # Adjust stock for the group this vehicle belongs to
-                    success, msg = self.service.adjust_vehicle_stock(
-                        make=new_make,
-                        model=new_model,
-                        year=new_year,
-                        current_reg=reg_entry.get().strip(),
-                        daily_rate=new_rate,
-                        target_qty=target_qty
-                    )
-                    result_msg = msg
+            def apply_changes():
+                # The property update and the stock change commit together or
+                # not at all (one request when the service is remote)
+                return self.service.edit_vehicle(
+                    v_id,
+                    make=new_make,
+                    model=new_model,
+                    year=new_year,
+                    daily_rate=new_rate,
+                    target_qty=target_qty,
+                    registration=new_reg,
+                    whole_group=is_group
+                )
 
+            def updated(result_msg):
                 messagebox.showinfo("Success", f"Operation Complete!\n{result_msg}")
                 dialog.destroy()
                 self.refresh_vehicle_list()
 
-            except ValueError as e:
-                err_msg = str(e) if str(e) else "Invalid numbers entered. Please check Year, Rate and Stock fields."
-                messagebox.showerror("Validation Error", err_msg)
-            except Exception as e:
-                messagebox.showerror("Error", f"Update failed: {str(e)}")
+            def failed(e):
+                update_btn.configure(state="normal")
+                if isinstance(e, ValueError):
+                    messagebox.showerror("Validation Error", str(e))
+                else:
+                    messagebox.showerror("Error", f"Update failed: {str(e)}")
 
-        tb.Button(form_frame, text="Update Fleet / Car", command=update, bootstyle="info", padding=12).pack(pady=30, fill=X)
+            update_btn.configure(state="disabled")
+            self.tasks.submit(apply_changes, on_done=updated, on_error=failed, view_bound=False)
+
+        update_btn = tb.Button(form_frame, text="Update Fleet / Car", command=update, bootstyle="info", padding=12)
+        update_btn.pack(pady=30, fill=X)
 
     def show_customers(self):
-        self.clear_content()
-        main_frame = tb.Frame(self.content_area, padding=20)
+        view = self.open_view('customers')
+        if view is None:
+            return
+        main_frame = tb.Frame(view, padding=20)
         main_frame.pack(fill=BOTH, expand=YES)
 
         header_frame = tb.Frame(main_frame)
@@ -625,26 +798,40 @@ class CarRentalApp(tb.Window):
         filter_frame = tb.Frame(main_frame)
         filter_frame.pack(fill=X, pady=(0, 10))
         tb.Label(filter_frame, text="🔍 Search Customers:").pack(side=LEFT, padx=(0, 10))
-        search_var = tk.StringVar()
-        search_entry = tb.Entry(filter_frame, textvariable=search_var)
+        self.customer_search_var = tk.StringVar()
+        search_entry = tb.Entry(filter_frame, textvariable=self.customer_search_var)
         search_entry.pack(side=LEFT, fill=X, expand=YES)
-        search_var.trace_add("write", lambda *args: self.refresh_customer_list(search_var.get()))
+        DebouncedSearch(search_entry, self.customer_search_var, self.filter_customer_list)
 
         columns = ("Name", "Contact", "License Details")
-        self.customer_tree, _ = self.create_scrolled_tree(main_frame, columns=columns)
+        self.customer_pager, _ = self.create_paged_tree(main_frame, columns=columns, item_of=lambda c: (c.id, (c.name, c.contact, c.license_details)))
+        self.customer_tree = self.customer_pager.tree
         for col in columns:
             self.customer_tree.heading(col, text=col, anchor=W)
             self.customer_tree.column(col, anchor=W, width=200)
         
+        self.view_refresh['customers'] = self.refresh_customer_list
         self.refresh_customer_list()
 
-    def refresh_customer_list(self, filter_text=""):
-        for item in self.customer_tree.get_children():
-            self.customer_tree.delete(item)
-        customers = self.service.get_all_customers()
-        for c in customers:
-            if filter_text.lower() in f"{c.name} {c.contact} {c.license_details}".lower():
-                self.customer_tree.insert("", END, values=(c.name, c.contact, c.license_details), iid=c.id)
+    def refresh_customer_list(self):
+        """Re-read the customers on screen, updating only the rows that changed."""
+        if not self.view_is_open('customers'):
+            return
+        self.load_customer_list(self.customer_search_var.get(), self.customer_pager.refresh)
+
+    def filter_customer_list(self, filter_text=""):
+        self.load_customer_list(filter_text, self.customer_pager.set_source)
+
+    def load_customer_list(self, filter_text, show):
+        def load():
+            if filter_text.strip():
+                # Ranked prefix matches straight from the full-text index
+                return self.service.search_customers(filter_text, limit=CUSTOMER_SEARCH_LIMIT)
+            return self.service.get_customer_rows()
+
+        # Keyed, so a search typed while another runs replaces it
+        self.tasks.submit(load, on_done=lambda rows: show(ListPageSource(rows)), key="customers",
+                          on_error=lambda e: messagebox.showerror("Error", f"Could not load customers: {str(e)}"))
 
     def add_customer_dialog(self):
         dialog = tb.Toplevel(title="Add New Customer")
@@ -684,22 +871,36 @@ class CarRentalApp(tb.Window):
                     messagebox.showwarning("Invalid Number", "Mobile number must be exactly 11 digits.")
                     return
 
-                self.service.add_customer(
-                    name=name,
-                    contact=contact,
-                    license_details=license
-                )
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to add customer: {str(e)}")
+                return
+
+            def saved(customer):
                 messagebox.showinfo("Success", "Customer added successfully")
                 dialog.destroy()
                 self.refresh_customer_list()
-            except Exception as e:
+
+            def failed(e):
+                save_btn.configure(state="normal")
                 messagebox.showerror("Error", f"Failed to add customer: {str(e)}")
 
-        tb.Button(form_frame, text="Save Customer", command=save, bootstyle="success").pack(pady=20, fill=X)
+            save_btn.configure(state="disabled")
+            self.tasks.submit(
+                self.service.add_customer,
+                name=name,
+                contact=contact,
+                license_details=license,
+                on_done=saved, on_error=failed, view_bound=False
+            )
+
+        save_btn = tb.Button(form_frame, text="Save Customer", command=save, bootstyle="success")
+        save_btn.pack(pady=20, fill=X)
 
     def show_rentals(self):
-        self.clear_content()
-        main_frame = tb.Frame(self.content_area, padding=20)
+        view = self.open_view('rentals')
+        if view is None:
+            return
+        main_frame = tb.Frame(view, padding=20)
         main_frame.pack(fill=BOTH, expand=YES)
 
         header_frame = tb.Frame(main_frame)
@@ -712,13 +913,14 @@ class CarRentalApp(tb.Window):
         filter_frame = tb.Frame(main_frame)
         filter_frame.pack(fill=X, pady=(0, 10))
         tb.Label(filter_frame, text="🔍 Search Rentals:").pack(side=LEFT, padx=(0, 10))
-        search_var = tk.StringVar()
-        search_entry = tb.Entry(filter_frame, textvariable=search_var)
+        self.rental_search_var = tk.StringVar()
+        search_entry = tb.Entry(filter_frame, textvariable=self.rental_search_var)
         search_entry.pack(side=LEFT, fill=X, expand=YES)
-        search_var.trace_add("write", lambda *args: self.refresh_rental_list(search_var.get()))
+        DebouncedSearch(search_entry, self.rental_search_var, self.filter_rental_list)
 
         columns = ("Customer", "Vehicle", "Date", "Return Date", "Total Cost", "Status")
-        self.rental_tree, _ = self.create_scrolled_tree(main_frame, columns=columns)
+        self.rental_pager, _ = self.create_paged_tree(main_frame, columns=columns, item_of=self.rental_item)
+        self.rental_tree = self.rental_pager.tree
         
         rental_column_configs = {
             "Customer": (W, 200),
@@ -733,18 +935,27 @@ class CarRentalApp(tb.Window):
             self.rental_tree.heading(col, text=col, anchor=anch)
             self.rental_tree.column(col, anchor=anch, width=wid)
         
+        self.view_refresh['rentals'] = self.refresh_rental_list
         self.refresh_rental_list()
 
-    def refresh_rental_list(self, filter_text=""):
-        for item in self.rental_tree.get_children():
-            self.rental_tree.delete(item)
-        rentals = self.service.get_all_rentals()
-        for r in rentals:
-            search_pool = f"{r.customer.name} {r.vehicle.make} {r.vehicle.model} {r.status}".lower()
-            if filter_text.lower() in search_pool:
-                rental_date = self.format_date(r.rental_date)
-                return_date = self.format_date(r.return_date)
-                self.rental_tree.insert("", END, values=(r.customer.name, f"{r.vehicle.make} {r.vehicle.model}", rental_date, return_date, f"₱{r.total_cost:.2f}", r.status), iid=r.id)
+    def refresh_rental_list(self):
+        """Re-read the rentals on screen, updating only the rows that changed."""
+        if not self.view_is_open('rentals'):
+            return
+        self.rental_pager.refresh(self.rental_source(self.rental_search_var.get()))
+
+    def filter_rental_list(self, filter_text=""):
+        self.rental_pager.set_source(self.rental_source(filter_text))
+
+    def rental_source(self, filter_text):
+        # Rentals history is paged straight from the database by Rental.id,
+        # with each page fetched on a worker thread
+        return KeysetPageSource(lambda after, before, limit: self.service.get_rentals_page(after, before, limit, filter_text))
+
+    def rental_item(self, r):
+        rental_date = self.format_date(r.rental_date)
+        return_date = self.format_date(r.return_date)
+        return r.id, (r.customer_name, r.vehicle_label, rental_date, return_date, f"₱{r.total_cost:.2f}", r.status)
 
     def add_rental_dialog(self):
         dialog = tb.Toplevel(title="Quick Booking - New Rental")
@@ -756,15 +967,6 @@ class CarRentalApp(tb.Window):
 
         tb.Label(main_form, text="Process New Rental", font=("Helvetica", 18, "bold"), bootstyle="primary").pack(anchor=W, pady=(0, 20))
 
-        # Data fetching
-        try:
-            customers = self.service.get_all_customers()
-            vehicles = self.service.get_available_vehicles()
-        except Exception as e:
-            messagebox.showerror("Data Error", f"Failed to load data: {e}")
-            dialog.destroy()
-            return
-
         # Main Layout: Two columns
         content_split = tb.Frame(main_form)
         content_split.pack(fill=BOTH, expand=YES)
@@ -790,63 +992,69 @@ class CarRentalApp(tb.Window):
         summary_total = tb.Label(summary_content, text="₱0.00", font=("Helvetica", 18, "bold"), bootstyle="success")
         summary_total.pack(pady=20)
 
-        # Vehicle Grouping Logic
-        vehicle_groups = {}
-        for v in vehicles:
-            key = (v.make, v.model, v.year, v.daily_rate)
-            if key not in vehicle_groups:
-                vehicle_groups[key] = []
-            vehicle_groups[key].append(v)
-        
-        display_to_group = {}
-        cb_values = []
-        for key, group in vehicle_groups.items():
-            make, model, year, rate = key
-            count = len(group)
-            display_str = f"{make} {model} ({year}) - ₱{rate:.2f}/day [{count} available]"
-            cb_values.append(display_str)
-            display_to_group[display_str] = group
+        # Period the vehicle picker counts free units for; set on the Tk
+        # thread, read by the picker's lookups on a worker
+        today = datetime.date.today()
+        period = {'range': (today, today + datetime.timedelta(days=1))}
 
-        def update_cost_summary(*args):
+        def read_period():
+            start_date = datetime.datetime.strptime(rental_date_de.entry.get(), "%Y-%m-%d").date()
+            end_date = datetime.datetime.strptime(return_date_de.entry.get(), "%Y-%m-%d").date()
+            return start_date, end_date
+
+        def period_changed(*args):
             try:
-                # Get vehicle rate from selection
-                v_selection = vehicle_cb.get()
-                if not v_selection or v_selection not in display_to_group: return
-                
-                # Use the first vehicle in the group to get the rate
-                vehicle = display_to_group[v_selection][0]
-                
-                # Get date duration
-                start_date_str = rental_date_de.entry.get()
-                end_date_str = return_date_de.entry.get()
-                
-                try:
-                    start_date = datetime.datetime.strptime(start_date_str, "%Y-%m-%d").date()
-                    end_date = datetime.datetime.strptime(end_date_str, "%Y-%m-%d").date()
-                except:
-                    return
+                start_date, end_date = read_period()
+            except ValueError:
+                return
+            update_cost_summary()
+            if end_date > start_date and (start_date, end_date) != period['range']:
+                period['range'] = (start_date, end_date)
+                vehicle_picker.refresh()
 
-                duration = (end_date - start_date).days
-                if duration < 1: duration = 1 
-                
-                total = duration * vehicle.daily_rate
-                
-                summary_days.config(text=f"{duration} Day(s)")
-                summary_rate.config(text=f"₱{vehicle.daily_rate:.2f} / day")
-                summary_total.config(text=f"₱{total:.2f}")
-            except Exception as e:
-                print(f"Summary update error: {e}")
+        def update_cost_summary(*args):
+            group = vehicle_picker.selected
+            if group is None:
+                summary_rate.config(text="₱0.00 / day")
+                summary_total.config(text="₱0.00")
+                return
+            try:
+                start_date, end_date = read_period()
+            except ValueError:
+                return
 
-        # 1. Select Customer
-        tb.Label(input_frame, text="1. Select Customer", font=("Helvetica", 10, "bold")).pack(anchor=W)
-        customer_cb = tb.Combobox(input_frame, values=[f"{c.id}: {c.name}" for c in customers], state="readonly")
+            duration = (end_date - start_date).days
+            if duration < 1: duration = 1 
+            
+            total = duration * group.daily_rate
+            
+            summary_days.config(text=f"{duration} Day(s)")
+            summary_rate.config(text=f"₱{group.daily_rate:.2f} / day")
+            summary_total.config(text=f"₱{total:.2f}")
+
+        # 1. Select Customer (looked up in the customer index as the clerk types)
+        tb.Label(input_frame, text="1. Select Customer (type a name, mobile or license)", font=("Helvetica", 10, "bold")).pack(anchor=W)
+        customer_var = tk.StringVar()
+        customer_cb = tb.Combobox(input_frame, textvariable=customer_var)
         customer_cb.pack(fill=X, pady=(5, 15))
-
-        # 2. Select Vehicle
-        tb.Label(input_frame, text="2. Select Vehicle", font=("Helvetica", 10, "bold")).pack(anchor=W)
-        vehicle_cb = tb.Combobox(input_frame, values=cb_values, state="readonly")
+        customer_picker = Typeahead(
+            customer_cb, customer_var, runner=self.tasks, key_of=lambda c: c.id,
+            lookup=lambda text: self.service.search_customers(text, limit=PICKER_LIMIT),
+            label_of=lambda c: f"{c.name} · {c.contact} · {c.license_details}",
+        )
+
+        # 2. Select Vehicle (groups with free units for the period, counted in SQL)
+        tb.Label(input_frame, text="2. Select Vehicle (type a make, model or year)", font=("Helvetica", 10, "bold")).pack(anchor=W)
+        vehicle_var = tk.StringVar()
+        vehicle_cb = tb.Combobox(input_frame, textvariable=vehicle_var)
         vehicle_cb.pack(fill=X, pady=(5, 15))
-        vehicle_cb.bind("<<ComboboxSelected>>", update_cost_summary)
+        vehicle_picker = Typeahead(
+            vehicle_cb, vehicle_var, runner=self.tasks, on_select=update_cost_summary,
+            key_of=lambda g: (g.make, g.model, g.year, g.daily_rate),
+            lookup=lambda text: self.service.get_available_groups(*period['range'], text, limit=PICKER_LIMIT),
+            label_of=lambda g: f"{g.make} {g.model} ({g.year}) - ₱{g.daily_rate:.2f}/day [{g.available} available]",
+        )
+        vehicle_picker.refresh()
 
         # 3. Rental Period (Start & End)
         tb.Label(input_frame, text="3. Rental Period", font=("Helvetica", 10, "bold")).pack(anchor=W)
@@ -869,54 +1077,63 @@ class CarRentalApp(tb.Window):
 
         # Bindings for real-time updates
         for de in [rental_date_de, return_date_de]:
-            de.entry.bind("<FocusOut>", update_cost_summary)
-            de.entry.bind("<Return>", update_cost_summary)
-            de.entry.bind("<<DateEntrySelected>>", update_cost_summary)
+            de.entry.bind("<FocusOut>", period_changed)
+            de.entry.bind("<Return>", period_changed)
+            de.entry.bind("<<DateEntrySelected>>", period_changed)
 
-        tb.Label(input_frame, text="Tip: Cost is calculated based on days * rate.", font=("Helvetica", 8), bootstyle="info").pack(anchor=W)
+        tb.Label(input_frame, text="Tip: Cost is calculated based on days * rate. Only units free for the whole period are listed.", font=("Helvetica", 8), bootstyle="info").pack(anchor=W)
 
         def process():
-            if not customer_cb.get() or not vehicle_cb.get():
-                messagebox.showwarning("Incomplete Form", "Please select BOTH a customer and a vehicle.")
+            customer = customer_picker.selected
+            group = vehicle_picker.selected
+            if customer is None or group is None:
+                messagebox.showwarning("Incomplete Form", "Please select BOTH a customer and a vehicle from the lists.")
                 return
-            
+
             try:
-                c_selection = customer_cb.get()
-                v_selection = vehicle_cb.get()
-                
-                c_id = int(c_selection.split(":")[0])
-                
-                # Get first available vehicle from the group
-                group = display_to_group.get(v_selection)
-                if not group:
-                    messagebox.showerror("Selection Error", "Invalid vehicle selection.")
-                    return
-                
-                v_id = group[0].id
-                
-                start_date = rental_date_de.entry.get()
-                ret_date = return_date_de.entry.get()
-                
-                # IMPORTANT: I need to update the service method to accept start_date.
-                # For this step, I'll update the call, and in the next step I'll update the service.
-                rental, msg = self.service.create_rental(c_id, v_id, ret_date, start_date)
+                start_date, end_date = read_period()
+            except ValueError:
+                messagebox.showerror("Input Error", "Please enter the dates as YYYY-MM-DD.")
+                return
+
+            def book():
+                # Ask for the first free unit; if another desk takes it first the service books the next one
+                free = [v for v in self.service.get_free_vehicles(start_date, end_date, group.make, group.model, group.year)
+                        if v.daily_rate == group.daily_rate]
+                if not free:
+                    return None, "No unit of that model is free for the whole period any more."
+                return self.service.create_rental(customer.id, free[0].id, end_date.isoformat(), start_date.isoformat())
+
+            def booked(result):
+                rental, msg = result
                 if rental:
-                    messagebox.showinfo("Rental Confirmed", f"Rental successful!\nTotal: ₱{rental.total_cost:.2f}")
+                    note = "" if msg == "Success" else f"\n\n{msg}"
+                    messagebox.showinfo("Rental Confirmed", f"Rental successful!\nTotal: ₱{rental.total_cost:.2f}{note}")
                     dialog.destroy()
                     self.refresh_rental_list()
                 else:
+                    confirm_btn.configure(state="normal")
                     messagebox.showerror("Error", msg)
-            except Exception as e:
+                    vehicle_picker.refresh()
+
+            def failed(e):
+                confirm_btn.configure(state="normal")
                 messagebox.showerror("Input Error", f"Something went wrong: {str(e)}")
 
-        tb.Button(main_form, text="✨ Finalize & Confirm Rental", command=process, bootstyle="success", padding=15).pack(pady=30, fill=X)
+            confirm_btn.configure(state="disabled")
+            self.tasks.submit(book, on_done=booked, on_error=failed, view_bound=False)
+
+        confirm_btn = tb.Button(main_form, text="✨ Finalize & Confirm Rental", command=process, bootstyle="success", padding=15)
+        confirm_btn.pack(pady=30, fill=X)
         
         # Initial summary update hint
         update_cost_summary()
 
     def show_reports(self):
-        self.clear_content()
-        main_frame = tb.Frame(self.content_area, padding=20)
+        view = self.open_view('reports')
+        if view is None:
+            return
+        main_frame = tb.Frame(view, padding=20)
         main_frame.pack(fill=BOTH, expand=YES)
 
         header_frame = tb.Frame(main_frame)
@@ -934,41 +1151,186 @@ class CarRentalApp(tb.Window):
         stats_frame = tb.Frame(main_frame)
         stats_frame.pack(fill=X, pady=20)
 
-        rentals = self.service.get_all_rentals()
-        total_revenue = sum(r.total_cost for r in rentals if r.status == 'Completed')
-        active_revenue = sum(r.total_cost for r in rentals if r.status == 'Active')
-
-        self.create_stat_card(stats_frame, "Total Revenue", f"₱{total_revenue:.2f}", "success", 0)
-        self.create_stat_card(stats_frame, "Active Revenue", f"₱{active_revenue:.2f}", "warning", 1)
+        total_label = self.create_stat_card(stats_frame, "Total Revenue", "…", "success", 0)
+        active_label = self.create_stat_card(stats_frame, "Active Revenue", "…", "warning", 1)
+
+        def fill_revenue(revenue):
+            total_label.config(text=f"₱{revenue.get('Completed', 0.0):.2f}")
+            active_label.config(text=f"₱{revenue.get('Active', 0.0):.2f}")
+
+        def refresh_revenue():
+            self.tasks.submit(
+                self.service.get_revenue_summary, key="revenue_summary", on_done=fill_revenue,
+                on_error=lambda e: messagebox.showerror("Error", f"Could not load revenue: {str(e)}")
+            )
+
+        # Revenue Breakdown (read from the revenue rollup)
+        breakdown_frame = tb.Frame(main_frame)
+        breakdown_frame.pack(fill=X, pady=(20, 0))
+        tb.Label(breakdown_frame, text="Revenue Breakdown", font=("Helvetica", 16, "bold"), bootstyle="secondary").pack(side=LEFT)
+
+        periods = {"By Month": 'month', "By Day": 'day', "By Model": 'model'}
+        period_cb = tb.Combobox(breakdown_frame, values=list(periods), state="readonly", width=15)
+        period_cb.set("By Month")
+        period_cb.pack(side=RIGHT)
+
+        columns = ("Period", "Rentals", "Completed Revenue", "Active Revenue")
+        breakdown_tree, _ = self.create_scrolled_tree(main_frame, columns=columns)
+        breakdown_tree.heading("Period", text="Period", anchor=W)
+        breakdown_tree.column("Period", anchor=W, width=250)
+        for col, anch in (("Rentals", CENTER), ("Completed Revenue", E), ("Active Revenue", E)):
+            breakdown_tree.heading(col, text=col, anchor=anch)
+            breakdown_tree.column(col, anchor=anch, width=150)
+
+        def fill_breakdown(period, rows):
+            breakdown_tree.heading("Period", text="Model" if period == 'model' else "Period")
+            items = []
+            for row in rows:
+                label = self.format_date(row.label) if period == 'day' else row.label
+                items.append((f"{period}|{row.label}", (label, row.rentals, f"₱{row.completed:.2f}", f"₱{row.active:.2f}")))
+            sync_tree(breakdown_tree, items)
+
+        def refresh_breakdown(*args):
+            # A newer selection made while this one loads supersedes it
+            period = periods[period_cb.get()]
+            self.tasks.submit(
+                self.service.get_revenue_breakdown, period,
+                key="revenue_breakdown", on_done=lambda rows: fill_breakdown(period, rows),
+                on_error=lambda e: messagebox.showerror("Error", f"Could not load revenue breakdown: {str(e)}")
+            )
+
+        def refresh_reports():
+            refresh_revenue()
+            refresh_breakdown()
+
+        period_cb.bind("<<ComboboxSelected>>", refresh_breakdown)
+        self.view_refresh['reports'] = refresh_reports
+        refresh_reports()
 
     def export_csv(self, type):
-        import pandas as pd
         from tkinter import filedialog
-        
-        try:
-            if type == 'rentals':
-                data = self.service.get_all_rentals()
-                df = pd.DataFrame([{
-                    "Customer": r.customer.name, 
-                    "Vehicle": f"{r.vehicle.make} {r.vehicle.model}", 
-                    "Date": r.rental_date, "Return Date": r.return_date, 
-                    "Cost": r.total_cost, "Status": r.status
-                } for r in data])
+
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
+        if not file_path:
+            return
+
+        # The export streams on a worker thread; this dialog polls its progress
+        dialog = tb.Toplevel(title="Exporting CSV")
+        dialog.geometry("400x160")
+        dialog_frame = tb.Frame(dialog, padding=20)
+        dialog_frame.pack(fill=BOTH, expand=YES)
+
+        status_label = tb.Label(dialog_frame, text="Preparing export...")
+        status_label.pack(anchor=W)
+        progress_bar = tb.Progressbar(dialog_frame, maximum=1, bootstyle="info-striped")
+        progress_bar.pack(fill=X, pady=10)
+
+        cancel = threading.Event()
+        state = {'written': 0, 'total': 0, 'done': False}
+        tb.Button(dialog_frame, text="Cancel", command=cancel.set, bootstyle="danger-outline").pack(anchor=E)
+        dialog.protocol("WM_DELETE_WINDOW", cancel.set)
+
+        def on_progress(written, total):
+            state['written'], state['total'] = written, total
+
+        def finished(result):
+            state['done'] = True
+            dialog.destroy()
+            if result is None:
+                messagebox.showinfo("Cancelled", "Export cancelled.")
             else:
-                data = self.service.get_all_vehicles()
-                df = pd.DataFrame([{
-                    "Brand": v.make, "Model": v.model, 
-                    "Year": v.year, "Registration": v.registration, 
-                    "Status": v.status, "Rate": v.daily_rate
-                } for v in data])
-
-            file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
-            if file_path:
-                df.to_csv(file_path, index=False)
                 messagebox.showinfo("Success", f"Report exported to {file_path}")
-        except Exception as e:
+
+        def failed(e):
+            state['done'] = True
+            dialog.destroy()
             messagebox.showerror("Error", f"Export failed: {str(e)}")
 
+        def poll():
+            if state['done']:
+                return
+            if state['total']:
+                progress_bar.configure(maximum=state['total'], value=state['written'])
+                status_label.config(text=f"Exported {state['written']:,} of {state['total']:,} rows...")
+            dialog.after(100, poll)
+
+        self.tasks.submit(
+            self.service.export_csv, type, file_path, progress=on_progress, cancel=cancel,
+            on_done=finished, on_error=failed, view_bound=False
+        )
+        poll()
+
+    def show_diagnostics(self):
+        view = self.open_view('diagnostics')
+        if view is None:
+            return
+        main_frame = tb.Frame(view, padding=20)
+        main_frame.pack(fill=BOTH, expand=YES)
+
+        header_frame = tb.Frame(main_frame)
+        header_frame.pack(fill=X, pady=(0, 20))
+        tb.Label(header_frame, text="Diagnostics", font=("Helvetica", 24, "bold"), bootstyle="primary").pack(side=LEFT)
+
+        btn_frame = tb.Frame(header_frame)
+        btn_frame.pack(side=RIGHT)
+
+        cache_label = tb.Label(main_frame, text="", bootstyle="secondary")
+        cache_label.pack(anchor=W)
+
+        columns = ("Method", "Calls", "Errors", "Rollbacks", "Avg ms", "p95 ms", "Max ms", "SQL / call", "Returned", "Written")
+        tree, _ = self.create_scrolled_tree(main_frame, columns=columns)
+        tree.heading("Method", text="Method", anchor=W)
+        tree.column("Method", anchor=W, width=220)
+        for col in columns[1:]:
+            tree.heading(col, text=col, anchor=E)
+            tree.column(col, anchor=E, width=80)
+
+        startup_label = tb.Label(main_frame, text="", bootstyle="secondary")
+        startup_label.pack(anchor=W)
+
+        def show(stats):
+            methods, cache = stats
+            sync_tree(tree, [(row['method'], (
+                row['method'], row['calls'], row['errors'], row['rollbacks'],
+                f"{row['avg_ms']:.1f}", f"{row['p95_ms']:.0f}", f"{row['max_ms']:.1f}",
+                f"{row['statements_per_call']:.1f}", row['items_returned'], row['rows_affected'],
+            )) for row in methods])
+            cache_label.config(text=f"Read cache: {cache['hits']} hits, {cache['misses']} misses "
+                                    f"({cache['hit_rate']:.0%}), {cache['size']}/{cache['maxsize']} entries")
+
+        def refresh():
+            startup_label.config(text="Start-up: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in startup.phases()))
+            # The service's statistics: the API server's when the app is connected to one
+            self.tasks.submit(lambda: (self.service.query_stats(), self.service.cache_stats()), on_done=show,
+                              key="diagnostics",
+                              on_error=lambda e: messagebox.showerror("Error", f"Could not load statistics: {str(e)}"))
+
+        def dump():
+            from tkinter import filedialog
+
+            file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON files", "*.json")])
+            if not file_path:
+                return
+
+            def save():
+                stats = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'methods': self.service.query_stats()}
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    json.dump(stats, f, indent=2)
+
+            self.tasks.submit(save, on_done=lambda _: messagebox.showinfo("Success", f"Statistics saved to {file_path}"),
+                              on_error=lambda e: messagebox.showerror("Error", f"Could not save statistics: {str(e)}"),
+                              view_bound=False)
+
+        def reset():
+            self.tasks.submit(self.service.reset_query_stats, on_done=lambda _: refresh(),
+                              on_error=lambda e: messagebox.showerror("Error", f"Could not reset statistics: {str(e)}"))
+
+        tb.Button(btn_frame, text="Refresh", command=refresh, bootstyle="info").pack(side=LEFT, padx=5)
+        tb.Button(btn_frame, text="Save as JSON", command=dump, bootstyle="info").pack(side=LEFT, padx=5)
+        tb.Button(btn_frame, text="Reset", command=reset, bootstyle="danger-outline").pack(side=LEFT, padx=5)
+        self.view_refresh['diagnostics'] = refresh
+        refresh()
+
     def delete_vehicle(self):
         selected = self.vehicle_tree.selection()
         if not selected:
@@ -984,27 +1346,30 @@ class CarRentalApp(tb.Window):
             make, model, year_str = values[0], values[1], values[2]
             confirm_msg = f"Delete ALL vehicles in group '{make} {model} ({year_str})'?\nOnly Available vehicles will be removed."
             if messagebox.askyesno("Confirm Group Delete", confirm_msg):
-                try:
-                    count = self.service.delete_vehicle_group(make, model, int(year_str))
+                def deleted(count):
                     self.refresh_vehicle_list()
                     messagebox.showinfo("Success", f"{count} vehicle(s) deleted from group.")
-                except ValueError as e:
-                    messagebox.showerror("Restriction", str(e))
-                except Exception as e:
-                    messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
+
+                self.tasks.submit(self.service.delete_vehicle_group, make, model, int(year_str),
+                                  on_done=deleted, on_error=self.show_action_error, view_bound=False)
         else:
             v_id = int(sel_id)
             if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this vehicle?"):
-                try:
-                    if self.service.delete_vehicle(v_id):
+                def deleted(ok):
+                    if ok:
                         self.refresh_vehicle_list()
                         messagebox.showinfo("Success", "Vehicle deleted.")
                     else:
                         messagebox.showwarning("Not Found", "Vehicle could not be found.")
-                except ValueError as e:
-                    messagebox.showerror("Restriction", str(e))
-                except Exception as e:
-                    messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
+
+                self.tasks.submit(self.service.delete_vehicle, v_id,
+                                  on_done=deleted, on_error=self.show_action_error, view_bound=False)
+
+    def show_action_error(self, e):
+        if isinstance(e, ValueError):
+            messagebox.showerror("Restriction", str(e))
+        else:
+            messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
 
     def delete_customer(self):
         selected = self.customer_tree.selection()
@@ -1014,16 +1379,15 @@ class CarRentalApp(tb.Window):
             
         c_id = int(selected[0])
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this customer?"):
-            try:
-                if self.service.delete_customer(c_id):
+            def deleted(ok):
+                if ok:
                     self.refresh_customer_list()
                     messagebox.showinfo("Success", "Customer deleted")
                 else:
                     messagebox.showwarning("Not Found", "Customer could not be found.")
-            except ValueError as e:
-                messagebox.showerror("Restriction", str(e))
-            except Exception as e:
-                messagebox.showerror("Error", f"An unexpected error occurred: {str(e)}")
+
+            self.tasks.submit(self.service.delete_customer, c_id,
+                              on_done=deleted, on_error=self.show_action_error, view_bound=False)
 
     def complete_rental(self):
         selected = self.rental_tree.selection()
@@ -1033,14 +1397,17 @@ class CarRentalApp(tb.Window):
             
         r_id = int(selected[0])
         if messagebox.askyesno("Confirm Complete", "Mark this rental as completed?"):
-            try:
-                if self.service.complete_rental(r_id):
+            def completed(ok):
+                if ok:
                     self.refresh_rental_list()
                     messagebox.showinfo("Success", "Rental completed and vehicle returned to Available")
                 else:
                     messagebox.showwarning("Warning", "Rental could not be updated. It might already be completed.")
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to complete rental: {str(e)}")
+
+            self.tasks.submit(
+                self.service.complete_rental, r_id, on_done=completed, view_bound=False,
+                on_error=lambda e: messagebox.showerror("Error", f"Failed to complete rental: {str(e)}")
+            )
 
 if __name__ == "__main__":
     app = CarRentalApp()
@@ -0,0 +1,28 @@
+"""Maintenance commands for the car rental database.
+
+    python manage.py init-db
+    python manage.py rebuild-revenue
+"""
+import argparse
+
+from models import init_db
+from services import CarRentalService
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('init-db', help='create tables, apply migrations and seed the admin user')
+    commands.add_parser('rebuild-revenue', help='backfill the revenue rollup from the rentals table')
+    args = parser.parse_args(argv)
+
+    init_db()
+    if args.command == 'init-db':
+        print("Database initialized.")
+    elif args.command == 'rebuild-revenue':
+        rows = CarRentalService().rebuild_revenue_rollup()
+        print(f"Revenue rollup rebuilt: {rows} row(s).")
+
+
+if __name__ == '__main__':
+    main()
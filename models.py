@@ -1,8 +1,10 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, ForeignKey, DateTime, Date
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Index, select, func, table, column, and_, or_
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
 import datetime
 
+from database import create_db_engine
+
 Base = declarative_base()
 
 class User(Base):
@@ -20,6 +22,10 @@ class Customer(Base):
     license_details = Column(String, nullable=False)
     rentals = relationship("Rental", back_populates="customer")
 
+    __table_args__ = (
+        Index('ix_customers_name_contact', 'name', 'contact'),
+    )
+
 class Vehicle(Base):
     __tablename__ = 'vehicles'
     id = Column(Integer, primary_key=True)
@@ -31,6 +37,17 @@ class Vehicle(Base):
     daily_rate = Column(Float, nullable=False)
     rentals = relationship("Rental", back_populates="vehicle")
 
+    __table_args__ = (
+        Index('ix_vehicles_status', 'status'),
+        Index('ix_vehicles_group', 'make', 'model', 'year'),
+    )
+
+class RegistrationSequence(Base):
+    """Next free numeric suffix for auto-generated plates ("PREFIX-<n>")."""
+    __tablename__ = 'registration_sequences'
+    prefix = Column(String, primary_key=True)
+    next_value = Column(Integer, nullable=False, default=1)
+
 class Rental(Base):
     __tablename__ = 'rentals'
     id = Column(Integer, primary_key=True)
@@ -44,15 +61,196 @@ class Rental(Base):
     customer = relationship("Customer", back_populates="rentals")
     vehicle = relationship("Vehicle", back_populates="rentals")
 
-# Database Setup
-engine = create_engine('sqlite:///car_rental.db')
+    __table_args__ = (
+        Index('ix_rentals_status', 'status'),
+        Index('ix_rentals_customer_status', 'customer_id', 'status'),
+        Index('ix_rentals_vehicle_period', 'vehicle_id', 'status', 'rental_date'),
+    )
+
+class RevenueRollup(Base):
+    """Rental count and revenue per day (rental start date), vehicle group and rental status."""
+    __tablename__ = 'revenue_rollup'
+    day = Column(Date, primary_key=True)
+    make = Column(String, primary_key=True)
+    model = Column(String, primary_key=True)
+    year = Column(Integer, primary_key=True)
+    status = Column(String, primary_key=True)
+    rental_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        Index('ix_revenue_rollup_group', 'make', 'model', 'year'),
+    )
+
+def rebuild_revenue_rollup(connection, groups=None):
+    """Recompute revenue_rollup from the rentals table. Returns the number of rollup rows written.
+
+    With `groups`, a list of (make, model, year), only the rows of those groups
+    are recomputed, e.g. after vehicles moved from one group to another.
+    """
+    rollup = RevenueRollup.__table__
+    delete = rollup.delete()
+    rentals = select(
+        Rental.rental_date, Vehicle.make, Vehicle.model, Vehicle.year, Rental.status,
+        func.count(Rental.id), func.sum(Rental.total_cost)
+    ).join(Vehicle, Vehicle.id == Rental.vehicle_id).group_by(
+        Rental.rental_date, Vehicle.make, Vehicle.model, Vehicle.year, Rental.status
+    )
+    if groups is not None:
+        delete = delete.where(or_(*(
+            and_(rollup.c.make == make, rollup.c.model == model, rollup.c.year == year) for make, model, year in groups
+        )))
+        rentals = rentals.where(or_(*(
+            and_(Vehicle.make == make, Vehicle.model == model, Vehicle.year == year) for make, model, year in groups
+        )))
+    connection.execute(delete)
+    return connection.execute(rollup.insert().from_select(
+        ['day', 'make', 'model', 'year', 'status', 'rental_count', 'revenue'], rentals
+    )).rowcount
+
+# Customer full-text search: an FTS5 index over the customers table, kept in
+# step by triggers so every writer (service, bulk loads, SQL shell) updates it
+customers_fts = table('customers_fts', column('rowid'), column('rank'), column('customers_fts'))
+
+CUSTOMER_SEARCH_DDL = [
+    # External content: the index stores tokens only and reads rows from customers.
+    # prefix= also indexes 2- and 3-character prefixes, so short queries like "an*" stay cheap.
+    """CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5(
+        name, contact, license_details,
+        content='customers', content_rowid='id', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS customers_fts_insert AFTER INSERT ON customers BEGIN
+        INSERT INTO customers_fts(rowid, name, contact, license_details)
+        VALUES (new.id, new.name, new.contact, new.license_details);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS customers_fts_delete AFTER DELETE ON customers BEGIN
+        INSERT INTO customers_fts(customers_fts, rowid, name, contact, license_details)
+        VALUES ('delete', old.id, old.name, old.contact, old.license_details);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS customers_fts_update AFTER UPDATE ON customers BEGIN
+        INSERT INTO customers_fts(customers_fts, rowid, name, contact, license_details)
+        VALUES ('delete', old.id, old.name, old.contact, old.license_details);
+        INSERT INTO customers_fts(rowid, name, contact, license_details)
+        VALUES (new.id, new.name, new.contact, new.license_details);
+    END""",
+    # Rank name matches above contact and license matches
+    "INSERT INTO customers_fts(customers_fts, rank) VALUES ('rank', 'bm25(10.0, 2.0, 2.0)')",
+]
+
+def create_customer_search(connection):
+    """Create the customer full-text index and its triggers, and index the existing customers."""
+    for statement in CUSTOMER_SEARCH_DDL:
+        connection.exec_driver_sql(statement)
+    connection.exec_driver_sql("INSERT INTO customers_fts(customers_fts) VALUES ('rebuild')")
+
+# Rental search: one pre-joined row per rental (customer name, "Make Model",
+# status) in an FTS5 table whose rowid is the rental id. Triggers keep it in
+# step with rentals and with renamed customers and vehicles.
+rental_search = table('rental_search', column('rowid'), column('rental_search'))
+
+_RENTAL_SEARCH_VALUES = """(SELECT name FROM customers WHERE id = new.customer_id),
+        (SELECT make || ' ' || model FROM vehicles WHERE id = new.vehicle_id),
+        new.status"""
+
+RENTAL_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS rental_search USING fts5(customer_name, vehicle_label, status, prefix='2 3')",
+    f"""CREATE TRIGGER IF NOT EXISTS rental_search_insert AFTER INSERT ON rentals BEGIN
+        INSERT INTO rental_search(rowid, customer_name, vehicle_label, status)
+        VALUES (new.id, {_RENTAL_SEARCH_VALUES});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS rental_search_update AFTER UPDATE OF customer_id, vehicle_id, status ON rentals
+    WHEN new.customer_id IS NOT old.customer_id OR new.vehicle_id IS NOT old.vehicle_id OR new.status IS NOT old.status BEGIN
+        DELETE FROM rental_search WHERE rowid = old.id;
+        INSERT INTO rental_search(rowid, customer_name, vehicle_label, status)
+        VALUES (new.id, {_RENTAL_SEARCH_VALUES});
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS rental_search_delete AFTER DELETE ON rentals BEGIN
+        DELETE FROM rental_search WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS rental_search_customer AFTER UPDATE OF name ON customers
+    WHEN new.name IS NOT old.name BEGIN
+        UPDATE rental_search SET customer_name = new.name
+        WHERE rowid IN (SELECT id FROM rentals WHERE customer_id = new.id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS rental_search_vehicle AFTER UPDATE OF make, model ON vehicles
+    WHEN new.make IS NOT old.make OR new.model IS NOT old.model BEGIN
+        UPDATE rental_search SET vehicle_label = new.make || ' ' || new.model
+        WHERE rowid IN (SELECT id FROM rentals WHERE vehicle_id = new.id);
+    END""",
+]
+
+def create_rental_search(connection):
+    """Create the rental search table and its triggers, and fill it from rental history."""
+    for statement in RENTAL_SEARCH_DDL:
+        connection.exec_driver_sql(statement)
+    connection.exec_driver_sql("DELETE FROM rental_search")
+    connection.exec_driver_sql("""
+        INSERT INTO rental_search(rowid, customer_name, vehicle_label, status)
+        SELECT rentals.id, customers.name, vehicles.make || ' ' || vehicles.model, rentals.status
+        FROM rentals
+        LEFT JOIN customers ON customers.id = rentals.customer_id
+        LEFT JOIN vehicles ON vehicles.id = rentals.vehicle_id
+    """)
+
+# Database Setup (URL, pool and SQLite pragmas come from database.py settings)
+engine = create_db_engine()
 Session = sessionmaker(bind=engine, expire_on_commit=False)
 
-def init_db():
-    Base.metadata.create_all(engine)
+# Schema Migrations
+# Each step upgrades an existing database by one version. The version number is
+# kept in SQLite's PRAGMA user_version, so a step runs at most once per file.
+def _create_named_indexes(connection, table, *names):
+    for index in table.indexes:
+        if index.name in names:
+            index.create(connection, checkfirst=True)
+
+def _add_service_indexes(connection):
+    _create_named_indexes(connection, Customer.__table__, 'ix_customers_name_contact')
+    _create_named_indexes(connection, Vehicle.__table__, 'ix_vehicles_status', 'ix_vehicles_group')
+    _create_named_indexes(connection, Rental.__table__, 'ix_rentals_status', 'ix_rentals_customer_status')
+    # No longer declared on Rental: migration 3 replaces it
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_rentals_vehicle_status ON rentals (vehicle_id, status)"
+    )
+
+def _add_booking_period_index(connection):
+    _create_named_indexes(connection, Rental.__table__, 'ix_rentals_vehicle_period')
+    # (vehicle_id, status) is a prefix of the new index, which serves its lookups
+    connection.exec_driver_sql("DROP INDEX IF EXISTS ix_rentals_vehicle_status")
+
+def _add_revenue_rollup_group_index(connection):
+    _create_named_indexes(connection, RevenueRollup.__table__, 'ix_revenue_rollup_group')
+
+MIGRATIONS = [
+    _add_service_indexes,  # 1: index set for the service queries
+    rebuild_revenue_rollup,  # 2: backfill the revenue rollup from rental history
+    _add_booking_period_index,  # 3: booking-period index for reservation checks, replacing (vehicle_id, status)
+    create_customer_search,  # 4: FTS5 index for customer lookup
+    create_rental_search,  # 5: pre-joined search table for the rentals list
+    _add_revenue_rollup_group_index,  # 6: group index on the revenue rollup (re-keyed when groups are renamed)
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def migrate_db(bind=None):
+    """Apply pending migrations and refresh the query planner statistics."""
+    with (bind or engine).begin() as connection:
+        version = connection.exec_driver_sql("PRAGMA user_version").scalar()
+        if version >= SCHEMA_VERSION:
+            return version
+        for step in MIGRATIONS[version:]:
+            step(connection)
+        connection.exec_driver_sql("ANALYZE")
+        connection.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return SCHEMA_VERSION
+
+def init_db(bind=None):
+    bind = bind or engine
+    Base.metadata.create_all(bind)
+    migrate_db(bind)
     
     # Add a default admin user if not exists
-    session = Session()
+    session = Session(bind=bind)
     if not session.query(User).filter_by(username='admin').first():
         admin = User(username='admin', password='password', role='admin')
         session.add(admin)
@@ -0,0 +1,52 @@
+"""Compact row types returned by the service's list queries.
+
+These are plain named tuples built straight from the selected columns: no
+instance state, identity map entry or relationship collections, so they cost
+a fraction of an ORM object to load and keep around. They are read-only
+snapshots, safe to share through the read cache; use the service's write
+methods (``update_vehicle`` etc.) to change a record.
+"""
+import datetime
+from typing import NamedTuple, Optional
+
+
+class VehicleRow(NamedTuple):
+    id: int
+    make: str
+    model: str
+    year: int
+    registration: str
+    status: str
+    daily_rate: float
+
+
+class CustomerRow(NamedTuple):
+    id: int
+    name: str
+    contact: str
+    license_details: str
+
+
+class RentalRow(NamedTuple):
+    id: int
+    customer_name: str
+    vehicle_label: str  # "Make Model"
+    rental_date: Optional[datetime.date]
+    return_date: Optional[datetime.date]
+    total_cost: float
+    status: str
+
+
+class StockRow(NamedTuple):
+    make: str
+    model: str
+    total: int
+    available: int
+
+
+class GroupRow(NamedTuple):
+    make: str
+    model: str
+    year: int
+    daily_rate: float
+    available: int
@@ -0,0 +1,71 @@
+import bisect
+import datetime
+
+# Bookings are half-open date intervals [rental_date, return_date): a car
+# returned on the 10th can be picked up again on the 10th.
+OPEN_ENDED = datetime.date.max
+
+
+def booking_end(return_date, today=None):
+    """Last day (exclusive) a booking holds its car.
+
+    An Active rental whose return date has passed is overdue: the car is still
+    out, so the booking holds it until the rental is completed.
+    """
+    today = today or datetime.date.today()
+    if return_date is None or return_date < today:
+        return OPEN_ENDED
+    return return_date
+
+
+class ReservationIndex:
+    """Per-vehicle interval index over open bookings.
+
+    Each vehicle keeps its booked periods as sorted, non-overlapping intervals
+    in two parallel lists (starts and ends), so "is this unit free from D1 to
+    D2" is one binary search: only the last interval starting before D2 can
+    reach past D1.
+    """
+
+    def __init__(self):
+        self._starts = {}
+        self._ends = {}
+
+    @classmethod
+    def from_bookings(cls, bookings, today=None):
+        """Build from ``(vehicle_id, rental_date, return_date)`` rows of Active rentals."""
+        index = cls()
+        for vehicle_id, start, end in sorted(bookings, key=lambda b: (b[0], b[1])):
+            index.add(vehicle_id, start, booking_end(end, today))
+        return index
+
+    def __len__(self):
+        return sum(len(starts) for starts in self._starts.values())
+
+    def add(self, vehicle_id, start, end):
+        """Book ``vehicle_id`` for [start, end), merging with touching bookings."""
+        starts = self._starts.setdefault(vehicle_id, [])
+        ends = self._ends.setdefault(vehicle_id, [])
+        lo = bisect.bisect_left(ends, start)
+        hi = bisect.bisect_right(starts, end)
+        if lo < hi:
+            # Absorb every interval that overlaps or touches the new one
+            start = min(start, starts[lo])
+            end = max(end, ends[hi - 1])
+        starts[lo:hi] = [start]
+        ends[lo:hi] = [end]
+
+    def is_free(self, vehicle_id, start, end):
+        starts = self._starts.get(vehicle_id)
+        if not starts:
+            return True
+        i = bisect.bisect_left(starts, end)
+        return i == 0 or self._ends[vehicle_id][i - 1] <= start
+
+    def bookings(self, vehicle_id):
+        """Booked periods of ``vehicle_id`` as ``(start, end)`` pairs in date order."""
+        return list(zip(self._starts.get(vehicle_id, ()), self._ends.get(vehicle_id, ())))
+
+    def intervals(self):
+        """Every booked period as ``(vehicle_id, start, end)``, by vehicle then date."""
+        return [(vehicle_id, start, end) for vehicle_id in sorted(self._starts) for start, end in self.bookings(vehicle_id)]
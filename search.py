@@ -0,0 +1,126 @@
+import bisect
+import re
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric search tokens."""
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+class PrefixIndex:
+    """Sorted token index that answers substring lookups with a binary search.
+
+    Every row is indexed under each suffix of each token of ``text_of(row)``, so
+    a prefix lookup in the index finds tokens containing the query anywhere. A
+    query matches a row when every query token occurs inside one of the row's
+    tokens: "toy vi" and "yota" find "Toyota Vios", "abc-12" and "23-4" find
+    plate "ABC-123-4".
+    """
+
+    def __init__(self, rows, key_of, text_of):
+        self.rows = {}
+        self._position = {}
+        self._row_tokens = {}
+        entries = []
+        for row in rows:
+            key = key_of(row)
+            tokens = set(tokenize(text_of(row)))
+            self.rows[key] = row
+            self._position[key] = len(self._position)
+            self._row_tokens[key] = tokens
+            suffixes = {token[i:] for token in tokens for i in range(len(token))}
+            entries.extend((suffix, self._position[key]) for suffix in suffixes)
+        entries.sort()
+        self._tokens = [token for token, _ in entries]
+        self._keys = list(self.rows)
+        self._entry_keys = [self._keys[pos] for _, pos in entries]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def lookup(self, prefix):
+        """Return the set of keys having a token that contains ``prefix``."""
+        lo = bisect.bisect_left(self._tokens, prefix)
+        hi = bisect.bisect_left(self._tokens, prefix + "\uffff", lo)
+        return set(self._entry_keys[lo:hi])
+
+    def _narrow(self, keys, prefix):
+        # Scan the candidates directly when that is cheaper than a range lookup
+        lo = bisect.bisect_left(self._tokens, prefix)
+        hi = bisect.bisect_left(self._tokens, prefix + "\uffff", lo)
+        if len(keys) < hi - lo:
+            return {k for k in keys if any(prefix in t for t in self._row_tokens[k])}
+        return keys & set(self._entry_keys[lo:hi])
+
+    def search(self, text, within=None):
+        """Return matching keys in source order, optionally restricted to ``within``."""
+        tokens = tokenize(text)
+        if not tokens:
+            return list(self._keys) if within is None else self.ordered(within)
+        result = set(within) if within is not None else self.lookup(tokens[0])
+        for token in (tokens if within is not None else tokens[1:]):
+            if not result:
+                break
+            result = self._narrow(result, token)
+        return self.ordered(result)
+
+    def ordered(self, keys):
+        return sorted(keys, key=self._position.__getitem__)
+
+
+class IncrementalSearch:
+    """Search state for one list view.
+
+    When the new query extends the previous one, the previous result can only
+    shrink, so the search narrows the last result set instead of starting over.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self._last_text = None
+        self._last_keys = None
+
+    def search(self, text):
+        text = text.lower()
+        if self._last_keys is not None and self._last_text and text.startswith(self._last_text):
+            keys = self.index.search(text, within=self._last_keys)
+        else:
+            keys = self.index.search(text)
+        self._last_text = text
+        self._last_keys = keys
+        return [self.index.rows[k] for k in keys]
+
+
+class DebouncedSearch:
+    """Run ``callback(text)`` once typing in ``variable`` pauses for ``delay_ms``.
+
+    Each keystroke cancels the pending call, so only the latest text is searched.
+    """
+
+    def __init__(self, widget, variable, callback, delay_ms=200):
+        self.widget = widget
+        self.variable = variable
+        self.callback = callback
+        self.delay_ms = delay_ms
+        self._after_id = None
+        variable.trace_add("write", self._on_write)
+        widget.bind("<Destroy>", lambda e: self.cancel(), add="+")
+
+    def _on_write(self, *args):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+        self._after_id = self.widget.after(self.delay_ms, self._fire)
+
+    def _fire(self):
+        self._after_id = None
+        self.callback(self.variable.get())
+
+    def cancel(self):
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
@@ -1,16 +1,140 @@
-from models import Session, Vehicle, Customer, Rental, User
+from models import Session, Vehicle, Customer, Rental, User, RegistrationSequence, RevenueRollup, customers_fts, rental_search
+from models import rebuild_revenue_rollup as rebuild_rollup_table
+from cache import ReadCache
+from instrumentation import instruments
+from reservations import ReservationIndex
+from read_models import VehicleRow, CustomerRow, RentalRow, StockRow, GroupRow
+from search import tokenize
+from contextlib import contextmanager
+import csv
 import datetime
+import functools
+import os
+import threading
+from sqlalchemy import func, case, cast, literal_column, or_, select, exists, update, tuple_, String
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 import sqlalchemy.orm as orm
 
 def provide_session(func):
-    """Decorator to provide a database session and handle transactions/errors."""
+    """Decorator to provide a database session and handle transactions/errors.
+
+    Inside `service.unit_of_work()` the call joins the open session and leaves
+    the commit to the unit of work; otherwise it runs in its own transaction.
+    Every call is timed and its SQL statements counted (see instrumentation.py).
+    """
+    @functools.wraps(func)
     def wrapper(self, *args, **kwargs):
-        session = Session()
+        nested = getattr(self._local, 'session', None) is not None
+        with instruments.call(func.__name__, nested=nested) as call:
+            with self.unit_of_work() as session:
+                call.result = func(self, session, *args, **kwargs)
+            return call.result
+    return wrapper
+
+def cached(*tags):
+    """Serve a read method from the service cache.
+
+    Entries are tagged with `tags`; a callable tag is called with the method's
+    arguments, e.g. `lambda vehicle_id: ('vehicle', vehicle_id)`. Calls made
+    inside a unit of work bypass the cache and read through the open session.
+    A cached value is handed to every caller, so cached readers return
+    read_models rows, never ORM instances a caller could change.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if getattr(self._local, 'session', None) is not None:
+                return func(self, *args, **kwargs)
+            key = (func.__name__, args, tuple(sorted(kwargs.items())))
+            hit, value = self.cache.get(key)
+            if hit:
+                return value
+            entry_tags = [tag(*args, **kwargs) if callable(tag) else tag for tag in tags]
+            versions = self.cache.versions(entry_tags)
+            value = func(self, *args, **kwargs)
+            if value is not None:
+                self.cache.put(key, value, entry_tags, versions)
+            return value
+        return wrapper
+    return decorator
+
+def booking_overlaps(start, end, today):
+    """Conditions for Active rentals whose booking overlaps [start, end).
+
+    Mirrors reservations.booking_end: overdue or open rentals hold the car open-ended.
+    """
+    return (
+        Rental.status == 'Active',
+        Rental.rental_date < end,
+        or_(Rental.return_date > start, Rental.return_date < today, Rental.return_date.is_(None)),
+    )
+
+def fts_prefix_query(text):
+    """FTS5 query matching every search token of `text` as a prefix, or None if there are none.
+
+    Tokens are quoted, so user input never reaches the FTS5 query syntax.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+def fetch_rows(session, row_type, statement):
+    """Run a column `statement` and wrap each result row in the named tuple `row_type`."""
+    return [row_type(*row) for row in session.execute(statement)]
+
+VEHICLE_ROW_COLUMNS = (
+    Vehicle.id, Vehicle.make, Vehicle.model, Vehicle.year,
+    Vehicle.registration, Vehicle.status, Vehicle.daily_rate,
+)
+CUSTOMER_ROW_COLUMNS = (Customer.id, Customer.name, Customer.contact, Customer.license_details)
+RENTAL_ROW_COLUMNS = (
+    Rental.id, Customer.name, Vehicle.make + ' ' + Vehicle.model,
+    Rental.rental_date, Rental.return_date, Rental.total_cost, Rental.status,
+)
+
+def split_registration(registration):
+    """Split "ABC-123-4" into ("ABC-123", 4). Plates without a numeric suffix give (registration, None)."""
+    parts = registration.split('-')
+    if len(parts) > 1 and parts[-1].isdigit():
+        return '-'.join(parts[:-1]), int(parts[-1])
+    return registration, None
+
+class CarRentalService:
+    def __init__(self, cache_size=256, cache_ttl=60.0, session_factory=None, cache=None):
+        # Each thread has its own open unit of work (if any)
+        self._local = threading.local()
+        # models.Session unless the caller binds its own engine (the API
+        # server gives its reader and writer services separate engines)
+        self.session_factory = session_factory or Session
+        # Read results are shared by all threads, and by services handed the
+        # same cache; the TTL bounds staleness from writes made outside them
+        self.cache = cache if cache is not None else ReadCache(maxsize=cache_size, ttl=cache_ttl)
+
+    @contextmanager
+    def unit_of_work(self):
+        """Run several service calls in one session and one transaction.
+
+            with service.unit_of_work():
+                service.update_vehicle_batch(...)
+                service.adjust_vehicle_stock(...)
+
+        The calls share the identity map and everything commits together when
+        the block exits; an exception rolls all of it back. Nested units of work
+        join the outermost one.
+        """
+        session = getattr(self._local, 'session', None)
+        if session is not None:
+            yield session
+            return
+
+        session = self._local.session = self.session_factory()
+        self._local.invalidated = set()
         try:
-            result = func(self, session, *args, **kwargs)
+            yield session
             session.commit()
-            return result
+            self.cache.invalidate(*self._local.invalidated)
         except IntegrityError as e:
             session.rollback()
             print(f"Integrity Error: {e}")
@@ -23,12 +147,58 @@ def provide_session(func):
             session.rollback()
             raise e
         finally:
+            self._local.session = None
+            self._local.invalidated = None
             session.close()
-    return wrapper
 
-class CarRentalService:
-    def __init__(self):
-        pass
+    def _invalidate(self, *tags):
+        """Drop cached reads carrying `tags` once the current unit of work commits."""
+        self._local.invalidated.update(tags)
+
+    def cache_stats(self):
+        """Hit/miss counters and size of the read cache."""
+        return self.cache.stats()
+
+    def query_stats(self):
+        """Per-method call, latency and statement statistics (slowest total time first)."""
+        return instruments.snapshot()
+
+    def reset_query_stats(self):
+        """Clear the per-method statistics."""
+        instruments.reset()
+
+    # --- Registration Sequences ---
+    def _allocate_registrations(self, session, prefix, count):
+        """Reserve `count` consecutive suffixes for `prefix` and return the first one.
+
+        The increment is a single UPDATE, so it runs under SQLite's write lock and
+        two desks growing the same group can never be handed the same suffix.
+        """
+        seq = RegistrationSequence.__table__
+        bump = seq.update().where(seq.c.prefix == prefix).values(next_value=seq.c.next_value + count)
+        if session.execute(bump).rowcount == 0:
+            # First allocation for this prefix: seed it from the plates already in use
+            session.execute(sqlite_insert(seq).values(
+                prefix=prefix, next_value=self._highest_suffix(session, prefix) + 1
+            ).on_conflict_do_nothing())
+            session.execute(bump)
+        next_value = session.execute(select(seq.c.next_value).where(seq.c.prefix == prefix)).scalar()
+        return next_value - count
+
+    def _highest_suffix(self, session, prefix):
+        regs = session.query(Vehicle.registration).filter(
+            Vehicle.registration >= f"{prefix}-",
+            Vehicle.registration < f"{prefix}."
+        )
+        suffixes = [split_registration(reg) for (reg,) in regs]
+        return max((n for p, n in suffixes if p == prefix and n is not None), default=0)
+
+    def _advance_registration_sequence(self, session, prefix, suffix):
+        """Keep the sequence for `prefix` ahead of a plate added outside the allocator."""
+        seq = RegistrationSequence.__table__
+        session.execute(seq.update().where(seq.c.prefix == prefix).values(
+            next_value=func.max(seq.c.next_value, suffix + 1)
+        ))
 
     # --- Vehicle Management ---
     @provide_session
@@ -39,37 +209,121 @@ class CarRentalService:
             raise ValueError(f"A vehicle with registration '{registration}' already exists.")
         vehicle = Vehicle(make=make, model=model, year=year, registration=registration, daily_rate=daily_rate)
         session.add(vehicle)
+        self._invalidate('vehicles')
+        prefix, suffix = split_registration(registration)
+        if suffix is not None:
+            self._advance_registration_sequence(session, prefix, suffix)
         return vehicle
 
     @provide_session
     def add_vehicle_batch(self, session, make, model, year, base_registration, daily_rate, quantity):
-        created_vehicles = []
-        for i in range(1, quantity + 1):
-            # Auto-generate unique registration if batch > 1
-            reg = f"{base_registration}-{i}" if quantity > 1 else base_registration
-
-            # Check for duplicate registration before adding
-            existing = session.query(Vehicle).filter_by(registration=reg).first()
-            if existing:
-                raise ValueError(f"A vehicle with registration '{reg}' already exists. Please use a different plate number prefix.")
-
-            vehicle = Vehicle(make=make, model=model, year=year, registration=reg, daily_rate=daily_rate)
-            session.add(vehicle)
-            created_vehicles.append(vehicle)
-        return created_vehicles
+        """Insert `quantity` identical vehicles in one executemany. Returns the number added."""
+        # Auto-generate unique registration if batch > 1
+        if quantity > 1:
+            registrations = [f"{base_registration}-{i}" for i in range(1, quantity + 1)]
+            # Every generated plate shares the "base-" prefix, so one range
+            # query on the registration index finds all possible conflicts
+            taken = session.query(Vehicle.registration).filter(
+                Vehicle.registration >= f"{base_registration}-",
+                Vehicle.registration < f"{base_registration}."
+            )
+        else:
+            registrations = [base_registration]
+            taken = session.query(Vehicle.registration).filter_by(registration=base_registration)
+
+        position = {reg: i for i, reg in enumerate(registrations)}
+        conflicts = sorted((reg for (reg,) in taken if reg in position), key=position.get)
+        if conflicts:
+            shown = ", ".join(f"'{reg}'" for reg in conflicts[:10])
+            if len(conflicts) > 10:
+                shown += f" and {len(conflicts) - 10} more"
+            if len(conflicts) == 1:
+                message = f"A vehicle with registration {shown} already exists."
+            else:
+                message = f"{len(conflicts)} registrations already exist: {shown}."
+            raise ValueError(f"{message} Please use a different plate number prefix.")
+
+        session.execute(Vehicle.__table__.insert(), [
+            {'make': make, 'model': model, 'year': year, 'registration': reg, 'daily_rate': daily_rate}
+            for reg in registrations
+        ])
+        self._invalidate('vehicles')
+        if quantity > 1:
+            self._advance_registration_sequence(session, base_registration, quantity)
+        else:
+            prefix, suffix = split_registration(base_registration)
+            if suffix is not None:
+                self._advance_registration_sequence(session, prefix, suffix)
+        return len(registrations)
 
+    @cached('vehicles')
     @provide_session
     def get_all_vehicles(self, session):
-        return session.query(Vehicle).all()
+        """All vehicles as VehicleRow records, in id order."""
+        return fetch_rows(session, VehicleRow, select(*VEHICLE_ROW_COLUMNS).order_by(Vehicle.id))
+
+    @cached('vehicles')
+    @provide_session
+    def get_vehicle_rows(self, session):
+        """All vehicles as VehicleRow records, in id order (for list views)."""
+        return fetch_rows(session, VehicleRow, select(*VEHICLE_ROW_COLUMNS).order_by(Vehicle.id))
 
+    @cached('vehicles')
+    @provide_session
+    def get_fleet_summary(self, session):
+        """Return one row per (make, model, year, daily_rate) group with status counts."""
+        return session.query(
+            Vehicle.make,
+            Vehicle.model,
+            Vehicle.year,
+            Vehicle.daily_rate,
+            func.count(Vehicle.id).label('total'),
+            func.sum(case((Vehicle.status == 'Available', 1), else_=0)).label('available'),
+            func.sum(case((Vehicle.status == 'Rented', 1), else_=0)).label('rented'),
+            func.sum(case((Vehicle.status == 'Maintenance', 1), else_=0)).label('maintenance'),
+            func.min(Vehicle.registration).label('registration'),
+        ).group_by(
+            Vehicle.make, Vehicle.model, Vehicle.year, Vehicle.daily_rate
+        ).order_by(Vehicle.make, Vehicle.model).all()
+
+    @cached('vehicles', 'customers', 'rentals')
+    @provide_session
+    def get_dashboard_snapshot(self, session, recent_limit=5):
+        """Counts, per-model stock levels and the latest rentals for the dashboard."""
+        stock = fetch_rows(session, StockRow, select(
+            Vehicle.make,
+            Vehicle.model,
+            func.count(Vehicle.id),
+            func.sum(case((Vehicle.status == 'Available', 1), else_=0)),
+        ).group_by(Vehicle.make, Vehicle.model).order_by(Vehicle.make, Vehicle.model))
+
+        recent = fetch_rows(session, RentalRow, select(*RENTAL_ROW_COLUMNS).join(Rental.customer).join(Rental.vehicle)
+                            .order_by(Rental.id.desc()).limit(recent_limit))
+
+        return {
+            'total_vehicles': sum(row.total for row in stock),
+            'active_rentals': session.query(func.count(Rental.id)).filter(Rental.status == 'Active').scalar(),
+            'total_customers': session.query(func.count(Customer.id)).scalar(),
+            'stock': stock,
+            'recent_rentals': recent[::-1],
+        }
+
+    @cached('vehicle', lambda vehicle_id: ('vehicle', vehicle_id))
     @provide_session
     def get_vehicle(self, session, vehicle_id):
-        return session.get(Vehicle, vehicle_id)
+        """One vehicle as a VehicleRow, or None if there is no such vehicle."""
+        rows = fetch_rows(session, VehicleRow, select(*VEHICLE_ROW_COLUMNS).where(Vehicle.id == vehicle_id))
+        return rows[0] if rows else None
 
+    @cached('vehicles')
     @provide_session
     def get_available_vehicles(self, session):
-        return session.query(Vehicle).filter_by(status='Available').all()
+        """Available vehicles as VehicleRow records, in id order."""
+        return fetch_rows(session, VehicleRow, select(*VEHICLE_ROW_COLUMNS).where(
+            Vehicle.status == 'Available'
+        ).order_by(Vehicle.id))
 
+    @cached('vehicles')
     @provide_session
     def get_vehicle_count_by_model(self, session, make, model, year):
         return session.query(Vehicle).filter_by(make=make, model=model, year=year).count()
@@ -85,16 +339,19 @@ class CarRentalService:
             v.model = new_model
             v.year = new_year
             v.daily_rate = new_rate
+        if (old_make, old_model, old_year) != (new_make, new_model, new_year):
+            self._regroup_revenue(session, (old_make, old_model, old_year), (new_make, new_model, new_year))
+        self._invalidate('vehicles', 'vehicle')
         return len(vehicles)
 
     @provide_session
     def adjust_vehicle_stock(self, session, make, model, year, current_reg, daily_rate, target_qty):
-        # 1. Get current vehicles of this type
-        existing_vehicles = session.query(Vehicle).filter_by(make=make, model=model, year=year).all()
-        current_qty = len(existing_vehicles)
+        # 1. Count current vehicles of this type
+        current_qty = session.query(func.count(Vehicle.id)).filter_by(make=make, model=model, year=year).scalar()
 
         if target_qty == current_qty:
             return True, "No change in stock."
+        self._invalidate('vehicles', 'vehicle')
 
         if target_qty > current_qty:
             # ADD STOCK
@@ -102,62 +359,48 @@ class CarRentalService:
 
             # Determine base registration prefix:
             # Strip any trailing numeric suffix first to get a clean base
-            parts = current_reg.split('-')
-            if len(parts) > 1 and parts[-1].isdigit():
-                base_reg = '-'.join(parts[:-1])
-            else:
-                base_reg = current_reg
-
-            # Find highest existing suffix across all vehicles in this group
-            max_suffix = 0
-            for v in existing_vehicles:
-                v_parts = v.registration.split('-')
-                if len(v_parts) > 1 and v_parts[-1].isdigit():
-                    s = int(v_parts[-1])
-                    if s > max_suffix:
-                        max_suffix = s
-
-            # Also check globally all registrations that start with base_reg
-            all_regs = session.query(Vehicle.registration).filter(
-                Vehicle.registration.like(f"{base_reg}-%")
-            ).all()
-            for (reg,) in all_regs:
-                reg_parts = reg.split('-')
-                if reg_parts[-1].isdigit():
-                    s = int(reg_parts[-1])
-                    if s > max_suffix:
-                        max_suffix = s
-
-            created_count = 0
-            for i in range(needed):
-                new_suffix = max_suffix + 1 + i
-                new_reg = f"{base_reg}-{new_suffix}"
-
-                # Double check it doesn't exist
-                attempt = 0
-                while session.query(Vehicle).filter_by(registration=new_reg).first():
-                    attempt += 1
-                    new_reg = f"{base_reg}-{new_suffix}-{attempt}"
-
-                vehicle = Vehicle(make=make, model=model, year=year, registration=new_reg, daily_rate=daily_rate)
-                session.add(vehicle)
-                created_count += 1
-
-            return True, f"Added {created_count} new vehicles to fleet."
+            base_reg, _ = split_registration(current_reg)
+
+            # Reserve the suffixes from the per-prefix sequence (O(1) queries
+            # regardless of fleet size) and insert the new units in one go
+            first = self._allocate_registrations(session, base_reg, needed)
+            session.execute(Vehicle.__table__.insert(), [
+                {'make': make, 'model': model, 'year': year, 'registration': f"{base_reg}-{n}", 'daily_rate': daily_rate}
+                for n in range(first, first + needed)
+            ])
+
+            return True, f"Added {needed} new vehicles to fleet."
 
         else:
             # REMOVE STOCK
             to_remove = current_qty - target_qty
-            # Find available vehicles
-            available = [v for v in existing_vehicles if v.status == 'Available']
-
-            if len(available) < to_remove:
-                return False, f"Cannot reduce stock to {target_qty}. Only {len(available)} available for removal (others are Rented/Maintenance)."
-
-            # Remove the last added ones first (highest ID)
-            available.sort(key=lambda x: x.id, reverse=True)
-            for i in range(to_remove):
-                session.delete(available[i])
+            # Removable units are Available and have no rentals referencing
+            # them (booked, or history that must keep its vehicle)
+            removable = session.query(Vehicle.id).filter(
+                Vehicle.make == make, Vehicle.model == model, Vehicle.year == year,
+                Vehicle.status == 'Available',
+                ~exists().where(Rental.vehicle_id == Vehicle.id),
+            )
+            # One pass over the group counts why the other units are kept
+            has_rentals = exists().where(Rental.vehicle_id == Vehicle.id)
+            busy, with_history = session.query(
+                func.sum(case((Vehicle.status != 'Available', 1), else_=0)),
+                func.sum(case(((Vehicle.status == 'Available') & has_rentals, 1), else_=0)),
+            ).filter_by(make=make, model=model, year=year).one()
+            busy, with_history = busy or 0, with_history or 0
+            available = current_qty - busy - with_history
+
+            if available < to_remove:
+                reasons = []
+                if busy:
+                    reasons.append("others are Rented/Maintenance")
+                if with_history:
+                    reasons.append(f"{with_history} have rental history")
+                return False, f"Cannot reduce stock to {target_qty}. Only {available} available for removal ({'; '.join(reasons)})."
+
+            # One DELETE for the last added units (highest ID)
+            newest = removable.order_by(Vehicle.id.desc()).limit(to_remove)
+            session.query(Vehicle).filter(Vehicle.id.in_(newest.scalar_subquery())).delete(synchronize_session='fetch')
 
             return True, f"Removed {to_remove} vehicles from fleet."
 
@@ -170,10 +413,45 @@ class CarRentalService:
                 existing = session.query(Vehicle).filter_by(registration=kwargs['registration']).first()
                 if existing:
                     raise ValueError(f"Registration '{kwargs['registration']}' is already used by another vehicle.")
+                prefix, suffix = split_registration(kwargs['registration'])
+                if suffix is not None:
+                    self._advance_registration_sequence(session, prefix, suffix)
+            old_group = (vehicle.make, vehicle.model, vehicle.year)
             for key, value in kwargs.items():
                 setattr(vehicle, key, value)
+            new_group = (vehicle.make, vehicle.model, vehicle.year)
+            if new_group != old_group:
+                self._regroup_revenue(session, old_group, new_group)
+            self._invalidate('vehicles', ('vehicle', vehicle_id))
         return vehicle
 
+    @provide_session
+    def edit_vehicle(self, session, vehicle_id, make, model, year, daily_rate, target_qty, registration=None, whole_group=False):
+        """Apply the vehicle edit form in one transaction. Returns the stock message.
+
+        With `whole_group` the unit's whole group takes the new make, model,
+        year and rate; otherwise only the unit changes, plate included. Then
+        the (new) group's stock is brought to `target_qty`. If the stock cannot
+        change, ValueError is raised and nothing is saved.
+        """
+        vehicle = session.get(Vehicle, vehicle_id)
+        if vehicle is None:
+            raise ValueError("Vehicle not found.")
+        if whole_group:
+            old = (vehicle.make, vehicle.model, vehicle.year, vehicle.daily_rate)
+            if (make, model, year, daily_rate) != old:
+                self.update_vehicle_batch(*old[:3], make, model, year, daily_rate)
+            registration = vehicle.registration
+        else:
+            self.update_vehicle(vehicle_id, make=make, model=model, year=year,
+                                registration=registration, daily_rate=daily_rate)
+
+        # The stock is adjusted in the group the unit now belongs to
+        success, message = self.adjust_vehicle_stock(make, model, year, registration, daily_rate, target_qty)
+        if not success:
+            raise ValueError(message)
+        return message
+
     @provide_session
     def delete_vehicle(self, session, vehicle_id):
         # Check if vehicle has active rentals
@@ -184,22 +462,30 @@ class CarRentalService:
         vehicle = session.get(Vehicle, vehicle_id)
         if vehicle:
             session.delete(vehicle)
+            self._invalidate('vehicles', ('vehicle', vehicle_id))
             return True
         return False
 
     @provide_session
     def delete_vehicle_group(self, session, make, model, year):
-        """Delete all Available vehicles in a group. Raises if any are Rented/Maintenance."""
-        vehicles = session.query(Vehicle).filter_by(make=make, model=model, year=year).all()
-        rented = [v for v in vehicles if v.status != 'Available']
-        if rented:
-            raise ValueError(f"Cannot delete group: {len(rented)} vehicle(s) are currently Rented or in Maintenance.")
-        for v in vehicles:
-            active_rental = session.query(Rental).filter_by(vehicle_id=v.id, status='Active').first()
-            if active_rental:
-                raise ValueError(f"Cannot delete vehicle ID {v.id}: it has an active rental.")
-            session.delete(v)
-        return len(vehicles)
+        """Delete all Available vehicles in a group. Raises if any are Rented/Maintenance or have rental history."""
+        in_group = (Vehicle.make == make, Vehicle.model == model, Vehicle.year == year)
+        # One pass over the group checks every condition
+        busy, first_booked, with_history = session.query(
+            func.sum(case((Vehicle.status != 'Available', 1), else_=0)),
+            func.min(case((exists().where(Rental.vehicle_id == Vehicle.id, Rental.status == 'Active'), Vehicle.id))),
+            func.sum(case((exists().where(Rental.vehicle_id == Vehicle.id), 1), else_=0)),
+        ).filter(*in_group).one()
+        if busy:
+            raise ValueError(f"Cannot delete group: {busy} vehicle(s) are currently Rented or in Maintenance.")
+        if first_booked is not None:
+            raise ValueError(f"Cannot delete vehicle ID {first_booked}: it has an active rental.")
+        if with_history:
+            raise ValueError(f"Cannot delete group: {with_history} vehicle(s) have rental history.")
+
+        count = session.query(Vehicle).filter(*in_group, Vehicle.status == 'Available').delete(synchronize_session='fetch')
+        self._invalidate('vehicles', 'vehicle')
+        return count
 
     # --- Customer Management ---
     @provide_session
@@ -212,11 +498,37 @@ class CarRentalService:
             raise ValueError(f"A customer named '{name}' with that contact number already exists.")
         customer = Customer(name=name, contact=contact, license_details=license_details)
         session.add(customer)
+        self._invalidate('customers')
         return customer
 
+    @cached('customers')
     @provide_session
     def get_all_customers(self, session):
-        return session.query(Customer).all()
+        """All customers as CustomerRow records, in id order."""
+        return fetch_rows(session, CustomerRow, select(*CUSTOMER_ROW_COLUMNS).order_by(Customer.id))
+
+    @cached('customers')
+    @provide_session
+    def get_customer_rows(self, session):
+        """All customers as CustomerRow records, in id order (for list views)."""
+        return fetch_rows(session, CustomerRow, select(*CUSTOMER_ROW_COLUMNS).order_by(Customer.id))
+
+    @cached('customers')
+    @provide_session
+    def search_customers(self, session, query, limit=20):
+        """Customers matching every word of `query` as a prefix of their name, contact or license.
+
+        Answered from the customers_fts full-text index, best match first
+        (name matches rank highest). Returns CustomerRow records.
+        """
+        match = fts_prefix_query(query)
+        if match is None:
+            return []
+        return fetch_rows(session, CustomerRow, select(*CUSTOMER_ROW_COLUMNS)
+                          .join(customers_fts, customers_fts.c.rowid == Customer.id)
+                          .where(customers_fts.c.customers_fts.op('MATCH')(match))
+                          .order_by(customers_fts.c.rank, Customer.id)
+                          .limit(limit))
 
     @provide_session
     def delete_customer(self, session, customer_id):
@@ -228,16 +540,128 @@ class CarRentalService:
         customer = session.get(Customer, customer_id)
         if customer:
             session.delete(customer)
+            self._invalidate('customers')
             return True
         return False
 
+    # --- Reservations ---
+    def _claim_unit(self, session, vehicle, start, end, today, reassign):
+        """Atomically take a unit for [start, end). Returns its id, or None if none is free.
+
+        The overlap check and the claim are one conditional UPDATE, so the
+        check runs under SQLite's write lock: of two desks booking the same
+        unit at once, the second sees the first one's rental and claims
+        nothing. With `reassign` it takes the next free unit of the same
+        group (make, model, year and rate) instead, preferring `vehicle`.
+        """
+        unit = orm.aliased(Vehicle)
+        free = select(unit.id).where(
+            unit.status != 'Maintenance',
+            ~exists().where(Rental.vehicle_id == unit.id, *booking_overlaps(start, end, today)),
+        )
+        if reassign:
+            free = free.where(
+                unit.make == vehicle.make, unit.model == vehicle.model,
+                unit.year == vehicle.year, unit.daily_rate == vehicle.daily_rate,
+            ).order_by((unit.id == vehicle.id).desc(), unit.id)
+        else:
+            free = free.where(unit.id == vehicle.id)
+        # Future bookings leave the car's status alone until start_due_rentals
+        status = 'Rented' if start <= today else Vehicle.status
+        claim = update(Vehicle).where(Vehicle.id == free.limit(1).scalar_subquery()).values(status=status)
+        return session.execute(claim.returning(Vehicle.id), execution_options={'synchronize_session': 'fetch'}).scalar()
+
+    @cached('rentals')
+    @provide_session
+    def get_reservation_index(self, session):
+        """Interval index over the booked periods of every Active rental."""
+        bookings = session.query(Rental.vehicle_id, Rental.rental_date, Rental.return_date).filter(
+            Rental.status == 'Active'
+        ).all()
+        return ReservationIndex.from_bookings(bookings)
+
+    @cached('vehicles')
+    @provide_session
+    def get_group_vehicles(self, session, make, model, year):
+        """Units of one group as VehicleRow records, in id order."""
+        return fetch_rows(session, VehicleRow, select(*VEHICLE_ROW_COLUMNS).where(
+            Vehicle.make == make, Vehicle.model == model, Vehicle.year == year
+        ).order_by(Vehicle.id))
+
+    def get_free_vehicles(self, start, end, make=None, model=None, year=None):
+        """Units not in Maintenance with no booking overlapping [start, end).
+
+        Restricted to one group when `make`, `model` and `year` are given.
+        Each unit is checked with one binary search in the reservation index.
+        """
+        index = self.get_reservation_index()
+        if make is not None:
+            units = self.get_group_vehicles(make, model, year)
+        else:
+            units = self.get_vehicle_rows()
+        return [v for v in units if v.status != 'Maintenance' and index.is_free(v.id, start, end)]
+
+    @cached('vehicles', 'rentals')
+    @provide_session
+    def get_available_groups(self, session, start, end, query="", limit=50):
+        """Vehicle groups with units free for the whole of [start, end), as GroupRow records.
+
+        Every word of `query` must prefix the make, model or year. The free
+        units are counted in SQL: one pass over the vehicles against the
+        set of units booked in the period, so nothing per unit reaches Python.
+        With a query, the matching groups are found in ix_vehicles_group
+        first and only their units are counted.
+        """
+        busy = select(Rental.vehicle_id).where(*booking_overlaps(start, end, datetime.date.today()))
+        available = func.sum(case((Vehicle.id.in_(busy), 0), else_=1)).label('available')
+        statement = select(Vehicle.make, Vehicle.model, Vehicle.year, Vehicle.daily_rate, available).where(
+            Vehicle.status != 'Maintenance'
+        )
+        tokens = tokenize(query)
+        if tokens:
+            # SQLite's LIKE ignores ASCII case already; lower() per row would
+            # only slow the scan of the group index
+            unit = orm.aliased(Vehicle)
+            groups = select(unit.make, unit.model, unit.year).distinct()
+            for token in tokens:
+                groups = groups.where(or_(
+                    unit.make.like(f"{token}%"),
+                    unit.model.like(f"{token}%"),
+                    cast(unit.year, String).like(f"{token}%"),
+                ))
+            statement = statement.where(tuple_(Vehicle.make, Vehicle.model, Vehicle.year).in_(groups))
+        # HAVING names the column so the set of booked units is built once, not twice
+        statement = statement.group_by(Vehicle.make, Vehicle.model, Vehicle.year, Vehicle.daily_rate).having(literal_column('available') > 0)
+        return fetch_rows(session, GroupRow, statement.order_by(Vehicle.make, Vehicle.model, Vehicle.year, Vehicle.daily_rate).limit(limit))
+
+    @provide_session
+    def start_due_rentals(self, session):
+        """Mark units Rented whose booking has started. Returns the number updated."""
+        started = exists().where(
+            Rental.vehicle_id == Vehicle.id,
+            Rental.status == 'Active',
+            Rental.rental_date <= datetime.date.today(),
+        )
+        count = session.query(Vehicle).filter(Vehicle.status == 'Available', started).update(
+            {Vehicle.status: 'Rented'}, synchronize_session=False
+        )
+        if count:
+            self._invalidate('vehicles', 'vehicle')
+        return count
+
     # --- Rental Processing ---
     @provide_session
-    def create_rental(self, session, customer_id, vehicle_id, return_date_str, rental_date_str=None):
+    def create_rental(self, session, customer_id, vehicle_id, return_date_str, rental_date_str=None, reassign=True):
+        """Book `vehicle_id` for the period. Returns (rental, message), with rental None on refusal.
+
+        If the unit is already booked for part of the period (say another
+        desk just took it) and `reassign` is set, the next free unit of the
+        same group is booked instead and the message says so.
+        """
         vehicle = session.get(Vehicle, vehicle_id)
         if not vehicle:
             return None, "Vehicle not found."
-        if vehicle.status != 'Available':
+        if vehicle.status == 'Maintenance':
             return None, f"Vehicle is currently {vehicle.status}."
 
         try:
@@ -254,26 +678,48 @@ class CarRentalService:
         if duration <= 0:
             return None, "Return date must be after the start date."
 
+        today = datetime.date.today()
+        claimed_id = self._claim_unit(session, vehicle, rental_date, return_date, today, reassign)
+        if claimed_id is None:
+            return None, "Vehicle is already booked for part of that period."
+        message = "Success"
+        if claimed_id != vehicle.id:
+            taken = vehicle.registration
+            vehicle = session.get(Vehicle, claimed_id)
+            message = f"{taken} is already booked for part of that period, so {vehicle.registration} was booked instead."
+
         total_cost = duration * vehicle.daily_rate
 
         rental = Rental(
             customer_id=customer_id,
-            vehicle_id=vehicle_id,
+            vehicle_id=vehicle.id,
             rental_date=rental_date,
             return_date=return_date,
             total_cost=total_cost,
             status='Active'
         )
-        vehicle.status = 'Rented'
         session.add(rental)
-        return rental, "Success"
+        self._invalidate('rentals', 'vehicles', ('vehicle', vehicle.id))
+        self._record_revenue(session, rental_date, vehicle, 'Active', 1, total_cost)
+        return rental, message
 
     @provide_session
     def complete_rental(self, session, rental_id):
         rental = session.get(Rental, rental_id)
         if rental and rental.status == 'Active':
             rental.status = 'Completed'
-            rental.vehicle.status = 'Available'
+            # The car stays out if its next booking has already started
+            next_started = session.query(Rental.id).filter(
+                Rental.vehicle_id == rental.vehicle_id,
+                Rental.status == 'Active',
+                Rental.id != rental.id,
+                Rental.rental_date <= datetime.date.today(),
+            ).first()
+            rental.vehicle.status = 'Rented' if next_started else 'Available'
+            self._invalidate('rentals', 'vehicles', ('vehicle', rental.vehicle_id))
+            # Move the booking from the Active to the Completed revenue bucket
+            self._record_revenue(session, rental.rental_date, rental.vehicle, 'Active', -1, -rental.total_cost)
+            self._record_revenue(session, rental.rental_date, rental.vehicle, 'Completed', 1, rental.total_cost)
             return True
         return False
 
@@ -281,6 +727,150 @@ class CarRentalService:
     def get_all_rentals(self, session):
         return session.query(Rental).options(orm.joinedload(Rental.customer), orm.joinedload(Rental.vehicle)).all()
 
+    @provide_session
+    def get_rentals_page(self, session, after_id=None, before_id=None, limit=100, filter_text=""):
+        """Return up to `limit` RentalRow records in id order using keyset pagination on Rental.id.
+
+        With `before_id` the page ending just before that id is returned (still in
+        ascending order), otherwise the page starting just after `after_id`.
+
+        `filter_text` keeps rentals where every word prefixes the customer name,
+        the vehicle make/model or the status. It is one full-text lookup in
+        the rental_search table, read in rental id order and stopped at `limit`.
+        """
+        match = fts_prefix_query(filter_text)
+        if match is None:
+            key = Rental.id
+            query = select(*RENTAL_ROW_COLUMNS).join(Rental.customer).join(Rental.vehicle)
+        else:
+            key = rental_search.c.rowid
+            query = (select(*RENTAL_ROW_COLUMNS).select_from(rental_search)
+                     .join(Rental, Rental.id == key).join(Rental.customer).join(Rental.vehicle)
+                     .where(rental_search.c.rental_search.op('MATCH')(match)))
+
+        if before_id is not None:
+            rows = fetch_rows(session, RentalRow, query.where(key < before_id).order_by(key.desc()).limit(limit))
+            return rows[::-1]
+        if after_id is not None:
+            query = query.where(key > after_id)
+        return fetch_rows(session, RentalRow, query.order_by(key).limit(limit))
+
+    # --- Revenue Reporting ---
+    def _record_revenue(self, session, day, vehicle, status, count, amount):
+        """Add `count` rentals and `amount` revenue to one rollup bucket (upsert)."""
+        rollup = RevenueRollup.__table__
+        stmt = sqlite_insert(rollup).values(
+            day=day, make=vehicle.make, model=vehicle.model, year=vehicle.year,
+            status=status, rental_count=count, revenue=amount
+        )
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=[rollup.c.day, rollup.c.make, rollup.c.model, rollup.c.year, rollup.c.status],
+            set_={
+                'rental_count': rollup.c.rental_count + stmt.excluded.rental_count,
+                'revenue': rollup.c.revenue + stmt.excluded.revenue,
+            }
+        ))
+
+    def _regroup_revenue(self, session, *groups):
+        """Recompute the rollup rows of `groups` after vehicles moved between them.
+
+        The rollup is keyed by group, so without this a renamed group's Active
+        bookings would stay under the old name and complete_rental would move
+        them out of the new one.
+        """
+        session.flush()
+        rebuild_rollup_table(session.connection(), groups=groups)
+
+    @provide_session
+    def rebuild_revenue_rollup(self, session):
+        """Backfill the revenue rollup from the rentals table. Returns the number of rollup rows.
+
+        Rebuilt history is grouped under each vehicle's current make/model/year.
+        """
+        return rebuild_rollup_table(session.connection())
+
+    @provide_session
+    def get_revenue_summary(self, session):
+        """Return {status: revenue} totals across all days."""
+        rows = session.query(RevenueRollup.status, func.sum(RevenueRollup.revenue)).group_by(RevenueRollup.status)
+        return {status: revenue or 0.0 for status, revenue in rows}
+
+    @provide_session
+    def get_revenue_breakdown(self, session, period='month', start=None, end=None):
+        """Revenue per 'day', 'month' or 'model' with rental counts and Completed/Active split."""
+        if period == 'day':
+            label = RevenueRollup.day
+        elif period == 'month':
+            label = func.strftime('%Y-%m', RevenueRollup.day)
+        elif period == 'model':
+            label = RevenueRollup.make + ' ' + RevenueRollup.model + ' (' + cast(RevenueRollup.year, String) + ')'
+        else:
+            raise ValueError(f"Unknown report period '{period}'.")
+
+        query = session.query(
+            label.label('label'),
+            func.sum(RevenueRollup.rental_count).label('rentals'),
+            func.sum(case((RevenueRollup.status == 'Completed', RevenueRollup.revenue), else_=0.0)).label('completed'),
+            func.sum(case((RevenueRollup.status == 'Active', RevenueRollup.revenue), else_=0.0)).label('active'),
+        )
+        if start is not None:
+            query = query.filter(RevenueRollup.day >= start)
+        if end is not None:
+            query = query.filter(RevenueRollup.day <= end)
+        order = label.desc() if period != 'model' else label
+        return query.group_by(label).order_by(order).all()
+
+    # --- Export ---
+    def _export_query(self, kind):
+        """Return (header, row query, count query) for an exportable table."""
+        if kind == 'rentals':
+            header = ["Customer", "Vehicle", "Date", "Return Date", "Cost", "Status"]
+            query = select(
+                Customer.name, Vehicle.make + ' ' + Vehicle.model, Rental.rental_date,
+                Rental.return_date, Rental.total_cost, Rental.status
+            ).join_from(Rental, Customer).join(Vehicle, Vehicle.id == Rental.vehicle_id).order_by(Rental.id)
+            return header, query, select(func.count(Rental.id))
+        if kind == 'vehicles':
+            header = ["Brand", "Model", "Year", "Registration", "Status", "Rate"]
+            query = select(
+                Vehicle.make, Vehicle.model, Vehicle.year, Vehicle.registration, Vehicle.status, Vehicle.daily_rate
+            ).order_by(Vehicle.id)
+            return header, query, select(func.count(Vehicle.id))
+        raise ValueError(f"Unknown export type '{kind}'.")
+
+    @provide_session
+    def export_csv(self, session, kind, file_path, progress=None, cancel=None, batch_size=1000):
+        """Stream 'rentals' or 'vehicles' to `file_path` as CSV, `batch_size` rows at a time.
+
+        Rows go straight from the cursor to the file, so memory use does not grow
+        with the table. `progress(written, total)` is called after every batch and
+        setting the `cancel` event stops the export and removes the partial file.
+        Returns the number of rows written, or None if cancelled.
+        """
+        header, query, count_query = self._export_query(kind)
+        total = session.execute(count_query).scalar()
+        written = 0
+        cancelled = False
+
+        with open(file_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            result = session.execute(query.execution_options(yield_per=batch_size))
+            for batch in result.partitions():
+                if cancel is not None and cancel.is_set():
+                    cancelled = True
+                    break
+                writer.writerows(batch)
+                written += len(batch)
+                if progress:
+                    progress(written, total)
+            result.close()
+
+        if cancelled:
+            os.remove(file_path)
+            return None
+        return written
+
     @provide_session
     def authenticate(self, session, username, password):
         user = session.query(User).filter_by(username=username, password=password).first()
@@ -0,0 +1,80 @@
+"""The last dashboard snapshot, kept in a small JSON file.
+
+On start-up the window paints this immediately, before the database is even
+opened, and replaces it once a live snapshot arrives. The file is written
+after every dashboard load. Its location defaults to
+``dashboard_snapshot.json`` next to the database and can be changed with
+``CAR_RENTAL_SNAPSHOT_CACHE``.
+
+Deliberately light: only the standard library and ``read_models`` are
+imported, so loading it does not pull in SQLAlchemy.
+"""
+import datetime
+import json
+import os
+
+from read_models import RentalRow, StockRow
+
+DEFAULT_PATH = 'dashboard_snapshot.json'
+VERSION = 1
+
+
+def cache_path():
+    return os.environ.get('CAR_RENTAL_SNAPSHOT_CACHE', DEFAULT_PATH)
+
+
+def save(snapshot, path=None):
+    """Write a ``get_dashboard_snapshot()`` result to the cache file.
+
+    The file is replaced atomically, so a crash mid-write never leaves a
+    half-written snapshot behind.
+    """
+    path = path or cache_path()
+    data = {
+        'version': VERSION,
+        'saved': datetime.datetime.now().isoformat(timespec='seconds'),
+        'total_vehicles': snapshot['total_vehicles'],
+        'active_rentals': snapshot['active_rentals'],
+        'total_customers': snapshot['total_customers'],
+        'stock': [list(row) for row in snapshot['stock']],
+        'recent_rentals': [
+            [*row[:3], _iso(row.rental_date), _iso(row.return_date), *row[5:]]
+            for row in snapshot['recent_rentals']
+        ],
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def load(path=None):
+    """The cached snapshot with a ``'saved'`` datetime added, or None if there is no usable one."""
+    path = path or cache_path()
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != VERSION:
+            return None
+        return {
+            'saved': datetime.datetime.fromisoformat(data['saved']),
+            'total_vehicles': data['total_vehicles'],
+            'active_rentals': data['active_rentals'],
+            'total_customers': data['total_customers'],
+            'stock': [StockRow(*row) for row in data['stock']],
+            'recent_rentals': [
+                RentalRow(*row[:3], _date(row[3]), _date(row[4]), *row[5:])
+                for row in data['recent_rentals']
+            ],
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        # Missing or damaged cache: start with an empty dashboard instead
+        return None
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _date(value):
+    return datetime.date.fromisoformat(value) if value else None
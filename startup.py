@@ -0,0 +1,46 @@
+"""Startup phase timing.
+
+``main.py`` imports this module first, so the clock starts before any other
+import. Each ``mark(phase)`` records the milliseconds since then; the
+Diagnostics screen lists them. Set ``CAR_RENTAL_STARTUP_LOG`` to a file name
+to also append every start-up's phases to it as one JSON line, which makes
+import and first-paint times easy to track across releases.
+"""
+import json
+import os
+import threading
+import time
+
+_T0 = time.perf_counter()
+_phases = []
+_lock = threading.Lock()
+
+# Marking this phase completes a start-up and writes its log line
+FINAL_PHASE = 'live_dashboard'
+
+
+def mark(phase):
+    """Record that ``phase`` finished now. Returns its time in ms since start."""
+    elapsed_ms = (time.perf_counter() - _T0) * 1000
+    with _lock:
+        _phases.append((phase, elapsed_ms))
+    if phase == FINAL_PHASE:
+        _write_log(os.environ.get('CAR_RENTAL_STARTUP_LOG'))
+    return elapsed_ms
+
+
+def phases():
+    """``[(phase, ms since start), ...]`` in the order they were marked."""
+    with _lock:
+        return list(_phases)
+
+
+def _write_log(path):
+    if not path:
+        return
+    record = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'phases': dict(phases())}
+    try:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+    except OSError:
+        pass  # Timing must never keep the app from starting
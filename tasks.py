@@ -0,0 +1,127 @@
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+
+class _Task:
+    def __init__(self, fn, args, kwargs, on_done, on_error, scope):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.on_done = on_done
+        self.on_error = on_error
+        self.scope = scope
+        self.future = None
+
+
+class TaskRunner:
+    """Runs blocking calls on worker threads and hands results back on the Tk thread.
+
+    Finished futures are collected by an ``after()`` poll on ``root``, so the
+    ``on_done``/``on_error`` callbacks always run on the mainloop and may touch
+    widgets. Tasks submitted with the same ``key`` are coalesced: while one is
+    running, later requests collapse into a single queued re-run and the
+    superseded result is dropped. View-bound tasks are tied to the current
+    scope; ``new_scope()`` (called when the user leaves a view) discards their
+    results.
+    """
+
+    def __init__(self, root, max_workers=4, poll_ms=30, on_busy=None, on_error=None):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.on_busy = on_busy
+        self.on_error = on_error
+        self.scope = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="service")
+        self._active = []
+        self._running = {}
+        self._queued = {}
+        self._after_id = None
+        self._polling = False
+        self._reported_busy = False
+
+    @property
+    def busy(self):
+        return bool(self._active or self._queued)
+
+    def submit(self, fn, *args, on_done=None, on_error=None, key=None, view_bound=True, **kwargs):
+        """Run ``fn(*args, **kwargs)`` on a worker thread. Returns the Future, or None if queued."""
+        task = _Task(fn, args, kwargs, on_done, on_error, self.scope if view_bound else None)
+        if key is not None and key in self._running:
+            self._queued[key] = task
+            return None
+        return self._start(task, key)
+
+    def new_scope(self):
+        """Drop pending results of every view-bound task (the view they target is gone)."""
+        self.scope += 1
+        self._queued = {k: t for k, t in self._queued.items() if t.scope is None}
+
+    def shutdown(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _start(self, task, key):
+        task.future = self._executor.submit(task.fn, *task.args, **task.kwargs)
+        self._active.append((key, task))
+        if key is not None:
+            self._running[key] = task
+        self._report_busy(True)
+        if self._after_id is None and not self._polling:
+            self._after_id = self.root.after(self.poll_ms, self._poll)
+        return task.future
+
+    def _poll(self):
+        self._after_id = None
+        self._polling = True
+        try:
+            self._collect()
+        finally:
+            self._polling = False
+
+        if self._active:
+            self._after_id = self.root.after(self.poll_ms, self._poll)
+        else:
+            self._report_busy(False)
+
+    def _report_busy(self, busy):
+        if busy != self._reported_busy:
+            self._reported_busy = busy
+            if self.on_busy:
+                self.on_busy(busy)
+
+    def _collect(self):
+        finished, pending = [], []
+        for entry in self._active:
+            (finished if entry[1].future.done() else pending).append(entry)
+        self._active = pending
+
+        for key, task in finished:
+            if key is not None:
+                self._running.pop(key, None)
+                queued = self._queued.pop(key, None)
+                if queued is not None:
+                    # A newer request for the same key supersedes this result
+                    self._start(queued, key)
+                    continue
+            if task.scope is not None and task.scope != self.scope:
+                continue
+            try:
+                self._deliver(task)
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+
+    def _deliver(self, task):
+        if task.future.cancelled():
+            return
+        error = task.future.exception()
+        if error is None:
+            if task.on_done:
+                task.on_done(task.future.result())
+            return
+        handler = task.on_error or self.on_error
+        if handler:
+            handler(error)
+        else:
+            print(f"Background task failed: {error}")
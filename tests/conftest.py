@@ -0,0 +1,22 @@
+"""Fixtures shared by the tests: a fresh SQLite file per test and a service bound to it."""
+import pytest
+
+import models
+from database import create_db_engine
+from services import CarRentalService
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'car_rental.db'}")
+    models.Session.configure(bind=engine)
+    models.init_db(engine)
+    yield engine
+    models.Session.configure(bind=models.engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def service(engine):
+    # The read cache is off so every call sees the database
+    return CarRentalService(cache_size=0)
@@ -0,0 +1,29 @@
+import datetime
+
+import api_json
+from read_models import RentalRow
+from reservations import ReservationIndex
+
+
+def test_values_survive_a_round_trip():
+    row = RentalRow(7, 'Ana Cruz', 'Toyota Vios', datetime.date(2099, 1, 1), None, 3000.0, 'Active')
+    value = {
+        'date': datetime.date(2099, 1, 2),
+        'time': datetime.datetime(2099, 1, 2, 9, 30),
+        'pair': (True, 'Success'),
+        'rows': [row],
+        'by_id': {1: 'one', 2: ['two']},
+        '$odd': None,
+    }
+    decoded = api_json.decode(api_json.encode(value))
+
+    assert decoded == value
+    assert type(decoded['rows'][0]) is RentalRow
+
+
+def test_reservation_index_round_trip():
+    index = ReservationIndex()
+    index.add(3, datetime.date(2099, 1, 1), datetime.date(2099, 1, 4))
+    index.add(5, datetime.date(2099, 2, 1), datetime.date(2099, 2, 2))
+
+    assert api_json.decode(api_json.encode(index)).intervals() == index.intervals()
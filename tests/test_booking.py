@@ -0,0 +1,88 @@
+import datetime
+import random
+import threading
+
+from services import CarRentalService
+
+# Pairs of Active rentals of one unit whose periods overlap
+DOUBLE_BOOKINGS = """
+    SELECT count(*) FROM rentals a JOIN rentals b
+      ON a.vehicle_id = b.vehicle_id AND a.id < b.id
+    WHERE a.status = 'Active' AND b.status = 'Active'
+      AND a.rental_date < b.return_date AND b.rental_date < a.return_date
+"""
+
+
+def days(n):
+    return (datetime.date.today() + datetime.timedelta(days=n)).isoformat()
+
+
+def test_concurrent_bookings_never_double_book(engine, service):
+    threads, attempts = 8, 25
+    service.add_vehicle_batch('Toyota', 'Vios', 2020, 'VIO', 1000.0, 5)
+    units = [v.id for v in service.get_group_vehicles('Toyota', 'Vios', 2020)]
+    customers = [service.add_customer(f'Desk {i}', f'0917{i:07d}', f'DESK-{i}').id for i in range(threads)]
+    barrier = threading.Barrier(threads)
+    outcomes = []
+    errors = []
+
+    def desk(seed):
+        # Each desk has its own service, as separate app instances do
+        desk_service = CarRentalService(cache_size=0)
+        rng = random.Random(seed)
+        barrier.wait()
+        for _ in range(attempts):
+            start = rng.randrange(10)
+            try:
+                rental, message = desk_service.create_rental(
+                    customers[seed], rng.choice(units), days(start + rng.randint(1, 3)), days(start)
+                )
+            except Exception as e:
+                errors.append(e)
+            else:
+                outcomes.append(rental is not None)
+
+    workers = [threading.Thread(target=desk, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert errors == []
+    assert len(outcomes) == threads * attempts
+    assert any(outcomes)
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql(DOUBLE_BOOKINGS).scalar() == 0
+
+
+def test_taken_unit_is_reassigned_within_its_group(service):
+    service.add_vehicle_batch('Honda', 'City', 2021, 'CTY', 1200.0, 2)
+    first, second = service.get_group_vehicles('Honda', 'City', 2021)
+    customer = service.add_customer('Ana Cruz', '09170000001', 'N01-00-000001').id
+
+    rental, message = service.create_rental(customer, first.id, days(5), days(1))
+    assert (rental.vehicle_id, message) == (first.id, "Success")
+
+    rental, message = service.create_rental(customer, first.id, days(6), days(2))
+    assert rental.vehicle_id == second.id
+    assert message == f"{first.registration} is already booked for part of that period, so {second.registration} was booked instead."
+
+    rental, message = service.create_rental(customer, first.id, days(4), days(3))
+    assert rental is None
+
+    # A booking may start the day the previous one ends
+    rental, message = service.create_rental(customer, first.id, days(8), days(5), reassign=False)
+    assert (rental.vehicle_id, message) == (first.id, "Success")
+
+
+def test_advance_booking_takes_the_car_out_when_it_starts(service):
+    service.add_vehicle('Ford', 'Ranger', 2019, 'RNG-1', 2500.0)
+    vehicle = service.get_group_vehicles('Ford', 'Ranger', 2019)[0]
+    customer = service.add_customer('Ben Reyes', '09170000002', 'N01-00-000002').id
+
+    service.create_rental(customer, vehicle.id, days(5), days(2))
+    assert service.get_vehicle(vehicle.id).status == 'Available'
+    assert service.start_due_rentals() == 0
+
+    service.create_rental(customer, vehicle.id, days(2))
+    assert service.get_vehicle(vehicle.id).status == 'Rented'
@@ -0,0 +1,38 @@
+import datetime
+
+from reservations import OPEN_ENDED, ReservationIndex, booking_end
+
+D = datetime.date
+
+
+def test_touching_bookings_merge_and_leave_gaps_free():
+    index = ReservationIndex()
+    index.add(1, D(2099, 1, 1), D(2099, 1, 5))
+    index.add(1, D(2099, 1, 10), D(2099, 1, 12))
+    index.add(1, D(2099, 1, 5), D(2099, 1, 7))
+
+    assert index.bookings(1) == [(D(2099, 1, 1), D(2099, 1, 7)), (D(2099, 1, 10), D(2099, 1, 12))]
+    assert index.is_free(1, D(2099, 1, 7), D(2099, 1, 10))
+    assert not index.is_free(1, D(2099, 1, 6), D(2099, 1, 8))
+    assert not index.is_free(1, D(2098, 12, 1), D(2099, 2, 1))
+    assert index.is_free(2, D(2099, 1, 1), D(2099, 1, 5))
+
+
+def test_overlapping_bookings_are_absorbed():
+    index = ReservationIndex()
+    index.add(1, D(2099, 1, 3), D(2099, 1, 4))
+    index.add(1, D(2099, 1, 8), D(2099, 1, 9))
+    index.add(1, D(2099, 1, 2), D(2099, 1, 10))
+
+    assert index.bookings(1) == [(D(2099, 1, 2), D(2099, 1, 10))]
+    assert len(index) == 1
+
+
+def test_overdue_and_open_rentals_hold_the_car_open_ended():
+    today = D(2099, 1, 10)
+    assert booking_end(D(2099, 1, 5), today) == OPEN_ENDED
+    assert booking_end(None, today) == OPEN_ENDED
+    assert booking_end(D(2099, 1, 12), today) == D(2099, 1, 12)
+
+    index = ReservationIndex.from_bookings([(1, D(2099, 1, 1), D(2099, 1, 5))], today=today)
+    assert not index.is_free(1, D(2099, 3, 1), D(2099, 3, 2))
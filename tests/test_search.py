@@ -0,0 +1,32 @@
+from collections import namedtuple
+
+from search import IncrementalSearch, PrefixIndex
+
+Unit = namedtuple('Unit', 'id make model registration')
+
+UNITS = [
+    Unit(1, 'Toyota', 'Vios', 'ABC-123-4'),
+    Unit(2, 'Toyota', 'Innova', 'XYZ-777'),
+    Unit(3, 'Honda', 'City', 'ABD-5123'),
+]
+
+
+def index():
+    return PrefixIndex(UNITS, key_of=lambda u: u.id, text_of=lambda u: f"{u.make} {u.model} {u.registration}")
+
+
+def test_query_matches_anywhere_inside_a_token():
+    assert index().search('toy vi') == [1]
+    assert index().search('yota') == [1, 2]
+    assert index().search('123') == [1, 3]
+    assert index().search('23-4') == [1]
+    assert index().search('77') == [2]
+    assert index().search('qq') == []
+
+
+def test_incremental_search_narrows_the_last_result():
+    search = IncrementalSearch(index())
+    assert [u.id for u in search.search('ab')] == [1, 3]
+    assert [u.id for u in search.search('abd')] == [3]
+    assert [u.id for u in search.search('bd-51')] == [3]
+    assert [u.id for u in search.search('')] == [1, 2, 3]
@@ -0,0 +1,99 @@
+import datetime
+
+from sqlalchemy import select
+
+import models
+from read_models import CustomerRow, VehicleRow
+from services import CarRentalService
+
+
+def days(n):
+    return (datetime.date.today() + datetime.timedelta(days=n)).isoformat()
+
+
+def book(service, count):
+    """Book `count` back-to-back rentals of one unit for two customers. Returns the rental ids."""
+    service.add_vehicle('Toyota', 'Vios', 2020, 'VIO-1', 1000.0)
+    vehicle = service.get_group_vehicles('Toyota', 'Vios', 2020)[0]
+    ana = service.add_customer('Ana Cruz', '09170000001', 'N01-00-000001').id
+    ben = service.add_customer('Ben Reyes', '09170000002', 'N01-00-000002').id
+    return [service.create_rental(ana if i % 2 else ben, vehicle.id, days(i * 2 + 12), days(i * 2 + 10))[0].id
+            for i in range(count)]
+
+
+def test_rentals_pages_follow_the_id_order(service):
+    ids = book(service, 7)
+
+    first = service.get_rentals_page(limit=3)
+    second = service.get_rentals_page(after_id=first[-1].id, limit=3)
+    last = service.get_rentals_page(after_id=second[-1].id, limit=3)
+    assert [r.id for r in first + second + last] == ids
+    assert [r.id for r in service.get_rentals_page(before_id=second[0].id, limit=3)] == ids[:3]
+    assert service.get_rentals_page(after_id=ids[-1], limit=3) == []
+
+
+def test_rental_search_pages_and_follows_changes(service):
+    ids = book(service, 7)
+    ana = ids[1::2]
+
+    first = service.get_rentals_page(limit=2, filter_text='ana')
+    rest = service.get_rentals_page(after_id=first[-1].id, limit=5, filter_text='ana')
+    assert [r.id for r in first + rest] == ana
+    assert [r.id for r in service.get_rentals_page(before_id=ana[-1], limit=2, filter_text='an')] == ana[-3:-1]
+
+    service.update_vehicle_batch('Toyota', 'Vios', 2020, 'Toyota', 'Wigo', 2020, 900.0)
+    assert service.get_rentals_page(filter_text='vios') == []
+    assert len(service.get_rentals_page(filter_text='toy wig')) == 7
+
+    service.complete_rental(ids[0])
+    assert [r.id for r in service.get_rentals_page(filter_text='ben comp')] == ids[:1]
+
+
+def test_customer_search_follows_inserts_and_deletes(service):
+    ana = service.add_customer('Ana Cruz', '09170000001', 'N01-00-000001')
+    service.add_customer('Anabel Santos', '09170000003', 'N01-00-000003')
+
+    assert [c.name for c in service.search_customers('ana')] == ['Ana Cruz', 'Anabel Santos']
+    assert [c.name for c in service.search_customers('ana n01-00-000001')] == ['Ana Cruz']
+
+    service.delete_customer(ana.id)
+    assert [c.name for c in service.search_customers('cruz')] == []
+
+
+def _rollup(connection):
+    rollup = models.RevenueRollup.__table__
+    return sorted(
+        (row.day, row.make, row.model, row.year, row.status, row.rental_count, round(row.revenue, 2))
+        for row in connection.execute(select(rollup)) if row.rental_count or row.revenue
+    )
+
+
+def test_revenue_rollup_matches_a_rebuild(engine, service):
+    ids = book(service, 4)
+    service.complete_rental(ids[0])
+    service.add_vehicle('Honda', 'City', 2021, 'CTY-1', 1200.0)
+    service.update_vehicle_batch('Toyota', 'Vios', 2020, 'Honda', 'City', 2021, 1200.0)
+    service.complete_rental(ids[1])
+
+    with engine.begin() as connection:
+        maintained = _rollup(connection)
+        models.rebuild_revenue_rollup(connection)
+        assert maintained == _rollup(connection)
+        connection.rollback()
+    assert sum(row[5] for row in maintained) == 4
+
+
+def test_cached_readers_share_rows_not_orm_instances(engine):
+    service = CarRentalService()
+    service.add_vehicle('Toyota', 'Vios', 2020, 'VIO-1', 1000.0)
+    service.add_customer('Ana Cruz', '09170000001', 'N01-00-000001')
+
+    vehicle = service.get_vehicle(1)
+    assert isinstance(vehicle, VehicleRow)
+    assert service.get_vehicle(1) is vehicle
+    assert service.get_vehicle(99) is None
+    assert all(isinstance(v, VehicleRow) for v in service.get_all_vehicles() + service.get_available_vehicles())
+    assert all(isinstance(c, CustomerRow) for c in service.get_all_customers())
+
+    service.update_vehicle(1, daily_rate=1200.0)
+    assert service.get_vehicle(1).daily_rate == 1200.0
@@ -0,0 +1,331 @@
+from search import DebouncedSearch
+
+
+def _as_text(values):
+    # Tk hands values back as str/int/Tcl objects; compare their text
+    return tuple(str(value) for value in values)
+
+
+def sync_tree(tree, items):
+    """Make the top-level rows of ``tree`` match ``items``, a list of ``(iid, values)``.
+
+    Only rows that differ are touched: new iids are inserted, rows in the
+    wrong place moved, changed values updated and iids no longer listed
+    deleted. Unchanged rows stay put, so the selection and the scroll
+    position survive. Returns the number of rows touched.
+    """
+    wanted = [(str(iid), values) for iid, values in items]
+    keep = {iid for iid, _ in wanted}
+    current = list(tree.get_children())
+    gone = [iid for iid in current if iid not in keep]
+    if gone:
+        tree.delete(*gone)
+        current = [iid for iid in current if iid in keep]
+    touched = len(gone)
+
+    present = set(current)
+    for index, (iid, values) in enumerate(wanted):
+        if iid not in present:
+            tree.insert("", index, iid=iid, values=values)
+            current.insert(index, iid)
+            present.add(iid)
+            touched += 1
+            continue
+        changed = False
+        if current[index] != iid:
+            tree.move(iid, "", index)
+            current.remove(iid)
+            current.insert(index, iid)
+            changed = True
+        if _as_text(tree.item(iid, "values")) != _as_text(values):
+            tree.item(iid, values=values)
+            changed = True
+        touched += changed
+    return touched
+
+
+class ListPageSource:
+    """Page source over an in-memory list. Keys are list positions."""
+
+    in_memory = True
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+
+    def fetch(self, after=None, before=None, limit=100):
+        if before is not None:
+            start = max(0, before - limit)
+            return [(i, self.rows[i]) for i in range(start, before)]
+        start = 0 if after is None else after + 1
+        return list(enumerate(self.rows[start:start + limit], start))
+
+
+class KeysetPageSource:
+    """Page source backed by a keyset-paginated service call.
+
+    ``fetch_page(after_id, before_id, limit)`` must return rows in ascending key
+    order: the first ``limit`` rows after ``after_id``, or the last ``limit``
+    rows before ``before_id``.
+    """
+
+    in_memory = False
+
+    def __init__(self, fetch_page, key_of=lambda row: row.id):
+        self.fetch_page = fetch_page
+        self.key_of = key_of
+
+    def fetch(self, after=None, before=None, limit=100):
+        return [(self.key_of(row), row) for row in self.fetch_page(after, before, limit)]
+
+
+class PagedTree:
+    """Keeps only a sliding window of rows materialized in a Treeview.
+
+    Pages are pulled from ``source`` as the user scrolls near either edge of the
+    window, and rows that fall more than ``max_rows`` behind are dropped again.
+    ``item_of(row)`` returns the ``(iid, values)`` pair to insert for a row.
+    With a ``runner`` (tasks.TaskRunner), pages from database-backed sources are
+    fetched on a worker thread and applied when they arrive.
+
+    ``set_source`` starts over at the top; ``refresh`` re-reads only the rows
+    currently materialized and applies the differences (see ``sync_tree``).
+    """
+
+    def __init__(self, tree, scrollbar, item_of, source=None, page_size=100, max_rows=300, runner=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.item_of = item_of
+        self.page_size = page_size
+        self.max_rows = max(max_rows, page_size * 2)
+        self.runner = runner
+        self.source = None
+        self._keys = []
+        self._iids = []
+        self._head = None  # key just before the first materialized row (None: the very first row)
+        self._more_above = False
+        self._more_below = False
+        self._loading = False
+        tree.configure(yscrollcommand=self._on_yscroll)
+        if source is not None:
+            self.set_source(source)
+
+    def set_source(self, source):
+        """Replace the data source and show its first page."""
+        self.source = source
+        self.reset()
+
+    def reset(self):
+        self._loading = False
+        if self.source is None:
+            self._show_first(None, [])
+            return
+        self._fetch(self._show_first, key="reset")
+
+    def refresh(self, source=None):
+        """Re-read the materialized rows (from ``source`` if given) and apply only what changed.
+
+        Keeps the scroll position and the selection; use it to show edits,
+        and ``set_source`` for a different query.
+        """
+        if source is not None:
+            self.source = source
+        self._loading = False
+        if self.source is None or not self._keys:
+            self.reset()
+            return
+        limit = max(len(self._keys), self.page_size)
+        self._fetch(lambda source, rows: self._show_refreshed(source, rows, limit), key="reset", after=self._head, limit=limit)
+
+    def _fetch(self, apply, key=None, limit=None, **kwargs):
+        source = self.source
+        limit = limit or self.page_size
+        if self.runner is None or getattr(source, "in_memory", False):
+            apply(source, source.fetch(limit=limit, **kwargs))
+            return
+        # Not view-bound: a dropped result would leave _loading set, and
+        # the source check in each apply already discards stale pages
+        self.runner.submit(
+            source.fetch, limit=limit, key=(id(self), key) if key else None,
+            on_done=lambda rows: apply(source, rows), on_error=self._failed, view_bound=False, **kwargs
+        )
+
+    def _failed(self, error):
+        self._loading = False
+        if self.runner.on_error:
+            self.runner.on_error(error)
+
+    def _insert(self, index, row):
+        iid, values = self.item_of(row)
+        self.tree.insert("", index, iid=iid, values=values)
+        return str(iid)
+
+    def _append(self, rows):
+        for key, row in rows:
+            self._iids.append(self._insert("end", row))
+            self._keys.append(key)
+
+    def _show_first(self, source, rows):
+        if source is not self.source:
+            return
+        # Clear only once the new page is here, so the old rows stay up meanwhile
+        self.tree.delete(*self.tree.get_children())
+        self._keys, self._iids = [], []
+        self._head = None
+        self._more_above = False
+        self._append(rows)
+        self._more_below = len(rows) == self.page_size
+        self.tree.yview_moveto(0)
+
+    def _show_refreshed(self, source, rows, limit):
+        if source is not self.source:
+            return
+        if not rows and self._head is not None:
+            # Everything from our window on is gone; start over at the top
+            self.reset()
+            return
+        anchor = self._anchor()
+        anchor_iid = self._iids[anchor] if anchor < len(self._iids) else None
+        items = [self.item_of(row) for _, row in rows]
+        sync_tree(self.tree, items)
+        self._keys = [key for key, _ in rows]
+        self._iids = [str(iid) for iid, _ in items]
+        self._more_below = len(rows) == limit
+        if anchor_iid in self._iids and self._iids.index(anchor_iid) != anchor:
+            # Rows were added or removed above the first visible one
+            self.tree.yview_moveto(self._iids.index(anchor_iid) / len(self._iids))
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if self._loading:
+            return
+        if float(last) > 0.9 and self._more_below:
+            self._loading = True
+            self.tree.after_idle(self._load_below)
+        elif float(first) < 0.1 and self._more_above:
+            self._loading = True
+            self.tree.after_idle(self._load_above)
+
+    def _anchor(self):
+        # Index of the first visible row, used to keep the view steady
+        first = self.tree.yview()[0]
+        return int(first * len(self._keys)) if self._keys else 0
+
+    def _load_below(self):
+        if not self._keys:
+            self._loading = False
+            return
+        self._fetch(self._show_below, after=self._keys[-1])
+
+    def _show_below(self, source, rows):
+        self._loading = False
+        if source is not self.source or not self._keys:
+            return
+        anchor = self._anchor()
+        self._append(rows)
+        self._more_below = len(rows) == self.page_size
+
+        overflow = len(self._keys) - self.max_rows
+        if overflow > 0:
+            self._head = self._keys[overflow - 1]
+            self.tree.delete(*self._iids[:overflow])
+            del self._iids[:overflow]
+            del self._keys[:overflow]
+            self._more_above = True
+            anchor -= overflow
+        self.tree.yview_moveto(max(anchor, 0) / len(self._keys))
+
+    def _load_above(self):
+        if not self._keys:
+            self._loading = False
+            return
+        # One extra row tells whether more remain above and becomes the new head
+        self._fetch(self._show_above, before=self._keys[0], limit=self.page_size + 1)
+
+    def _show_above(self, source, rows):
+        self._loading = False
+        if source is not self.source or not self._keys:
+            return
+        anchor = self._anchor()
+        self._more_above = len(rows) > self.page_size
+        if self._more_above:
+            self._head = rows[0][0]
+            rows = rows[1:]
+        else:
+            self._head = None
+        for i, (key, row) in enumerate(rows):
+            self._iids.insert(i, self._insert(i, row))
+            self._keys.insert(i, key)
+        anchor += len(rows)
+
+        overflow = len(self._keys) - self.max_rows
+        if overflow > 0:
+            self.tree.delete(*self._iids[-overflow:])
+            del self._iids[-overflow:]
+            del self._keys[-overflow:]
+            self._more_below = True
+        self.tree.yview_moveto(anchor / len(self._keys))
+
+
+class Typeahead:
+    """Editable Combobox whose choices are looked up as the user types.
+
+    Typing pauses trigger ``lookup(text)`` on a worker thread of ``runner``
+    (a tasks.TaskRunner); the rows it returns become the dropdown choices,
+    labelled by ``label_of(row)``. Only the latest lookup's rows are shown.
+    ``selected`` is the row picked from the list, or None while the text is
+    not one of the choices; ``on_select(row_or_None)`` reports changes.
+    ``refresh()`` repeats the last lookup (e.g. after its inputs changed) and
+    keeps the pick if a row with the same ``key_of`` comes back.
+    """
+
+    def __init__(self, combobox, variable, lookup, label_of, runner, key_of=lambda row: row, on_select=None, delay_ms=200):
+        self.combobox = combobox
+        self.variable = variable
+        self.lookup = lookup
+        self.label_of = label_of
+        self.key_of = key_of
+        self.runner = runner
+        self.on_select = on_select
+        self.selected = None
+        self.query = ""
+        self._choices = {}
+        DebouncedSearch(combobox, variable, self._typed, delay_ms)
+        combobox.bind("<<ComboboxSelected>>", self._picked, add="+")
+
+    def refresh(self):
+        self._submit(self.query)
+
+    def _typed(self, text):
+        if text in self._choices:
+            # Written by a pick or by _show (or typed out in full)
+            self._select(self._choices[text])
+            return
+        self._select(None)
+        self.query = text
+        self._submit(text)
+
+    def _submit(self, text):
+        self.runner.submit(self.lookup, text, key=(id(self), "lookup"), on_done=self._show, view_bound=False)
+
+    def _show(self, rows):
+        if not self.combobox.winfo_exists():
+            return
+        self._choices = {self.label_of(row): row for row in rows}
+        self.combobox.configure(values=list(self._choices))
+        if self.selected is not None:
+            # Keep the pick, with its fresh label (counts may have changed)
+            key = self.key_of(self.selected)
+            row = next((row for row in rows if self.key_of(row) == key), None)
+            if row is not None:
+                self.variable.set(self.label_of(row))
+            self._select(row)
+
+    def _picked(self, event=None):
+        self._select(self._choices.get(self.combobox.get()))
+
+    def _select(self, row):
+        if row is self.selected:
+            return
+        self.selected = row
+        if self.on_select:
+            self.on_select(row)